@@ -1,8 +1,4 @@
 import streamlit as st
-import pandas as pd
-import datetime
-import os
-import subprocess
 import sys
 import importlib.metadata
 
@@ -13,22 +9,12 @@ st.set_page_config(
     layout="wide"
 )
 
-# === Playwright Installation for Streamlit Cloud ===
-@st.cache_resource
-def install_playwright_browsers():
-    print("⬇️ Installing Playwright browsers...")
-    try:
-        subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
-        print("✅ Playwright browsers installed.")
-    except Exception as e:
-        print(f"❌ Failed to install Playwright browsers: {e}")
-
-# Run installation once
-install_playwright_browsers()
-
 # 引入你的后端函数 (Wrapped with error handling)
 try:
-    from main import process_faculty_url
+    from jobs import JobRunner
+    from excel_writer import excel_bytes, result_columns
+    from search_index import get_search_index
+    from result_store import ResultStore
 except ImportError as e:
     st.error(f"❌ Critical Import Error: {e}")
     st.error("Please check the logs for version details or try rebooting the app.")
@@ -38,9 +24,8 @@ except ImportError as e:
     st.subheader("🛠 Debug Information")
     try:
         debug_info = {
-            "langchain": importlib.metadata.version("langchain"),
-            "langchain_core": importlib.metadata.version("langchain_core"),
-            "scrapegraphai": importlib.metadata.version("scrapegraphai"),
+            "openai": importlib.metadata.version("openai"),
+            "beautifulsoup4": importlib.metadata.version("beautifulsoup4"),
             "python": sys.version
         }
         st.json(debug_info)
@@ -63,23 +48,34 @@ LANG = {
         "target_url_help": "Enter the URL of the faculty directory page.",
         "uni_name": "University Name",
         "uni_name_help": "Enter the full name of the university for verification.",
+        "summary_langs": "Summary Languages",
+        "summary_langs_help": "One summary column per language, generated in a single pass.",
         "start_btn": "🚀 Start Scraping",
         "error_api": "❌ DeepSeek API Key is required! Please enter it in the sidebar.",
         "error_fields": "❌ Please fill in both Target URL and University Name!",
-        "status_working": "🕵️ ScholarScout is working...",
-        "status_init": "1️⃣ Initializing scraper...",
-        "status_scraping": "2️⃣ Scraping from: {}",
-        "status_processing": "3️⃣ Received {} records. Processing...",
         "status_empty": "⚠️ No faculty members found.",
-        "status_reading": "3️⃣ Reading generated file...",
-        "status_complete": "✅ Mission Complete!",
         "status_failed": "❌ Execution Failed",
-        "save_msg": "💾 Saving temporary file: {}...",
         "metrics_total": "Total Faculty",
         "metrics_s2": "S2 Verified",
         "metrics_web": "Web/Other",
         "data_preview": "📊 Data Preview",
         "download_btn": "📥 Download Excel Report",
+        "job_submitted": "🚀 Job {} started in the background. You can keep using the page.",
+        "job_reused": "♻️ Same inputs as job {} — showing its results instead of running again.",
+        "force_rerun": "Ignore cached results",
+        "force_rerun_help": "Re-run even if the same URL and university were processed recently.",
+        "jobs_header": "🗂️ Jobs",
+        "job_show": "Show",
+        "job_cancel": "Cancel",
+        "jobs_refresh": "🔄 Refresh",
+        "tab_jobs": "🗂️ Jobs & Results",
+        "tab_search": "🔎 Search",
+        "search_query": "Research topic",
+        "search_placeholder": "federated learning",
+        "search_unis": "Universities",
+        "search_title": "Title",
+        "search_hint": "Search {} collected faculty by research topic, e.g. \"federated learning\" or robot*.",
+        "search_empty": "No matching faculty.",
     },
     "中文": {
         "title": "🎓 ScholarScout: 教授科研方向提取工具",
@@ -93,23 +89,34 @@ LANG = {
         "target_url_help": "输入学院教职人员列表页面的网址。",
         "uni_name": "大学全名 (University Name)",
         "uni_name_help": "输入大学英文全名，用于学术数据库核验。",
+        "summary_langs": "摘要语言",
+        "summary_langs_help": "每种语言生成一列摘要，一次运行全部完成。",
         "start_btn": "🚀 开始采集",
         "error_api": "❌ 必须填写 DeepSeek API Key！请在侧边栏输入。",
         "error_fields": "❌ 请同时填写目标网址和大学名称！",
-        "status_working": "🕵️ ScholarScout 正在运行...",
-        "status_init": "1️⃣ 正在初始化爬虫...",
-        "status_scraping": "2️⃣ 正在抓取: {}...",
-        "status_processing": "3️⃣ 已获取 {} 条记录，正在进行智能分析...",
         "status_empty": "⚠️ 未找到任何教职人员。",
-        "status_reading": "3️⃣ 正在读取生成的文件...",
-        "status_complete": "✅ 任务完成！",
         "status_failed": "❌ 执行失败",
-        "save_msg": "💾 正在保存临时文件: {}...",
         "metrics_total": "教师总数",
         "metrics_s2": "学术库验证",
         "metrics_web": "网页提取",
         "data_preview": "📊 数据预览",
         "download_btn": "📥 下载 Excel 报告",
+        "job_submitted": "🚀 任务 {} 已在后台启动，可以继续使用页面。",
+        "job_reused": "♻️ 与任务 {} 的输入相同，直接显示其结果，不再重复运行。",
+        "force_rerun": "忽略缓存结果",
+        "force_rerun_help": "即使最近处理过相同的网址和大学，也重新运行。",
+        "jobs_header": "🗂️ 任务列表",
+        "job_show": "查看",
+        "job_cancel": "取消",
+        "jobs_refresh": "🔄 刷新",
+        "tab_jobs": "🗂️ 任务与结果",
+        "tab_search": "🔎 搜索",
+        "search_query": "研究方向",
+        "search_placeholder": "federated learning",
+        "search_unis": "大学",
+        "search_title": "职称",
+        "search_hint": "按研究方向检索已收集的 {} 位教师，例如 \"federated learning\" 或 robot*。",
+        "search_empty": "没有匹配的教师。",
     }
 }
 
@@ -157,14 +164,30 @@ with st.sidebar:
             placeholder="University of Wisconsin-Madison",
             help=T["uni_name_help"]
         )
+        summary_langs = st.multiselect(
+            T["summary_langs"],
+            options=["zh", "en"],
+            default=["en"] if selected_lang == "English" else ["zh"],
+            format_func=lambda code: {"zh": "中文 (zh)", "en": "English (en)"}[code],
+            help=T["summary_langs_help"]
+        )
+        force_rerun = st.checkbox(T["force_rerun"], help=T["force_rerun_help"])
         submitted = st.form_submit_button(T["start_btn"])
 
-# === 3. 核心逻辑 ===
-# 初始化状态
-if 'df_result' not in st.session_state:
-    st.session_state.df_result = None
-if 'csv_path' not in st.session_state:
-    st.session_state.csv_path = None
+# === 3. 核心逻辑: 后台任务 (Background jobs) ===
+# 任务在后台进程中运行，刷新页面或操作控件不会中断或重复任务。
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+runner = get_job_runner()
+
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+# The runner is shared by every browser session: each session only sees the jobs it submitted.
+# job id -> True if this session started the job (only then may it cancel it), False if it reused one.
+if 'my_jobs' not in st.session_state:
+    st.session_state.my_jobs = {}
 
 if submitted:
     # 0. 验证 API Key
@@ -173,85 +196,69 @@ if submitted:
     elif not target_url or not uni_name:
         st.error(T["error_fields"])
     else:
-        # 设置环境变量供后端使用
-        os.environ["DEEPSEEK_API_KEY"] = deepseek_key
-        if s2_key:
-            os.environ["S2_API_KEY"] = s2_key
-        # 清除可能存在的旧环境变量（如果用户清空了输入框）
-        elif "S2_API_KEY" in os.environ:
-            del os.environ["S2_API_KEY"]
+        # Pass 'en' for English, 'zh' for Chinese
+        lang_code = "en" if selected_lang == "English" else "zh"
+        existing = {j["id"] for j in runner.list(limit=1000)}
+        # Keys go to the worker with the job; they are not stored in the job registry.
+        job_id = runner.submit(
+            target_url, uni_name, languages=summary_langs or [lang_code], language=lang_code,
+            env={"DEEPSEEK_API_KEY": deepseek_key, "S2_API_KEY": s2_key or ""}, force=force_rerun
+        )
+        st.session_state.job_id = job_id
+        reused = job_id in existing
+        st.session_state.my_jobs[job_id] = st.session_state.my_jobs.get(job_id) or not reused
+        if not reused:
+            st.success(T["job_submitted"].format(st.session_state.job_id))
+        else:
+            st.info(T["job_reused"].format(st.session_state.job_id))
 
-        # 重置状态
-        st.session_state.df_result = None
-        st.session_state.csv_path = None
-        
-        with st.status(T["status_working"], expanded=True) as status:
-            try:
-                st.write(T["status_init"])
-                st.write(T["status_scraping"].format(uni_name))
-                
-                # --- 调用后端 (传递语言参数) ---
-                # 这里的 result 极大概率是一个 List (列表)
-                # Pass 'en' for English, 'zh' for Chinese
-                lang_code = "en" if selected_lang == "English" else "zh"
-                result = process_faculty_url(target_url, uni_name, language=lang_code)
-                
-                final_df = None
-                final_filename = ""
+STATUS_ICONS = {"queued": "⏳", "running": "🏃", "done": "✅", "failed": "❌", "cancelled": "🚫"}
 
-                # === 🚑 智能处理逻辑 (修复核心) ===
-                
-                # 情况 A: 后端直接返回了数据列表 (你的现状)
-                if isinstance(result, list):
-                    st.write(T["status_processing"].format(len(result)))
-                    
-                    if not result:
-                        st.warning(T["status_empty"])
-                        status.update(label="⚠️ Finished but empty", state="error")
-                    else:
-                        # 1. 把列表转为 DataFrame
-                        final_df = pd.DataFrame(result)
-                        
-                        # 2. 前端自己生成文件名
-                        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-                        safe_uni_name = "".join([c if c.isalnum() else "_" for c in uni_name])
-                        final_filename = f"{safe_uni_name}_{timestamp}.xlsx"
-                        
-                        # 3. 保存文件 (以便下载)
-                        st.write(T["save_msg"].format(final_filename))
-                        final_df.to_excel(final_filename, index=False)
-                
-                # 情况 B: 后端返回了文件名 (以防万一你以后改了后端)
-                elif isinstance(result, str):
-                    st.write(T["status_reading"])
-                    final_filename = result
-                    final_df = pd.read_excel(result)
-                
-                else:
-                    st.error(f"Unknown return type: {type(result)}")
+def render_jobs():
+    jobs = [runner.get(job_id) for job_id in reversed(list(st.session_state.my_jobs))][:10]
+    jobs = [job for job in jobs if job is not None]
+    if not jobs:
+        return
+    st.subheader(T["jobs_header"])
+    for job in jobs:
+        params = job["params"]
+        col1, col2, col3 = st.columns([6, 1, 1])
+        total = job["progress_total"] or 0
+        label = f"{STATUS_ICONS.get(job['status'], '')} {params['university']} — {job['status']}"
+        if total:
+            label += f" ({job['progress_done']}/{total})"
+        col1.progress(min(1.0, job["progress_done"] / total) if total else 0.0, text=label)
+        if col2.button(T["job_show"], key=f"show_{job['id']}"):
+            st.session_state.job_id = job["id"]
+        if (job["status"] in ("queued", "running") and st.session_state.my_jobs[job["id"]]
+                and col3.button(T["job_cancel"], key=f"cancel_{job['id']}")):
+            runner.cancel(job["id"])
+    job = runner.get(st.session_state.job_id) if st.session_state.job_id else None
+    if job is None:
+        return
+    if job["status"] == "running" and job.get("current"):
+        # 实时显示当前教授的摘要 (streamed by the worker)
+        st.markdown(f"**✍️ {job['current']}**\n\n{job.get('partial_summary') or ''}")
+    if job["status"] == "failed":
+        st.error(f"{T['status_failed']}: {job.get('error')}")
+    render_results(job)
 
-                # === 处理完成 ===
-                
-                if final_df is not None and not final_df.empty:
-                    # 更新 Session State，强制刷新页面显示
-                    st.session_state.df_result = final_df
-                    st.session_state.csv_path = final_filename
-                    status.update(label=T["status_complete"], state="complete", expanded=False)
-                
-            except Exception as e:
-                status.update(label=T["status_failed"], state="error")
-                st.error(f"An error occurred: {str(e)}")
+def render_results(job):
+    rows = runner.results(job["id"])
+    if not rows:
+        if job["status"] == "done":
+            st.warning(T["status_empty"])
+        return
+    # pandas is only needed once there are results to show.
+    import pandas as pd
+    df = pd.DataFrame(rows)
 
-# === 4. 结果展示区 ===
-if st.session_state.df_result is not None:
-    df = st.session_state.df_result
-    
     st.divider()
-    
+
     # 指标卡片
     col1, col2, col3 = st.columns(3)
     col1.metric(T["metrics_total"], len(df))
-    
+
     # 尝试统计验证状态
     if 'Data_Source' in df.columns:
         s2_count = len(df[df['Data_Source'] == 'S2_Verified'])
@@ -259,20 +266,70 @@ if st.session_state.df_result is not None:
     else:
         s2_count = 0
         web_count = len(df)
-        
+
     col2.metric(T["metrics_s2"], s2_count)
     col3.metric(T["metrics_web"], web_count)
-    
+
     # 数据表
     st.subheader(T["data_preview"])
     st.dataframe(df, use_container_width=True)
-    
-    # 下载按钮
-    if st.session_state.csv_path and os.path.exists(st.session_state.csv_path):
-        with open(st.session_state.csv_path, "rb") as file:
-            st.download_button(
-                label=T["download_btn"],
-                data=file,
-                file_name=st.session_state.csv_path,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
\ No newline at end of file
+
+    # 下载按钮 (built in memory from the stored rows; nothing is written to disk)
+    if job["status"] == "done":
+        params = job["params"]
+        safe_uni_name = "".join(c if c.isalnum() else "_" for c in params["university"])
+        st.download_button(
+            label=T["download_btn"],
+            data=build_excel(job["id"], len(rows), tuple(params.get("languages") or [])),
+            file_name=f"{safe_uni_name}_{job['finished_at'][:10].replace('-', '')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"download_{job['id']}"
+        )
+
+@st.cache_data(max_entries=32)
+def build_excel(job_id, row_count, languages):
+    """Workbook bytes for a finished job; cached per job, so reruns do not rebuild it."""
+    return excel_bytes(runner.results(job_id), result_columns(list(languages)))
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def sync_search(runs_changed_at):
+    """
+    Catches the search index up with the result store, once per change of the
+    run index rather than on every rerun (jobs also sync when they finish).
+    """
+    return get_search_index().sync()
+
+def render_search():
+    index = get_search_index()
+    sync_search(ResultStore().changed_at())
+    col1, col2, col3, col4 = st.columns([4, 2, 1, 1])
+    query = col1.text_input(T["search_query"], placeholder=T["search_placeholder"])
+    universities = col2.multiselect(T["search_unis"], options=index.universities())
+    title = col3.text_input(T["search_title"], placeholder="Professor")
+    sources = col4.multiselect("Data_Source", options=index.sources())
+    if not query.strip():
+        st.caption(T["search_hint"].format(len(index)))
+        return
+    hits = index.search(query, universities, title.strip() or None, sources, limit=50)
+    if not hits:
+        st.info(T["search_empty"])
+        return
+    for hit in hits:
+        link = f"[{hit['Name']}]({hit['Profile_Link']})" if hit["Profile_Link"] else hit["Name"]
+        st.markdown(f"**{link}** · {hit['Title'] or ''} · {hit['University']} · `{hit['Data_Source']}`")
+        if hit["Research_Keywords"]:
+            st.caption(hit["Research_Keywords"])
+        st.markdown(f"> {hit['Snippet']}")
+
+# === 4. 任务与结果展示区 ===
+tab_jobs, tab_search = st.tabs([T["tab_jobs"], T["tab_search"]])
+with tab_jobs:
+    # 定时轮询任务进度；旧版 Streamlit 没有 fragment 时使用手动刷新。
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=2)(render_jobs)()
+    else:
+        render_jobs()
+        st.button(T["jobs_refresh"])
+with tab_search:
+    # 在所有已收集的研究摘要中全文检索 (see search_index.py)
+    render_search()
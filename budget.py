@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# USD per million tokens, used only for the run report.
+INPUT_PRICE_PER_M = float(os.getenv("DEEPSEEK_INPUT_PRICE_PER_M", "0.28"))
+OUTPUT_PRICE_PER_M = float(os.getenv("DEEPSEEK_OUTPUT_PRICE_PER_M", "0.42"))
+
+_CJK = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+_current = contextvars.ContextVar("scholarscout_budget", default=None)
+
+
+class BudgetExceeded(Exception):
+    """Raised before an LLM call that would break the run's token or time ceiling."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap pre-flight token estimate.
+
+    CJK characters are counted as roughly one token each, everything else as
+    roughly four characters per token, which is close enough for budgeting.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+class RunBudget:
+    """
+    Token accounting and hard ceilings for one pipeline run.
+
+    Args:
+        max_tokens (int, optional): Ceiling on prompt + completion tokens.
+        max_seconds (float, optional): Ceiling on wall time.
+        reserve (float): Fraction of either ceiling kept back for the cheap,
+            high-value calls; once inside it, optional work such as bio
+            summaries is skipped.
+    """
+
+    def __init__(self, max_tokens: int | None = None, max_seconds: float | None = None, reserve: float = 0.2):
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.reserve = reserve
+        self.started = time.monotonic()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.by_source = {}
+        # Optional callable; once it returns True every check() fails, e.g. when the work is no longer wanted.
+        self.stop_if = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Builds a budget from SCHOLARSCOUT_MAX_TOKENS / SCHOLARSCOUT_MAX_SECONDS (unset = unlimited)."""
+        max_tokens = os.getenv("SCHOLARSCOUT_MAX_TOKENS")
+        max_seconds = os.getenv("SCHOLARSCOUT_MAX_SECONDS")
+        return cls(
+            max_tokens=int(max_tokens) if max_tokens else None,
+            max_seconds=float(max_seconds) if max_seconds else None,
+        )
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def record(self, usage, source: str = "llm"):
+        """Adds a completion's usage (an OpenAI `usage` object or a dict) to the totals."""
+        if usage is None:
+            return
+        if isinstance(usage, dict):
+            prompt = usage.get("prompt_tokens") or 0
+            completion = usage.get("completion_tokens") or 0
+        else:
+            prompt = getattr(usage, "prompt_tokens", 0) or 0
+            completion = getattr(usage, "completion_tokens", 0) or 0
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.calls += 1
+            self.by_source[source] = self.by_source.get(source, 0) + prompt + completion
+
+    def time_exceeded(self) -> bool:
+        return self.max_seconds is not None and self.elapsed >= self.max_seconds
+
+    def tokens_exceeded(self, estimate: int = 0) -> bool:
+        return self.max_tokens is not None and self.total_tokens + estimate > self.max_tokens
+
+    def check(self, estimate: int = 0):
+        """
+        Raises BudgetExceeded if a call of `estimate` tokens would break a ceiling.
+        """
+        if self.stop_if is not None and self.stop_if():
+            raise BudgetExceeded("Run stopped: its result is no longer needed")
+        if self.time_exceeded():
+            raise BudgetExceeded(f"Wall time budget of {self.max_seconds:.0f}s exhausted")
+        if self.tokens_exceeded(estimate):
+            raise BudgetExceeded(
+                f"Token budget exhausted ({self.total_tokens} used, ~{estimate} requested, max {self.max_tokens})"
+            )
+
+    def in_reserve(self) -> bool:
+        """True once either ceiling is within `reserve` of being hit."""
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens * (1 - self.reserve):
+            return True
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds * (1 - self.reserve):
+            return True
+        return False
+
+    def cost_usd(self) -> float:
+        return (self.prompt_tokens * INPUT_PRICE_PER_M + self.completion_tokens * OUTPUT_PRICE_PER_M) / 1_000_000
+
+    def report(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd(), 4),
+            "elapsed_seconds": round(self.elapsed, 1),
+            "by_source": dict(self.by_source),
+        }
+
+
+def current_budget() -> RunBudget | None:
+    """Returns the budget active in this context, if any."""
+    return _current.get()
+
+@contextmanager
+def use_budget(budget: RunBudget):
+    """Makes `budget` the active budget for LLM calls made inside the block."""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
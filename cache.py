@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_PATH = os.getenv("SCHOLARSCOUT_CACHE_PATH", os.path.join(".cache", "scholarscout.sqlite"))
+# A hit records its access time only if the stored one is older than this (seconds):
+# LRU eviction does not need finer times, and a write per hit would make reads as slow as writes.
+TOUCH_INTERVAL = float(os.getenv("SCHOLARSCOUT_CACHE_TOUCH_INTERVAL", "60"))
+
+# Sentinel for "not in cache", so that a cached None (a negative result) is distinguishable.
+MISS = object()
+
+
+class DiskCache:
+    """
+    Small persistent key/value cache on SQLite, shared by several namespaces.
+
+    Values are stored as JSON. Entries expire after `ttl` seconds, and when a
+    namespace grows past `max_entries` the least recently used entries are evicted
+    (access times are kept to within TOUCH_INTERVAL, and only for bounded namespaces).
+    Safe to share between threads and processes (WAL mode).
+
+    Args:
+        namespace (str): Logical table, e.g. "summary" or "s2_author".
+        path (str): SQLite file. ":memory:" gives a throwaway cache.
+        ttl (float, optional): Default lifetime in seconds (None = forever).
+        max_entries (int, optional): Size bound for this namespace.
+    """
+
+    def __init__(self, namespace: str, path: str | None = None, ttl: float | None = None, max_entries: int | None = None):
+        self.namespace = namespace
+        self.path = path or DEFAULT_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT,"
+            " expires_at REAL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str, default=MISS):
+        """Returns the cached value, or `default` if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return default
+            value, expires_at, accessed_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._conn.commit()
+                return default
+            if self.max_entries and now - accessed_at >= TOUCH_INTERVAL:
+                self._conn.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+                self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value, ttl: float | None = None):
+        """Stores a JSON-serializable value. `ttl` overrides the namespace default."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._writes += 1
+            # Eviction is amortized: checking the count on every write would double the cost.
+            if self.max_entries and self._writes % 50 == 0:
+                self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def evict(self):
+        """Drops expired entries and trims the namespace to `max_entries`."""
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            )
@@ -0,0 +1,107 @@
+import math
+import re
+import time
+from budget import estimate_tokens
+
+# Words that distinguish preprint/extended versions of the same paper but not its content.
+# Only dropped from a trailing "(...)", "[...]" or ": ..." suffix made of nothing else,
+# so "Abstract Interpretation of ..." keeps its first word.
+VERSION_NOISE = {"arxiv", "preprint", "extended", "abstract", "version", "full", "short", "paper", "supplementary"}
+DUPLICATE_THRESHOLD = 0.85
+TLDR_MAX_CHARS = 220
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_SUFFIX = re.compile(r"\s*(?:[(\[]([^()\[\]]*)[)\]]|[:\-–—]([^:\-–—()\[\]]*))\s*$")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercases a title and collapses punctuation/whitespace to single spaces."""
+    return _NON_ALNUM.sub(" ", (title or "").lower()).strip()
+
+def strip_version_suffix(title: str) -> str:
+    """Removes trailing suffixes such as "(arXiv preprint)" or ": Extended Abstract"."""
+    title = title or ""
+    while True:
+        match = _SUFFIX.search(title)
+        if not match or any(w not in VERSION_NOISE for w in normalize_title(match.group(1) or match.group(2)).split()):
+            return title
+        title = title[:match.start()]
+
+def _title_tokens(title: str) -> frozenset:
+    return frozenset(normalize_title(strip_version_suffix(title)).split())
+
+def _tldr_text(paper: dict) -> str:
+    tl = paper.get("tldr")
+    if isinstance(tl, dict):
+        return tl.get("text") or ""
+    return tl if isinstance(tl, str) else ""
+
+def _quality(paper: dict) -> tuple:
+    # Prefer the version that has a tldr, more citations, then the newer one.
+    return (bool(_tldr_text(paper)), paper.get("citationCount") or 0, paper.get("year") or 0)
+
+def dedupe_papers(papers: list, threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """
+    Collapses near-identical titles (preprint vs. published version, punctuation or
+    "extended abstract" variants) using token Jaccard similarity.
+
+    The best-quality version of each group is kept; citation counts are merged by max.
+    """
+    kept = []
+    for paper in papers or []:
+        tokens = _title_tokens(paper.get("title"))
+        if not tokens:
+            continue
+        for entry in kept:
+            other = entry["tokens"]
+            if len(tokens & other) / len(tokens | other) >= threshold:
+                best = max(entry["paper"], paper, key=_quality)
+                citations = max(entry["paper"].get("citationCount") or 0, paper.get("citationCount") or 0)
+                entry["paper"] = {**best, "citationCount": citations}
+                break
+        else:
+            kept.append({"tokens": tokens, "paper": dict(paper)})
+    return [entry["paper"] for entry in kept]
+
+def rank_papers(papers: list, year_now: int | None = None) -> list:
+    """
+    Orders papers by a blend of citation impact (log-scaled) and recency.
+    """
+    year_now = year_now or int(time.strftime("%Y"))
+
+    def score(p):
+        citations = p.get("citationCount") or 0
+        year = p.get("year")
+        age = max(0, year_now - year) if isinstance(year, int) else 5
+        return math.log1p(citations) + 2.0 / (1 + age)
+
+    return sorted(papers, key=lambda p: (score(p), p.get("year") or 0), reverse=True)
+
+def select_papers(papers: list, top_k: int = 12, year_now: int | None = None) -> list:
+    """Dedupes and ranks papers, returning the top `top_k`."""
+    return rank_papers(dedupe_papers(papers), year_now)[:top_k]
+
+def compact_papers(papers: list, token_budget: int = 800, top_k: int = 12, year_now: int | None = None) -> str:
+    """
+    Renders the most relevant papers as compact lines for a prompt:
+
+        - 2024 | 31 cit. | Title — tldr
+
+    Lines are added in rank order until `token_budget` would be exceeded, so the
+    prompt size is bounded no matter how prolific the author is.
+    """
+    lines = []
+    used = 0
+    for p in select_papers(papers, top_k, year_now):
+        tldr = _tldr_text(p)
+        if len(tldr) > TLDR_MAX_CHARS:
+            tldr = tldr[:TLDR_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+        line = f"- {p.get('year') or 'n.d.'} | {p.get('citationCount') or 0} cit. | {p.get('title', '').strip()}"
+        if tldr:
+            line += f" — {tldr}"
+        cost = estimate_tokens(line)
+        if lines and used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
@@ -0,0 +1,32 @@
+import os
+import contextvars
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("scholarscout_credentials", default=None)
+
+
+def get_key(name: str) -> str | None:
+    """
+    Returns an API key (e.g. DEEPSEEK_API_KEY): the one given to the current
+    job through use_credentials, else the process environment.
+
+    Jobs of different users may run side by side in one process (the service
+    and the app use thread workers), so their keys must never go through
+    os.environ.
+    """
+    keys = _current.get()
+    if keys is not None:
+        return keys.get(name) or None
+    return os.getenv(name)
+
+@contextmanager
+def use_credentials(keys: dict | None):
+    """
+    Makes `keys` the API keys for everything called inside the block (keys it
+    leaves out count as unset). None keeps using the environment.
+    """
+    token = _current.set(dict(keys) if keys is not None else None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
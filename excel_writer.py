@@ -0,0 +1,140 @@
+import io
+import os
+import json
+import sys
+import xlsxwriter
+
+RESULT_COLUMNS = ["Name", "Title", "Email", "Research_Keywords", "Profile_Link", "Research_Summary", "Data_Source"]
+MAX_COLUMN_WIDTH = 50
+
+
+def result_columns(languages=None) -> list:
+    """Column order of the result sheet: one extra summary column per additional language, after Research_Summary."""
+    columns = list(RESULT_COLUMNS)
+    columns[6:6] = [f"Research_Summary_{lang.upper()}" for lang in (languages or [])[1:]]
+    return columns
+
+def sidecar_path(filename: str) -> str:
+    return f"{filename}.partial.jsonl"
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+class ExcelStreamWriter:
+    """
+    Writes result rows to .xlsx as they finish, in xlsxwriter's constant_memory
+    mode, so memory stays flat however many rows a run produces.
+
+    Column widths are tracked while rows are appended and applied on close.
+    Every row is also appended (and flushed) to a JSONL sidecar next to the
+    workbook; an .xlsx is only readable once closed, so after a crash the
+    sidecar is what `recover()` rebuilds the workbook from. A clean close
+    removes the sidecar.
+
+    A file-like `filename` (e.g. io.BytesIO) builds the workbook in memory
+    instead, without a sidecar; see excel_bytes().
+
+    Args:
+        filename (str | file): Output .xlsx path, or a binary buffer.
+        columns (list): Column order (see result_columns()). Keys outside it are kept in the sidecar only.
+        sheet_name (str): Worksheet name.
+    """
+
+    def __init__(self, filename, columns=None, sheet_name: str = "Faculty Data"):
+        self.filename = filename
+        self.columns = list(columns or RESULT_COLUMNS)
+        self.rows = 0
+        self._widths = [len(c) for c in self.columns]
+        in_memory = not isinstance(filename, str)
+        self._workbook = xlsxwriter.Workbook(filename, {"in_memory": True} if in_memory else {"constant_memory": True})
+        self._sheet = self._workbook.add_worksheet(sheet_name)
+        self._sheet.write_row(0, 0, self.columns, self._workbook.add_format({"bold": True, "bottom": 1}))
+        self._sidecar = None if in_memory else open(sidecar_path(filename), "w", encoding="utf-8")
+        self._closed = False
+
+    def append(self, row: dict):
+        """Writes one result row (constant_memory requires rows in order)."""
+        if self._sidecar is not None:
+            self._sidecar.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            self._sidecar.flush()
+        values = [_cell(row.get(col)) for col in self.columns]
+        self.rows += 1
+        self._sheet.write_row(self.rows, 0, values)
+        for i, value in enumerate(values):
+            # Widths follow the longest line, not the whole multi-line summary.
+            longest = max((len(line) for line in value.splitlines()), default=0)
+            if longest > self._widths[i]:
+                self._widths[i] = longest
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for i, width in enumerate(self._widths):
+            self._sheet.set_column(i, i, min(width + 2, MAX_COLUMN_WIDTH))
+        self._workbook.close()
+        if self._sidecar is not None:
+            self._sidecar.close()
+            os.remove(sidecar_path(self.filename))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Also on KeyboardInterrupt, so an interrupted run still leaves a valid workbook.
+        self.close()
+        return False
+
+
+def write_rows(rows, filename, columns=None) -> int:
+    """Writes an iterable of row dicts to `filename` (path or buffer). Returns the number of rows written."""
+    with ExcelStreamWriter(filename, columns) as writer:
+        for row in rows:
+            writer.append(row)
+    return writer.rows
+
+def excel_bytes(rows, columns=None) -> bytes:
+    """Builds the workbook for `rows` in memory, e.g. for a download button."""
+    buffer = io.BytesIO()
+    write_rows(rows, buffer, columns)
+    return buffer.getvalue()
+
+def recover(filename: str, columns=None) -> int:
+    """
+    Rebuilds `filename` from its sidecar after a run died before closing the
+    workbook. The column order is derived from the recovered rows unless given.
+    """
+    path = sidecar_path(filename)
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                # The last line may be cut short by the crash.
+                break
+    if columns is None:
+        extra = sorted({k for row in rows for k in row if k.startswith("Research_Summary_")})
+        columns = list(RESULT_COLUMNS)
+        columns[6:6] = extra
+    recovered = f"{filename}.recovering.jsonl"
+    os.replace(path, recovered)
+    try:
+        count = write_rows(rows, filename, columns)
+    except Exception:
+        os.replace(recovered, path)
+        raise
+    os.remove(recovered)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "recover":
+        print("Usage: python excel_writer.py recover <file.xlsx>")
+        sys.exit(1)
+    print(f"✅ Recovered {recover(sys.argv[2])} rows into {sys.argv[2]}")
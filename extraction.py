@@ -0,0 +1,156 @@
+import json
+import re
+from llm_engine import complete
+
+SYSTEM_PROMPT = (
+    "You are a data extraction engine. Read the provided text and reply with a single "
+    "JSON object only, with no markdown and no commentary."
+)
+
+# Schemas map field -> type. `[str]` means "list of strings". Every field is nullable.
+FACULTY_SCHEMA = {"name": str, "title": str, "profile_link": str, "email": str}
+PROFILE_SCHEMA = {
+    "name": str,
+    "bio_text": str,
+    "email": str,
+    "research_interests": [str],
+    "recent_paper_titles": [str],
+}
+PROFILE_KEYWORD_SCHEMA = {"search_keyword": str, "bio_summary": str}
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class ExtractionError(Exception):
+    """Raised when the model output cannot be parsed into the requested shape."""
+
+
+def _coerce(value, expected):
+    """Coerces `value` to `expected`, returning None when it cannot be."""
+    if value is None:
+        return None
+    if isinstance(expected, list):
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return None
+        items = [_coerce(v, expected[0]) for v in value]
+        return [v for v in items if v not in (None, "")]
+    if expected is str:
+        if isinstance(value, (dict, list)):
+            return None
+        text = str(value).strip()
+        # Models sometimes spell out null instead of emitting it.
+        return text if text and text.lower() not in ("null", "none", "n/a") else None
+    return value if isinstance(value, expected) else None
+
+def validate(obj, schema: dict, required=()) -> dict | None:
+    """
+    Validates one object against `schema`.
+
+    Unknown keys are dropped and missing keys filled with None (or [] for lists).
+    Returns None if a required field is empty.
+    """
+    if not isinstance(obj, dict):
+        return None
+    clean = {}
+    for key, expected in schema.items():
+        value = _coerce(obj.get(key), expected)
+        if value is None and isinstance(expected, list):
+            value = []
+        clean[key] = value
+    if any(not clean.get(key) for key in required):
+        return None
+    return clean
+
+def _parse(content: str):
+    text = _FENCE.sub("", (content or "").strip())
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # Fall back to the outermost JSON object in the reply.
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                pass
+    raise ExtractionError(f"Model did not return valid JSON: {text[:80]!r}")
+
+def _request(prompt: str, source: str, usage_source: str, max_tokens: int, retries: int = 1):
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{prompt.strip()}\n\nTEXT:\n{source}"},
+    ]
+    for attempt in range(retries + 1):
+        resp = complete(
+            messages,
+            temperature=0,
+            source=usage_source,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        try:
+            return _parse(resp.choices[0].message.content)
+        except ExtractionError:
+            if attempt == retries:
+                raise
+
+def extract_object(prompt: str, source: str, schema: dict, required=(), usage_source: str = "extraction",
+                   max_tokens: int = 2048) -> dict:
+    """
+    Extracts a single object from `source` with JSON mode and validates it.
+
+    Args:
+        prompt (str): Extraction instructions describing the fields.
+        source (str): Cleaned page text.
+        schema (dict): Field -> type mapping (see FACULTY_SCHEMA).
+        required (tuple): Fields that must be non-empty.
+
+    Returns:
+        dict: The validated object.
+
+    Raises:
+        ExtractionError: If the output is not a usable object.
+        LLMCallError / BudgetExceeded: Propagated from llm_engine.complete.
+    """
+    data = _parse_object(_request(prompt, source, usage_source, max_tokens))
+    result = validate(data, schema, required)
+    if result is None:
+        raise ExtractionError("Extracted object is missing required fields")
+    return result
+
+def extract_list(prompt: str, source: str, schema: dict, required=(), key: str = "items",
+                 usage_source: str = "extraction", max_tokens: int = 8192) -> list:
+    """
+    Extracts a list of objects from `source` with JSON mode.
+
+    JSON mode only returns objects, so the model is asked to wrap the list under `key`.
+    Items failing validation are dropped rather than failing the whole page.
+    """
+    prompt = (
+        f"{prompt.strip()}\n\n"
+        f'Wrap the list in a JSON object under the key "{key}", e.g. {{"{key}": [...]}}.'
+    )
+    data = _request(prompt, source, usage_source, max_tokens)
+    items = _find_list(data, key)
+    if items is None:
+        raise ExtractionError("Extracted JSON does not contain a list")
+    return [item for item in (validate(obj, schema, required) for obj in items) if item is not None]
+
+def _parse_object(data):
+    # A one-element list around the object is a common slip; unwrap it.
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return data[0]
+    return data
+
+def _find_list(data, key):
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if isinstance(data.get(key), list):
+            return data[key]
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+    return None
@@ -0,0 +1,184 @@
+import os
+import time
+import atexit
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import parse_html, absolutize_links, clean_soup
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / container limits where the OS exposes them)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Parser processes; 0 = one per core. With a single core everything is parsed in-process.
+HTML_WORKERS = int(os.getenv("SCHOLARSCOUT_HTML_WORKERS", "0")) or available_cores()
+# Pages smaller than this are parsed in-process: the round trip costs more than the parse.
+HTML_POOL_MIN_BYTES = int(os.getenv("SCHOLARSCOUT_HTML_POOL_MIN_BYTES", str(16 * 1024)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def parse_page(raw: bytes, encoding: str = None, base_url: str = None) -> str:
+    """
+    Parses and cleans one fetched page. Runs inside the pool, so it takes the
+    raw response bytes and returns only the cleaned text: nothing but bytes
+    and a str cross the process boundary, never a parse tree.
+
+    Args:
+        raw (bytes): Response body.
+        encoding (str, optional): Charset declared in the HTTP headers; when
+            None, BeautifulSoup uses the page's <meta> charset or sniffs it.
+        base_url (str, optional): If given, links are made absolute first
+            (same parse, so the page is not parsed twice).
+
+    Returns:
+        str: Cleaned text, as utils.clean_html would return it.
+    """
+    if not raw:
+        return ""
+    soup = parse_html(raw, encoding)
+    if base_url:
+        absolutize_links(soup, base_url)
+    return clean_soup(soup)
+
+
+def get_html_pool():
+    """
+    Shared parser pool, started on first use; None when parsing stays in-process.
+
+    Inside a worker process (e.g. a JobRunner job) pages are parsed in-process:
+    the jobs already run in parallel, and atexit does not run in multiprocessing
+    children, so a nested pool would never be shut down and the worker would
+    hang on exit waiting for it.
+    """
+    global _pool
+    if HTML_WORKERS <= 1 or multiprocessing.parent_process() is not None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # "spawn", like the job runner: forking a process that runs Streamlit's threads is not safe.
+            _pool = ProcessPoolExecutor(HTML_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(shutdown_html_pool)
+        return _pool
+
+
+def shutdown_html_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def clean_page(raw: bytes, encoding: str = None, base_url: str = None) -> str:
+    """
+    Cleans a fetched page, off the calling thread's GIL when the page is big
+    enough and a pool is available. Safe to call from many fetch threads at once.
+
+    Args:
+        raw (bytes): Response body (response.content).
+        encoding (str, optional): See declared_encoding.
+        base_url (str, optional): Make links absolute against this URL first.
+
+    Returns:
+        str: The cleaned text content.
+    """
+    pool = get_html_pool() if len(raw or b"") >= HTML_POOL_MIN_BYTES else None
+    if pool is None:
+        return parse_page(raw, encoding, base_url)
+    try:
+        return pool.submit(parse_page, raw, encoding, base_url).result()
+    except BrokenProcessPool:
+        # A parser process died (e.g. OOM-killed); start a fresh pool next time and parse this page here.
+        print("⚠️ HTML parser pool crashed, restarting it.")
+        shutdown_html_pool()
+        return parse_page(raw, encoding, base_url)
+
+
+def declared_encoding(response):
+    """
+    The charset the server actually declared, or None. requests falls back to
+    ISO-8859-1 for any text/* response without one, which garbles UTF-8/GBK
+    pages; None lets the parser read the <meta> charset instead.
+    """
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.encoding
+    return None
+
+
+def _sample_page(i: int) -> bytes:
+    """A synthetic faculty page of realistic size (~60 KB) for the benchmark."""
+    people = "".join(
+        f'<div class="person"><a href="/people/p{i}-{n}">Prof. Person {n}</a>'
+        f'<span class="title">Associate Professor</span><p>Research in machine learning, '
+        f'distributed systems and human-computer interaction. Office {n}, 邮箱 p{n}@example.edu</p></div>'
+        for n in range(200)
+    )
+    return (
+        f'<html><head><meta charset="utf-8"><title>Faculty {i}</title><style>.x{{color:red}}</style>'
+        f'<script>var a = {i};</script></head><body><header><nav><a href="/">Home</a></nav></header>'
+        f'<main>{people}</main><footer>© University</footer></body></html>'
+    ).encode("utf-8")
+
+
+def benchmark(pages: list, worker_counts: list) -> list:
+    """
+    Pages per second when cleaning `pages` with each worker count (1 = in-process).
+
+    Returns:
+        list: [{"workers", "seconds", "pages_per_sec", "speedup"}] in the order given.
+    """
+    results = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        if workers <= 1:
+            for raw in pages:
+                parse_page(raw, None, "https://example.edu/faculty/")
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+                # Start the workers before timing, so interpreter start-up is not counted.
+                list(pool.map(parse_page, [b"<p></p>"] * workers))
+                start = time.perf_counter()
+                list(pool.map(parse_page, pages, [None] * len(pages),
+                              ["https://example.edu/faculty/"] * len(pages), chunksize=4))
+        seconds = time.perf_counter() - start
+        results.append({"workers": workers, "seconds": round(seconds, 3),
+                        "pages_per_sec": round(len(pages) / seconds, 1)})
+    base = results[0]["pages_per_sec"] if results else 1
+    for row in results:
+        row["speedup"] = round(row["pages_per_sec"] / base, 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark HTML parsing across worker processes.")
+    parser.add_argument("files", nargs="*", help="Saved HTML pages (default: synthetic faculty pages)")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages to generate")
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1,2,4,... up to cores)")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = [open(path, "rb").read() for path in args.files]
+    else:
+        pages = [_sample_page(i) for i in range(args.pages)]
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(",")]
+    else:
+        counts, n = [], 1
+        while n < available_cores():
+            counts.append(n)
+            n *= 2
+        counts.append(available_cores())
+
+    size = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"🧪 {len(pages)} pages (avg {size:.0f} KB), {available_cores()} core(s) available")
+    for row in benchmark(pages, counts):
+        print(f"  {row['workers']:>3} worker(s): {row['pages_per_sec']:>7} pages/s  ({row['speedup']}x)")
@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+JOBS_PATH = os.getenv("SCHOLARSCOUT_JOBS_PATH", os.path.join(".cache", "jobs.sqlite"))
+MAX_JOBS = int(os.getenv("SCHOLARSCOUT_MAX_JOBS", "2"))
+# A finished job is reused for the same inputs for this long (seconds); 0 disables reuse.
+RESULT_TTL = float(os.getenv("SCHOLARSCOUT_RESULT_TTL", str(24 * 3600)))
+# Credentials are handed to workers per job and never written to the registry.
+ENV_KEYS = ("DEEPSEEK_API_KEY", "S2_API_KEY")
+# Live summary text is written to the registry at most this often.
+SUMMARY_UPDATE_INTERVAL = 0.5
+
+ACTIVE = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when the user cancelled it."""
+
+
+def _params_key(params: dict) -> str:
+    # Canonical JSON, so identical inputs compare equal in SQL.
+    return json.dumps(params, ensure_ascii=False, sort_keys=True)
+
+
+class JobRegistry:
+    """
+    Persistent job table (SQLite, WAL) shared by the app and the worker processes.
+
+    Args:
+        path (str): SQLite file.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or JOBS_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT NOT NULL,"
+            " created_at TEXT, started_at TEXT, finished_at TEXT, pid INTEGER,"
+            " progress_done INTEGER DEFAULT 0, progress_total INTEGER DEFAULT 0,"
+            " current TEXT, partial_summary TEXT, result_path TEXT, run_id TEXT,"
+            " rows INTEGER DEFAULT 0, error TEXT, cancel_requested INTEGER DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def create(self, params: dict) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, _params_key(params), datetime.now().isoformat(timespec="seconds")),
+            )
+            self._conn.commit()
+        return job_id
+
+    def find_reusable(self, params: dict, ttl: float) -> dict | None:
+        """
+        The newest job with identical params that is still in flight, or that
+        finished successfully less than `ttl` seconds ago with at least one row.
+        An empty run usually means a bad API key or an unreachable page (the
+        pipeline logs those and returns nothing), so it is never reused.
+        """
+        cutoff = datetime.fromtimestamp(time.time() - ttl).isoformat(timespec="seconds")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE params = ? AND cancel_requested = 0 AND"
+                " (status IN ('queued', 'running') OR (status = 'done' AND rows > 0 AND finished_at >= ?))"
+                " ORDER BY created_at DESC, rowid DESC LIMIT 1",
+                (_params_key(params), cutoff),
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def claim(self, job_id: str, pid: int) -> bool:
+        """
+        Atomically moves a queued job to running. False when another runner
+        sharing this registry claimed it first, or when it was cancelled while
+        queued (it is then marked cancelled without ever starting).
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', pid = ?, started_at = ?"
+                " WHERE id = ? AND status = 'queued' AND cancel_requested = 0",
+                (pid, now, job_id),
+            ).rowcount == 1
+            if not claimed:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', finished_at = ?"
+                    " WHERE id = ? AND status = 'queued' AND cancel_requested = 1",
+                    (now, job_id),
+                )
+            self._conn.commit()
+        return claimed
+
+    def _row(self, row) -> dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list(self, limit: int = 50, statuses=None) -> list:
+        """Most recent jobs first."""
+        query, args = "SELECT * FROM jobs", []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            args = list(statuses)
+        with self._lock:
+            rows = self._conn.execute(f"{query} ORDER BY created_at DESC, rowid DESC LIMIT ?", (*args, limit)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def close(self):
+        self._conn.close()
+
+
+def run_job(job_id: str, registry_path: str, env: dict | None = None):
+    """
+    Executes one job (in a worker process or thread). Progress, the summary
+    being streamed and the final status are written to the registry; rows go
+    to the result store as they finish (downloads are built from there in memory).
+    """
+    from main import process_faculty_url, fan_out
+    from result_store import ResultStore
+    from credentials import use_credentials
+    from search_index import sync_search_index
+    from similarity import sync_similarity_index
+
+    registry = JobRegistry(registry_path)
+    try:
+        job = registry.get(job_id)
+        if job is None or not registry.claim(job_id, os.getpid()):
+            return
+        params = job["params"]
+        languages = params.get("languages") or [params.get("language", "zh")]
+        rows = [0]
+        last_summary = [0.0]
+
+        def on_progress(done, total, name):
+            if registry.cancel_requested(job_id):
+                raise JobCancelled()
+            registry.update(job_id, progress_done=done, progress_total=total, current=name, partial_summary="")
+
+        def on_summary(name, text):
+            now = time.monotonic()
+            if now - last_summary[0] >= SUMMARY_UPDATE_INTERVAL:
+                last_summary[0] = now
+                registry.update(job_id, current=name, partial_summary=text)
+
+        def on_row(row):
+            rows[0] += 1
+            registry.update(job_id, progress_done=rows[0], rows=rows[0])
+
+        # The job's keys are scoped to this call, never put in os.environ: thread workers share it.
+        keys = {key: env.get(key) for key in ENV_KEYS} if env is not None else None
+        with use_credentials(keys):
+            with ResultStore().open_run(params["university"], url=params["url"], languages=languages) as run:
+                registry.update(job_id, run_id=run.meta["run_id"])
+                process_faculty_url(
+                    params["url"], params["university"], url_pattern_hint=params.get("url_pattern_hint"),
+                    language=params.get("language", "zh"), languages=languages,
+                    on_summary=on_summary, on_row=fan_out(run.append, on_row), on_progress=on_progress,
+                )
+        sync_search_index()
+        sync_similarity_index()
+        registry.update(job_id, status="done", finished_at=datetime.now().isoformat(timespec="seconds"))
+    except JobCancelled:
+        registry.update(job_id, status="cancelled", finished_at=datetime.now().isoformat(timespec="seconds"))
+    except BaseException as e:
+        registry.update(job_id, status="failed", error=f"{type(e).__name__}: {e}",
+                        finished_at=datetime.now().isoformat(timespec="seconds"))
+        traceback.print_exc()
+    finally:
+        registry.close()
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """
+    Runs scraping jobs in the background so the UI thread only submits and polls.
+
+    Jobs execute in a process pool by default (a crash or a long job cannot take
+    the app down); several jobs run concurrently up to `max_workers`. State lives
+    in a JobRegistry, so a restarted app still lists earlier jobs: queued jobs
+    are resubmitted and jobs whose worker died are marked failed.
+
+    Args:
+        path (str): Registry file.
+        max_workers (int): Concurrent jobs.
+        use_processes (bool): False runs jobs in threads instead (used by tests).
+    """
+
+    def __init__(self, path: str | None = None, max_workers: int = MAX_JOBS, use_processes: bool = True):
+        self.registry = JobRegistry(path)
+        if use_processes:
+            # "spawn": forking a process that runs Streamlit's threads is not safe.
+            self._executor = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="scholarscout-job")
+        self._futures = {}
+        self._recover()
+
+    def _env(self) -> dict:
+        return {key: os.environ.get(key, "") for key in ENV_KEYS}
+
+    def _recover(self):
+        for job in self.registry.list(limit=1000, statuses=ACTIVE):
+            if job["status"] == "running" and not _pid_alive(job["pid"]):
+                self.registry.update(job["id"], status="failed", error="Interrupted (app or worker restarted)")
+            elif job["status"] == "queued":
+                self._start(job["id"], self._env())
+
+    def _start(self, job_id: str, env: dict):
+        self._futures[job_id] = self._executor.submit(run_job, job_id, self.registry.path, env)
+
+    def submit(self, url: str, university: str, languages=None, language: str = "zh", url_pattern_hint=None,
+               env: dict | None = None, force: bool = False) -> str:
+        """
+        Queues a job. `env` carries the API keys for this job (defaults to the
+        current environment); it is passed to the worker, not persisted.
+
+        The same inputs within RESULT_TTL return the earlier job instead of
+        running the pipeline again (also while it is still running), unless
+        `force` is set.
+
+        Returns:
+            str: The job id.
+        """
+        params = {"url": url.strip(), "university": university.strip(), "languages": list(languages or [language]),
+                  "language": language, "url_pattern_hint": url_pattern_hint}
+        if not force and RESULT_TTL > 0:
+            existing = self.registry.find_reusable(params, RESULT_TTL)
+            if existing is not None:
+                return existing["id"]
+        job_id = self.registry.create(params)
+        self._start(job_id, env if env is not None else self._env())
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        return self.registry.get(job_id)
+
+    def list(self, limit: int = 20) -> list:
+        return self.registry.list(limit)
+
+    def cancel(self, job_id: str):
+        """Queued jobs never start; running jobs stop before the next person."""
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self.registry.update(job_id, status="cancelled", finished_at=datetime.now().isoformat(timespec="seconds"))
+        else:
+            self.registry.update(job_id, cancel_requested=1)
+
+    def results(self, job_id: str, offset: int = 0) -> list:
+        """Rows produced so far by a job (complete or not) from row `offset` on, from the result store."""
+        from result_store import ResultStore
+        job = self.get(job_id)
+        if not job or not job.get("run_id"):
+            return []
+        rows = ResultStore().query(run_ids=[job["run_id"]], start=offset)
+        return [{k: v for k, v in row.items() if not k.startswith("_")} for row in rows]
+
+    def wait(self, job_id: str, timeout: float | None = None):
+        """Blocks until a job submitted by this runner finishes (for scripts and tests)."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self.registry.close()
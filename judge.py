@@ -0,0 +1,92 @@
+import re
+from extraction import extract_object
+
+JUDGE_SCHEMA = {"confidence": str, "reason": str}
+CONFIDENCE_LEVELS = ("High", "Medium", "Low")
+JUDGE_PROMPT = """
+Decide whether the faculty member described in PROFILE and the Semantic Scholar author in CANDIDATE
+are the same person. Compare research topics, titles and affiliations; a missing affiliation is not
+evidence against a match.
+Return JSON: {"confidence": "High" | "Medium" | "Low", "reason": "<one sentence>"}
+"""
+# Words too common in titles and bios to say anything about the research area.
+_STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "by", "at", "from", "is", "are",
+    "professor", "assistant", "associate", "expert", "specializing", "research", "study", "studies",
+    "university", "department", "using", "via", "towards", "toward", "based", "new", "its",
+}
+_WORD = re.compile(r"[a-z]{3,}")
+
+
+def _words(text: str) -> set:
+    return {w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS}
+
+
+class AuthorJudge:
+    """
+    Decides whether a scraped faculty profile and an S2 author are the same person.
+
+    A hard affiliation match is decided locally. Otherwise the profile and the
+    candidate's papers are compared by the LLM; if the LLM is unavailable, a
+    topic-overlap heuristic is used so that resolution never fails outright.
+
+    Args:
+        use_llm (bool): Set to False to only use the local checks.
+    """
+
+    def __init__(self, use_llm: bool = True):
+        self.use_llm = use_llm
+
+    def hard_match(self, s2_author: dict, target_uni: str) -> bool:
+        target = (target_uni or "").strip().lower()
+        if not target:
+            return False
+        return any(target in (aff or "").lower() for aff in s2_author.get("affiliations") or [])
+
+    def _profile_text(self, scraped: dict) -> str:
+        return " ".join(filter(None, [scraped.get("title"), scraped.get("bio"), scraped.get("research_keywords")]))
+
+    def _heuristic(self, scraped: dict, s2_author: dict) -> dict:
+        profile = _words(self._profile_text(scraped))
+        papers = _words(" ".join(p.get("title") or "" for p in s2_author.get("papers") or []))
+        shared = profile & papers
+        if len(shared) >= 2:
+            return {"confidence": "Medium", "reason": f"Topic overlap: {', '.join(sorted(shared)[:5])}"}
+        return {"confidence": "Low", "reason": "No topic overlap between profile and papers"}
+
+    def _ask_llm(self, scraped: dict, s2_author: dict, target_uni: str) -> dict | None:
+        titles = [f"- {p.get('year') or 'n.d.'} {p.get('title')}" for p in (s2_author.get("papers") or [])[:15]]
+        source = (
+            f"PROFILE:\nName: {scraped.get('name')}\nUniversity: {target_uni}\n{self._profile_text(scraped)}\n\n"
+            f"CANDIDATE:\nName: {s2_author.get('name')}\n"
+            f"Affiliations: {', '.join(s2_author.get('affiliations') or []) or 'unknown'}\n"
+            f"Papers: {s2_author.get('paperCount', 'unknown')}, citations: {s2_author.get('citationCount', 'unknown')}\n"
+            + "\n".join(titles)
+        )
+        result = extract_object(JUDGE_PROMPT, source, JUDGE_SCHEMA, required=("confidence",),
+                                usage_source="judge", max_tokens=256)
+        confidence = (result.get("confidence") or "").strip().capitalize()
+        if confidence not in CONFIDENCE_LEVELS:
+            return None
+        return {"confidence": confidence, "reason": f"AI Judge: {result.get('reason') or ''}".strip()}
+
+    def judge_candidate(self, scraped: dict, s2_author: dict, target_uni: str) -> dict:
+        """
+        Args:
+            scraped (dict): Profile data ("name", "title", "bio", ...).
+            s2_author (dict): S2 author with "affiliations" and "papers".
+            target_uni (str): University the faculty list belongs to.
+
+        Returns:
+            dict: {"confidence": "High" | "Medium" | "Low", "reason": str}
+        """
+        if self.hard_match(s2_author, target_uni):
+            return {"confidence": "High", "reason": "Affiliation Hard Match"}
+        if self.use_llm:
+            try:
+                verdict = self._ask_llm(scraped, s2_author, target_uni)
+                if verdict:
+                    return verdict
+            except Exception as e:
+                print(f"    ⚠️ AI judge unavailable, using heuristic: {e}")
+        return self._heuristic(scraped, s2_author)
@@ -1,91 +1,433 @@
 import os
-from openai import OpenAI
+import sys
+import json
+import time
+import hashlib
+import asyncio
+import threading
+import weakref
 from dotenv import load_dotenv
+from rate_limit import TokenBucket, backoff_delay, parse_retry_after
+from budget import BudgetExceeded, current_budget, estimate_tokens
+from compaction import compact_papers
+from cache import DiskCache
+from credentials import get_key
 
 load_dotenv()
 
-def get_client():
-    api_key = os.getenv("DEEPSEEK_API_KEY")
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+DEEPSEEK_MODEL = "deepseek-chat"
+
+# Client-side limits. DeepSeek does not publish hard quotas, so these are tunable via env.
+MAX_CONCURRENCY = int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.getenv("DEEPSEEK_RPM", "60"))
+TOKENS_PER_MINUTE = float(os.getenv("DEEPSEEK_TPM", "200000"))
+MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "5"))
+REQUEST_TIMEOUT = float(os.getenv("DEEPSEEK_TIMEOUT", "60"))
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Bounds on the paper list sent to summarize_from_papers.
+SUMMARY_PAPER_TOKENS = int(os.getenv("SUMMARY_PAPER_TOKENS", "800"))
+SUMMARY_TOP_K = int(os.getenv("SUMMARY_TOP_K", "12"))
+
+_request_bucket = TokenBucket(REQUESTS_PER_MINUTE / 60, REQUESTS_PER_MINUTE)
+_token_bucket = TokenBucket(TOKENS_PER_MINUTE / 60, TOKENS_PER_MINUTE)
+_sync_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+# asyncio primitives and clients are bound to an event loop, so they are kept per loop.
+_async_slots = weakref.WeakKeyDictionary()
+_async_clients = weakref.WeakKeyDictionary()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class LLMCallError(Exception):
+    """Raised when a completion could not be obtained, after retries where applicable."""
+
+
+class LLMFailure(str):
+    """
+    Summary placeholder for a failed LLM call.
+
+    It is an empty (falsy) string, so legacy `if summary:` checks keep working,
+    but callers can tell a failed call apart from "nothing to summarize" with
+    `isinstance(summary, LLMFailure)`. The cause is kept in `reason`, and
+    `over_budget` marks calls skipped because the run budget was exhausted.
+    """
+
+    def __new__(cls, reason: str = "", over_budget: bool = False):
+        obj = super().__new__(cls, "")
+        obj.reason = reason
+        obj.over_budget = over_budget
+        return obj
+
+
+def _api_key():
+    api_key = get_key("DEEPSEEK_API_KEY")
     if not api_key:
         raise ValueError("DeepSeek API Key not found. Please set it in the sidebar.")
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://api.deepseek.com"
+    return api_key
+
+def get_client():
+    """Returns the shared, connection-pooled client for the current API key."""
+    api_key = _api_key()
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # openai takes most of a second to import, so it is loaded with the first client.
+            from openai import OpenAI
+            # Retries are handled by complete() so they respect the shared limits.
+            client = OpenAI(api_key=api_key, base_url=DEEPSEEK_BASE_URL, max_retries=0, timeout=REQUEST_TIMEOUT)
+            _clients[api_key] = client
+    return client
+
+def get_async_client():
+    """Async counterpart of get_client(), shared per running event loop."""
+    api_key = _api_key()
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    if api_key not in clients:
+        from openai import AsyncOpenAI
+        clients[api_key] = AsyncOpenAI(api_key=api_key, base_url=DEEPSEEK_BASE_URL, max_retries=0, timeout=REQUEST_TIMEOUT)
+    return clients[api_key]
+
+def estimate_request_tokens(messages, max_tokens=None) -> int:
+    """Pre-flight estimate of a request's prompt tokens plus room for the answer."""
+    return sum(estimate_tokens(m.get("content") or "") for m in messages) + (max_tokens or 400)
+
+def _charge(estimate):
+    budget = current_budget()
+    if budget is not None:
+        budget.check(estimate)
+
+def _record(resp, source):
+    budget = current_budget()
+    if budget is not None:
+        budget.record(getattr(resp, "usage", None), source)
+
+def _is_retryable(exc) -> bool:
+    # openai is only imported once a client exists; before that no error can come from it.
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return getattr(exc, "status_code", None) in RETRYABLE_STATUS
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return parse_retry_after(headers.get("retry-after"))
+
+def complete(messages: list, temperature: float = 0.2, source: str = "llm", **kwargs):
+    """
+    Sends a chat completion through the shared client, concurrency slots and rate limits.
+
+    Transient errors (429, 5xx, timeouts) are retried with jittered exponential
+    backoff that honors Retry-After. Usage is recorded against the active run
+    budget under `source`.
+
+    Raises:
+        BudgetExceeded: If the active run budget cannot afford the request.
+        LLMCallError: If the call fails permanently or retries are exhausted.
+    """
+    estimate = estimate_request_tokens(messages, kwargs.get("max_tokens"))
+    _charge(estimate)
+    for attempt in range(MAX_RETRIES + 1):
+        with _sync_slots:
+            _request_bucket.acquire(1)
+            _token_bucket.acquire(estimate)
+            try:
+                resp = get_client().chat.completions.create(
+                    model=DEEPSEEK_MODEL, messages=messages, temperature=temperature, **kwargs
+                )
+                _record(resp, source)
+                return resp
+            except Exception as e:
+                if not _is_retryable(e) or attempt == MAX_RETRIES:
+                    raise LLMCallError(str(e)) from e
+                delay = backoff_delay(attempt, retry_after=_retry_after(e))
+                print(f"    ⚠️ LLM call failed ({e}). Retrying in {delay:.1f}s... (Attempt {attempt+1}/{MAX_RETRIES+1})")
+        # Sleep outside the slot so other callers can proceed meanwhile.
+        time.sleep(delay)
+
+async def acomplete(messages: list, temperature: float = 0.2, source: str = "llm", **kwargs):
+    """Asyncio variant of complete(), sharing the same rate limits and budget."""
+    estimate = estimate_request_tokens(messages, kwargs.get("max_tokens"))
+    _charge(estimate)
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    for attempt in range(MAX_RETRIES + 1):
+        async with slots:
+            await _request_bucket.acquire_async(1)
+            await _token_bucket.acquire_async(estimate)
+            try:
+                resp = await get_async_client().chat.completions.create(
+                    model=DEEPSEEK_MODEL, messages=messages, temperature=temperature, **kwargs
+                )
+                _record(resp, source)
+                return resp
+            except Exception as e:
+                if not _is_retryable(e) or attempt == MAX_RETRIES:
+                    raise LLMCallError(str(e)) from e
+                delay = backoff_delay(attempt, retry_after=_retry_after(e))
+                print(f"    ⚠️ LLM call failed ({e}). Retrying in {delay:.1f}s... (Attempt {attempt+1}/{MAX_RETRIES+1})")
+        await asyncio.sleep(delay)
+
+def stream_complete(messages: list, temperature: float = 0.2, source: str = "llm", **kwargs):
+    """
+    Streaming variant of complete(): yields text deltas as they arrive.
+
+    Retries only cover opening the stream; usage is recorded from the final
+    chunk (stream_options.include_usage).
+    """
+    stream = complete(
+        messages, temperature=temperature, source=source,
+        stream=True, stream_options={"include_usage": True}, **kwargs
     )
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                budget = current_budget()
+                if budget is not None:
+                    budget.record(chunk.usage, source)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        raise LLMCallError(f"Stream interrupted: {e}") from e
+
+
+class SummaryStream:
+    """
+    Streamed summary. Iterating yields text deltas; once exhausted, `result`
+    holds the full summary (or an LLMFailure), exactly as the blocking
+    summarize functions would have returned it.
+    """
+
+    def __init__(self, prompt: str):
+        self._prompt = prompt
+        self.result = None
+
+    def __iter__(self):
+        parts = []
+        try:
+            for delta in stream_complete(_messages(self._prompt), source="summary"):
+                parts.append(delta)
+                yield delta
+            self.result = "".join(parts).strip()
+        except BudgetExceeded as e:
+            print(f"    💸 Skipping summary: {e}")
+            self.result = LLMFailure(str(e), over_budget=True)
+        except Exception as e:
+            print(f"    ⚠️ Summary generation failed: {e}")
+            self.result = LLMFailure(str(e))
+
+    def collect(self, on_delta=None) -> str:
+        """Consumes the stream, passing each delta to `on_delta`, and returns `result`."""
+        for delta in self:
+            if on_delta:
+                on_delta(delta)
+        return self.result
+
+
+def _messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": "You are a professional academic research assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _papers_prompt(papers: list, name: str | None, language: str | None) -> str:
+    # language=None leaves the output language out, for callers that name it themselves.
+    # Deduplicated, ranked and token-bounded; see compaction.compact_papers.
+    paper_lines = compact_papers(papers, token_budget=SUMMARY_PAPER_TOKENS, top_k=SUMMARY_TOP_K)
 
-def summarize_from_papers(papers: list, name: str | None = None, language: str = "zh") -> str:
-    titles = []
-    abstracts = []
-    for p in papers or []:
-        t = p.get("title")
-        if t:
-            titles.append(t)
-        tl = p.get("tldr")
-        if isinstance(tl, dict):
-            abstracts.append(tl.get("text"))
-        elif isinstance(tl, str):
-            abstracts.append(tl)
-    content = {
-        "name": name or "",
-        "titles": titles,
-        "abstracts": [a for a in abstracts if a]
-    }
-    
     if language == "zh":
-        prompt = (
-            f"基于以下论文标题和摘要（Paper Titles and Abstracts），总结教授 {content['name']} 的研究方向。\n"
+        return (
+            f"基于以下论文标题和摘要（Paper Titles and Abstracts），总结教授 {name or ''} 的研究方向。\n"
             "请使用简体中文（Simplified Chinese），以第三人称撰写一段约 100-150 字的学术简介。\n"
             "重点概括其核心研究领域和技术兴趣。保持专业学术风格，避免翻译腔，保留必要的英文专有名词。\n\n"
-            f"Titles: {content['titles']}\nAbstracts: {content['abstracts']}"
+            f"Papers (year | citations | title — tldr):\n{paper_lines}"
         )
-    else:
-        prompt = (
-            f"Based on the following paper titles and abstracts, summarize the research direction of Professor {content['name']}.\n"
-            "Please write a professional academic biography (about 100-150 words) in English in the third person.\n"
-            "Focus on summarizing their core research areas and technical interests. Maintain a professional academic tone.\n\n"
-            f"Titles: {content['titles']}\nAbstracts: {content['abstracts']}"
-        )
-    
-    try:
-        client = get_client()
-        resp = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a professional academic research assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception:
-        return ""
+    return (
+        f"Based on the following paper titles and abstracts, summarize the research direction of Professor {name or ''}.\n"
+        f"Please write a professional academic biography (about 100-150 words){_in_english(language)} in the third person.\n"
+        "Focus on summarizing their core research areas and technical interests. Maintain a professional academic tone.\n\n"
+        f"Papers (year | citations | title — tldr):\n{paper_lines}"
+    )
 
-def summarize_from_bio(bio_text: str, name: str | None = None, language: str = "zh") -> str:
+def _bio_prompt(bio_text: str, name: str | None, language: str | None) -> str:
     if language == "zh":
-        prompt = (
+        return (
             f"基于以下英文个人简介（Biography）文本，总结教授 {name or ''} 的研究方向。\n"
             "请使用简体中文（Simplified Chinese），以第三人称撰写一段约 100-150 字的学术简介。\n"
             "去除客套话，专注于学术贡献和研究领域。保持专业学术风格，避免翻译腔，保留必要的英文专有名词。\n\n"
             f"Bio Text: {bio_text or ''}"
         )
+    return (
+        f"Based on the following biography text, summarize the research direction of Professor {name or ''}.\n"
+        f"Please write a professional academic biography (about 100-150 words){_in_english(language)} in the third person.\n"
+        "Remove polite filler words and focus on academic contributions and research areas. Maintain a professional academic tone.\n\n"
+        f"Bio Text: {bio_text or ''}"
+    )
+
+def _in_english(language: str | None) -> str:
+    return "" if language is None else " in English"
+
+def _summarize(prompt: str) -> str:
+    try:
+        resp = complete(_messages(prompt), source="summary")
+        return (resp.choices[0].message.content or "").strip()
+    except BudgetExceeded as e:
+        print(f"    💸 Skipping summary: {e}")
+        return LLMFailure(str(e), over_budget=True)
+    except Exception as e:
+        print(f"    ⚠️ Summary generation failed: {e}")
+        return LLMFailure(str(e))
+
+async def _asummarize(prompt: str) -> str:
+    try:
+        resp = await acomplete(_messages(prompt), source="summary")
+        return (resp.choices[0].message.content or "").strip()
+    except BudgetExceeded as e:
+        print(f"    💸 Skipping summary: {e}")
+        return LLMFailure(str(e), over_budget=True)
+    except Exception as e:
+        print(f"    ⚠️ Summary generation failed: {e}")
+        return LLMFailure(str(e))
+
+def summarize_from_papers(papers: list, name: str | None = None, language: str = "zh", stream: bool = False):
+    """
+    Summarizes papers into a short research bio.
+    With stream=True, returns a SummaryStream that yields text as it is generated.
+    """
+    prompt = _papers_prompt(papers, name, language)
+    return SummaryStream(prompt) if stream else _summarize(prompt)
+
+def summarize_from_bio(bio_text: str, name: str | None = None, language: str = "zh", stream: bool = False):
+    """
+    Summarizes profile bio text into a short research bio.
+    With stream=True, returns a SummaryStream that yields text as it is generated.
+    """
+    prompt = _bio_prompt(bio_text, name, language)
+    return SummaryStream(prompt) if stream else _summarize(prompt)
+
+async def asummarize_from_papers(papers: list, name: str | None = None, language: str = "zh") -> str:
+    return await _asummarize(_papers_prompt(papers, name, language))
+
+async def asummarize_from_bio(bio_text: str, name: str | None = None, language: str = "zh") -> str:
+    return await _asummarize(_bio_prompt(bio_text, name, language))
+
+# === Multilingual summaries ===
+LANGUAGE_GUIDES = {
+    "zh": "Simplified Chinese (简体中文)：约 100-150 字，保持专业学术风格，避免翻译腔，保留必要的英文专有名词",
+    "en": "English: about 100-150 words, professional academic tone",
+}
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600)))
+_summary_cache = None
+
+def _get_summary_cache():
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = DiskCache("summary", ttl=SUMMARY_CACHE_TTL, max_entries=100000)
+    return _summary_cache
+
+def _language_list(languages) -> str:
+    return "\n".join(f'- "{lang}": {LANGUAGE_GUIDES.get(lang, f"{lang}: about 100-150 words")}' for lang in languages)
+
+def _summarize_json(prompt: str, languages: list) -> dict:
+    """One JSON-mode request returning {language: text}; failures map every language to LLMFailure."""
+    try:
+        resp = complete(
+            _messages(prompt),
+            source="summary",
+            max_tokens=450 * len(languages),
+            response_format={"type": "json_object"},
+        )
+        content = (resp.choices[0].message.content or "").strip().strip("`")
+        if content.startswith("json"):
+            content = content[4:]
+        data = json.loads(content)
+    except BudgetExceeded as e:
+        print(f"    💸 Skipping summary: {e}")
+        return {lang: LLMFailure(str(e), over_budget=True) for lang in languages}
+    except Exception as e:
+        print(f"    ⚠️ Summary generation failed: {e}")
+        return {lang: LLMFailure(str(e)) for lang in languages}
+    results = {}
+    for lang in languages:
+        text = data.get(lang) if isinstance(data, dict) else None
+        results[lang] = text.strip() if isinstance(text, str) and text.strip() else LLMFailure(f"No '{lang}' text in reply")
+    return results
+
+def _translate(summary: str, source_lang: str, languages: list) -> dict:
+    prompt = (
+        f"Translate the following academic biography (language: {source_lang}) into each language listed below. "
+        "Keep names and technical terms accurate and the register professional.\n"
+        "Return a JSON object whose keys are the language codes:\n"
+        f"{_language_list(languages)}\n\n"
+        f"Biography:\n{summary}"
+    )
+    return _summarize_json(prompt, languages)
+
+def _summarize_languages(kind: str, payload, name: str | None, languages, cache_key: str | None, on_delta=None) -> dict:
+    languages = list(dict.fromkeys(languages or ["zh"]))
+    build = _papers_prompt if kind == "papers" else _bio_prompt
+    # The digest ties cached text to its inputs, so new papers invalidate old summaries.
+    digest = hashlib.sha1(build(payload, name, "en").encode("utf-8")).hexdigest()[:16]
+    cache = _get_summary_cache() if cache_key else None
+
+    results = {}
+    if cache is not None:
+        for lang in languages:
+            cached = cache.get(f"{cache_key}|{lang}|{digest}", None)
+            if cached:
+                results[lang] = cached
+    missing = [lang for lang in languages if lang not in results]
+    if not missing:
+        return results
+
+    if results:
+        # A summary in another language already exists: translating it is much cheaper than re-summarizing.
+        source_lang, source_text = next(iter(results.items()))
+        generated = _translate(source_text, source_lang, missing)
+    elif len(missing) == 1:
+        prompt = build(payload, name, missing[0])
+        summary = SummaryStream(prompt).collect(on_delta) if on_delta else _summarize(prompt)
+        generated = {missing[0]: summary}
     else:
         prompt = (
-            f"Based on the following biography text, summarize the research direction of Professor {name or ''}.\n"
-            "Please write a professional academic biography (about 100-150 words) in English in the third person.\n"
-            "Remove polite filler words and focus on academic contributions and research areas. Maintain a professional academic tone.\n\n"
-            f"Bio Text: {bio_text or ''}"
-        )
-        
-    try:
-        client = get_client()
-        resp = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a professional academic research assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
+            f"{build(payload, name, None)}\n\n"
+            "Write this biography once for each language below. Each version must read as if written "
+            "natively in that language, not as a word-for-word translation. "
+            "Return a JSON object whose keys are the language codes:\n"
+            f"{_language_list(missing)}"
         )
-        return resp.choices[0].message.content.strip()
-    except Exception:
-        return ""
+        generated = _summarize_json(prompt, missing)
+
+    for lang, text in generated.items():
+        if text and cache is not None:
+            cache.set(f"{cache_key}|{lang}|{digest}", text)
+    results.update(generated)
+    return {lang: results[lang] for lang in languages}
+
+def summarize_papers_multilingual(papers: list, name: str | None = None, languages=("zh",), cache_key: str | None = None,
+                                  on_delta=None) -> dict:
+    """
+    Summarizes papers into several languages with a single request.
+
+    Results are cached per (cache_key, language). When some languages are
+    already cached, the rest are translated from a cached version instead of
+    being generated from the papers again. For a single fresh language,
+    `on_delta` receives the text as it streams in (JSON-mode multi-language
+    replies are not streamed).
+
+    Returns:
+        dict: {language: summary}; failed languages map to LLMFailure.
+    """
+    return _summarize_languages("papers", papers, name, languages, cache_key, on_delta)
+
+def summarize_bio_multilingual(bio_text: str, name: str | None = None, languages=("zh",), cache_key: str | None = None,
+                               on_delta=None) -> dict:
+    """Bio-text counterpart of summarize_papers_multilingual."""
+    return _summarize_languages("bio", bio_text, name, languages, cache_key, on_delta)
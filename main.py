@@ -1,17 +1,92 @@
-import pandas as pd
 import time
 import re
 import sys
+import os
 import traceback
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from scraper import scrape_faculty_list, get_profile_data
-from s2_client import search_and_fetch_papers
-from llm_engine import summarize_from_papers, summarize_from_bio
+from s2_client import search_and_fetch_papers, prefetch_author, rate_limit_metrics
+from llm_engine import summarize_papers_multilingual, summarize_bio_multilingual, LLMFailure
+from budget import RunBudget, use_budget, current_budget
+from excel_writer import ExcelStreamWriter, RESULT_COLUMNS, result_columns, write_rows
+from result_store import ResultStore
 
-def process_faculty_url(url, university_name, url_pattern_hint=None, language="zh"):
+# Start each person's S2 search while their profile page is still being fetched and parsed.
+SPECULATIVE_S2 = os.getenv("SCHOLARSCOUT_SPECULATIVE_S2", "1") != "0"
+
+def _apply_summary(row, summaries, source, languages):
+    """
+    Fills the summary columns from a {language: summary} dict, keeping failed LLM
+    calls distinguishable from missing data. The first language goes to
+    Research_Summary, every further one to Research_Summary_<LANG>.
+    """
+    summary = summaries.get(languages[0], "")
+    if summary:
+        row["Research_Summary"] = summary
+        row["Data_Source"] = source
+    elif isinstance(summary, LLMFailure) and summary.over_budget:
+        row["Research_Summary"] = "Skipped (run budget exhausted)."
+        row["Data_Source"] = "Budget_Exceeded"
+    elif isinstance(summary, LLMFailure):
+        row["Research_Summary"] = "Summary generation failed."
+        row["Data_Source"] = "LLM_Failed"
+    else:
+        row["Research_Summary"] = "No data available."
+        row["Data_Source"] = "Empty"
+    for lang in languages[1:]:
+        row[f"Research_Summary_{lang.upper()}"] = summaries.get(lang) or ""
+
+def _streamer(name, on_summary):
+    """Adapts a (name, text_so_far) UI callback to llm_engine's per-delta callback."""
+    if on_summary is None:
+        return None
+    parts = []
+
+    def on_delta(delta):
+        parts.append(delta)
+        on_summary(name, "".join(parts))
+    return on_delta
+
+def _bio_summary(bio_text, name, languages, budget, cache_key, on_delta=None):
+    """
+    Bio summaries are long prompts with a lower-confidence payoff, so they are the
+    first thing dropped once the run budget is running low.
+    """
+    if budget.in_reserve():
+        skipped = LLMFailure("Bio summary skipped: run budget nearly exhausted", over_budget=True)
+        return {lang: skipped for lang in languages}
+    return summarize_bio_multilingual(bio_text, name=name, languages=languages, cache_key=cache_key, on_delta=on_delta)
+
+def process_faculty_url(url, university_name, url_pattern_hint=None, language="zh", budget=None, languages=None,
+                        on_summary=None, on_row=None, on_progress=None):
     """
     Main orchestration function.
+
+    `languages` (e.g. ["zh", "en"]) produces one summary column per language in a
+    single pass; it defaults to [language]. Summaries are cached per faculty and
+    language, so re-runs and added languages are cheap.
+
+    `on_summary(name, text_so_far)` is called while a summary streams in, so a
+    UI can show the current professor's summary live, and `on_row(row)` as soon
+    as each person's row is complete (e.g. ExcelStreamWriter.append).
+    `on_progress(done, total, name)` is called before each person is processed.
+
+    All LLM calls are accounted against `budget` (a RunBudget, built from the
+    SCHOLARSCOUT_MAX_* env vars when omitted). Near the ceiling, bio summaries
+    are skipped; past it, the remaining faculty are listed without summaries.
     """
+    budget = budget or RunBudget.from_env()
+    languages = list(languages or [language])
+    with use_budget(budget):
+        data = _process_faculty_url(url, university_name, url_pattern_hint, languages, budget, on_summary, on_row, on_progress)
+    usage = budget.report()
+    print(f"💸 LLM usage: {usage['total_tokens']} tokens in {usage['calls']} calls (~${usage['cost_usd']:.4f})")
+    return data
+
+def _process_faculty_url(url, university_name, url_pattern_hint, languages, budget, on_summary, on_row=None,
+                         on_progress=None):
     print(f"🚀 Starting process for {university_name}...")
     
     # Step 1: Scrape List
@@ -35,105 +110,129 @@ def process_faculty_url(url, university_name, url_pattern_hint=None, language="z
     print("🕵️ Step 2: Dual-Source verification and summarization...")
     
     total = len(faculty_list)
-    for i, person in enumerate(faculty_list):
-        name = person.get('name', 'Unknown')
-        print(f"[{i+1}/{total}] Processing {name}...")
-        
-        profile_link = person.get('profile_link')
-        email = person.get('email')
-        bio_text = ""
-        recent_titles = []
-        research_interests = []
-        try:
-            profile_data = get_profile_data(profile_link) if profile_link else {}
-            if profile_data.get("name"):
-                name = profile_data.get("name") or name
-            if profile_data.get("email"):
-                email = profile_data.get("email")
-            bio_text = profile_data.get("bio_text") or ""
-            recent_titles = profile_data.get("recent_paper_titles") or []
-            research_interests = profile_data.get("research_interests") or []
-        except Exception as e:
-            print(f"    ⚠️ Failed to get profile data: {e}")
+    # The S2 search only needs the directory name, so it runs while the profile page is fetched.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2-prefetch") as prefetcher:
+        for i, person in enumerate(faculty_list):
+            print(f"[{i+1}/{total}] Processing {person.get('name', 'Unknown')}...")
+            if on_progress is not None:
+                on_progress(i, total, person.get('name', 'Unknown'))
+            row = _process_person(person, university_name, languages, budget, on_summary, prefetcher)
+            final_data.append(row)
+            if on_row is not None:
+                on_row(row)
+
+    return final_data
+
+def process_person(person, university_name, languages=None, budget=None):
+    """
+    Result row for a single directory entry outside a faculty-list run (e.g. a
+    task_queue worker). Uses the active budget (see budget.use_budget) unless one is given.
+    """
+    budget = budget or current_budget() or RunBudget.from_env()
+    with use_budget(budget):
+        return _process_person(person, university_name, list(languages or ["zh"]), budget, None)
+
+def _process_person(person, university_name, languages, budget, on_summary, prefetcher=None):
+    """
+    Builds the result row for one directory entry: profile page, S2 resolution
+    and summaries. With a `prefetcher` executor and SPECULATIVE_S2 on, the S2
+    search starts before the profile page is fetched.
+    """
+    name = person.get('name', 'Unknown')
+    profile_link = person.get('profile_link')
+    email = person.get('email')
+    if budget.time_exceeded():
+        # Past the wall-time ceiling: keep the directory data, skip all enrichment.
         row = {
             "Name": name,
             "Title": person.get('title', ''),
             "Email": email or "",
-            "Research_Keywords": ", ".join(research_interests),
+            "Research_Keywords": "",
             "Profile_Link": profile_link,
-            "Research_Summary": "",
-            "Data_Source": ""
         }
-        
-        try:
-            s2_data = search_and_fetch_papers(name=name, uni=university_name, anchor_papers=recent_titles)
-            if s2_data and s2_data.get("is_confident_match"):
-                summary = summarize_from_papers(s2_data.get("papers", []), name=name, language=language)
-                if summary:
-                    row["Research_Summary"] = summary
-                    row["Data_Source"] = "S2_Verified"
-                else:
-                    fallback = summarize_from_bio(bio_text, name=name, language=language)
-                    row["Research_Summary"] = fallback or "No data available."
-                    row["Data_Source"] = "Web_Bio" if fallback else "Empty"
-            elif bio_text:
-                summary = summarize_from_bio(bio_text, name=name, language=language)
-                row["Research_Summary"] = summary or "No data available."
-                row["Data_Source"] = "Web_Bio" if summary else "Empty"
+        skipped = LLMFailure("Wall time budget exhausted", over_budget=True)
+        _apply_summary(row, {lang: skipped for lang in languages}, "", languages)
+        return row
+    speculation = None
+    if prefetcher is not None and SPECULATIVE_S2 and name != "Unknown":
+        # Run in a copy of this context, so the prefetch uses this job's API keys.
+        speculation = prefetcher.submit(contextvars.copy_context().run, prefetch_author, name, university_name)
+    bio_text = ""
+    recent_titles = []
+    research_interests = []
+    try:
+        profile_data = get_profile_data(profile_link) if profile_link else {}
+        if profile_data.get("name"):
+            name = profile_data.get("name") or name
+        if profile_data.get("email"):
+            email = profile_data.get("email")
+        bio_text = profile_data.get("bio_text") or ""
+        recent_titles = profile_data.get("recent_paper_titles") or []
+        research_interests = profile_data.get("research_interests") or []
+    except Exception as e:
+        print(f"    ⚠️ Failed to get profile data: {e}")
+    row = {
+        "Name": name,
+        "Title": person.get('title', ''),
+        "Email": email or "",
+        "Research_Keywords": ", ".join(research_interests),
+        "Profile_Link": profile_link,
+        "Research_Summary": "",
+        "Data_Source": ""
+    }
+
+    bio_key = profile_link or f"{name}|{university_name}"
+    try:
+        prefetched = speculation.result() if speculation is not None else None
+        s2_data = search_and_fetch_papers(name=name, uni=university_name, anchor_papers=recent_titles, prefetched=prefetched)
+        if s2_data and s2_data.get("is_confident_match"):
+            # Not an Excel column; kept in the result store for the similarity index.
+            row["S2_Paper_Titles"] = [p["title"] for p in s2_data.get("papers", []) if p.get("title")]
+            summaries = summarize_papers_multilingual(
+                s2_data.get("papers", []), name=name, languages=languages,
+                cache_key=f"s2:{s2_data.get('authorId')}", on_delta=_streamer(name, on_summary)
+            )
+            if summaries.get(languages[0]):
+                _apply_summary(row, summaries, "S2_Verified", languages)
             else:
-                row["Research_Summary"] = "No data available."
-                row["Data_Source"] = "Empty"
-                    
-        except Exception as e:
-            print(f"   ❌ Error processing {name}: {e}")
-            fallback = summarize_from_bio(bio_text, name=name, language=language) if bio_text else ""
-            row["Research_Summary"] = fallback or "No data available."
-            row["Data_Source"] = "Web_Bio" if fallback else "Empty"
-            
-        final_data.append(row)
-        
-    return final_data
+                fallback = _bio_summary(bio_text, name, languages, budget, bio_key, _streamer(name, on_summary)) if bio_text else summaries
+                _apply_summary(row, fallback, "Web_Bio", languages)
+        elif bio_text:
+            summaries = _bio_summary(bio_text, name, languages, budget, bio_key, _streamer(name, on_summary))
+            _apply_summary(row, summaries, "Web_Bio", languages)
+        else:
+            _apply_summary(row, {}, "Empty", languages)
+
+    except Exception as e:
+        print(f"   ❌ Error processing {name}: {e}")
+        fallback = _bio_summary(bio_text, name, languages, budget, bio_key) if bio_text else {}
+        _apply_summary(row, fallback, "Web_Bio", languages)
+
+    return row
 
-def save_to_excel(data_list, filename):
+def fan_out(*callbacks):
+    """Combines several on_row callbacks (e.g. the Excel writer and the result store) into one."""
+    def on_row(row):
+        for callback in callbacks:
+            callback(row)
+    return on_row
+
+def save_to_excel(data_list, filename, languages=None):
     """
-    Saves data to Excel with styling.
+    Saves data to Excel with styling. Prefer streaming rows with
+    excel_writer.ExcelStreamWriter (process_faculty_url's `on_row`) for long runs.
     """
     if not data_list:
         print("⚠️ No data to save.")
         return
-
-    df = pd.DataFrame(data_list)
-    
-    columns_order = [
-        "Name", "Title", "Email", "Research_Keywords", "Profile_Link", "Research_Summary", "Data_Source"
-    ]
-    for col in columns_order:
-        if col not in df.columns:
-            df[col] = ""
-            
-    df = df[columns_order]
-    
+    if languages:
+        columns = result_columns(languages)
+    else:
+        # One extra column per additional summary language, right after Research_Summary.
+        columns = list(RESULT_COLUMNS)
+        columns[6:6] = sorted({k for row in data_list for k in row if k.startswith("Research_Summary_")})
     print(f"💾 Saving to {filename}...")
-    
-    # Use xlsxwriter for styling
-    writer = pd.ExcelWriter(filename, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Faculty Data')
-    
-    workbook = writer.book
-    worksheet = writer.sheets['Faculty Data']
-    
-    header_format = workbook.add_format({'bold': True, 'bottom': 1})
-    
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
-        
-    for i, col in enumerate(df.columns):
-        column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-        if column_len > 50:
-            column_len = 50
-        worksheet.set_column(i, i, column_len)
-
-    writer.close()
+    write_rows(data_list, filename, columns)
     print("✅ Excel saved successfully.")
 
 if __name__ == "__main__":
@@ -147,6 +246,8 @@ if __name__ == "__main__":
     
     target_url = input(f"Enter Faculty List URL [Default: {default_url}]: ").strip() or default_url
     target_uni = input(f"Enter University Name [Default: {default_uni}]: ").strip() or default_uni
+    target_languages = input("Summary languages, comma-separated [Default: zh]: ").strip() or "zh"
+    languages = [lang.strip() for lang in target_languages.split(",") if lang.strip()]
     
     start_time = time.time()
     
@@ -156,11 +257,6 @@ if __name__ == "__main__":
         print("💡 Detected BYU: Applying 'faculty-directory' URL hint.")
         url_pattern_hint = "faculty-directory"
     
-    data = process_faculty_url(target_url, target_uni, url_pattern_hint=url_pattern_hint)
-    
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    
     # Generate Filename
     # Clean university name: remove spaces, special chars
     clean_uni_name = re.sub(r'[^a-zA-Z0-9]', '_', target_uni)
@@ -170,7 +266,23 @@ if __name__ == "__main__":
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
     filename = f"{clean_uni_name}_{timestamp}.xlsx"
     
-    save_to_excel(data, filename)
+    # Rows are written as they finish; an interrupted run leaves a readable workbook
+    # (or, after a hard kill, a sidecar for `python excel_writer.py recover`).
+    budget = RunBudget.from_env()
+    print(f"💾 Writing results to {filename} as they complete...")
+    # Every run is also appended to the multi-run result store (see result_store.py).
+    with ExcelStreamWriter(filename, result_columns(languages)) as writer, \
+            ResultStore().open_run(target_uni, url=target_url, languages=languages) as run:
+        data = process_faculty_url(target_url, target_uni, url_pattern_hint=url_pattern_hint, budget=budget,
+                                   languages=languages, on_row=fan_out(writer.append, run.append))
+    # Make the new rows findable in the search tab / `python search_index.py query`.
+    from search_index import sync_search_index
+    from similarity import sync_similarity_index
+    sync_search_index()
+    sync_similarity_index()
+    
+    end_time = time.time()
+    elapsed_time = end_time - start_time
     
     if data:
         total_scraped = len(data)
@@ -183,6 +295,13 @@ if __name__ == "__main__":
             by_source[src] = by_source.get(src, 0) + 1
         for k, v in by_source.items():
             print(f"{k}: {v}")
+        usage = budget.report()
+        print(f"LLM Tokens: {usage['total_tokens']} (prompt {usage['prompt_tokens']}, completion {usage['completion_tokens']})")
+        for k, v in usage["by_source"].items():
+            print(f"  {k}: {v}")
+        print(f"Estimated Cost: ${usage['cost_usd']:.4f}")
+        s2_metrics = rate_limit_metrics()
+        print(f"S2 Requests: {s2_metrics['acquired']} (waited {s2_metrics['total_wait_s']:.1f}s for rate limit)")
         print(f"Total Time: {elapsed_time:.2f} seconds")
         print("="*30)
     else:
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+from rapidfuzz import fuzz
+from rapidfuzz.process import cdist
+from compaction import normalize_title
+
+# Minimum 0-100 similarity for an anchor to count as the same paper.
+ANCHOR_MATCH_THRESHOLD = float(os.getenv("SCHOLARSCOUT_ANCHOR_THRESHOLD", "90"))
+# Subset matching ("Title" vs "Title: A Subtitle") is only trusted for titles at least this long,
+# otherwise a two-word anchor would match every paper containing those words.
+MIN_SUBSET_TOKENS = 4
+
+
+class TitleIndex:
+    """
+    Normalized titles of a set of papers, built once and scored in bulk.
+
+    Titles are normalized with `compaction.normalize_title` and indexed by token,
+    so anchors that share no word with any paper are rejected without scoring.
+
+    Args:
+        papers (list): Paper dicts with a "title" key.
+    """
+
+    def __init__(self, papers: list):
+        titles = [normalize_title(p.get("title")) for p in papers or []]
+        # Positions in the original list, so callers can map matches back; untitled papers are skipped.
+        self.positions = [i for i, t in enumerate(titles) if t]
+        self.titles = [titles[i] for i in self.positions]
+        self.lengths = np.array([len(t.split()) for t in self.titles], dtype=np.int32)
+        self.tokens = {}
+        for i, title in enumerate(self.titles):
+            for token in set(title.split()):
+                self.tokens.setdefault(token, []).append(i)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def scores(self, anchors: list) -> np.ndarray:
+        """
+        Scores every anchor against every paper in one pass.
+
+        Returns:
+            np.ndarray: (len(anchors), len(papers)) similarities in 0-100.
+        """
+        queries = [normalize_title(a) for a in anchors or [] if isinstance(a, str)]
+        if not queries or not self.titles:
+            return np.zeros((len(queries), len(self.titles)), dtype=np.float32)
+        exact = cdist(queries, self.titles, scorer=fuzz.ratio, dtype=np.float32)
+        subset = cdist(queries, self.titles, scorer=fuzz.token_set_ratio, dtype=np.float32)
+        query_lengths = np.array([len(q.split()) for q in queries], dtype=np.int32)
+        shorter = np.minimum(query_lengths[:, None], self.lengths[None, :])
+        scores = np.where(shorter >= MIN_SUBSET_TOKENS, np.maximum(exact, subset), exact)
+        # Pairs without a single shared token cannot be the same paper.
+        overlap = np.zeros_like(scores, dtype=bool)
+        for row, query in enumerate(queries):
+            for token in set(query.split()):
+                overlap[row, self.tokens.get(token, [])] = True
+        return np.where(overlap, scores, 0)
+
+    def best_match(self, anchors: list, threshold: float | None = None):
+        """
+        Returns (index into the original papers, score) of the best anchor match
+        at or above `threshold`, or None.
+        """
+        threshold = ANCHOR_MATCH_THRESHOLD if threshold is None else threshold
+        scores = self.scores(anchors)
+        if not scores.size:
+            return None
+        per_paper = scores.max(axis=0)
+        best = int(per_paper.argmax())
+        if per_paper[best] < threshold:
+            return None
+        return self.positions[best], float(per_paper[best])
+
+
+def has_anchor_paper(papers: list, anchors: list, threshold: float | None = None) -> bool:
+    """True when any anchor title fuzzily matches one of `papers`."""
+    return TitleIndex(papers).best_match(anchors, threshold) is not None
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by sync and asyncio callers.
+
+    Args:
+        rate (float): Tokens refilled per second.
+        capacity (float): Maximum burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Takes `amount` tokens (possibly going negative) and returns how long to wait."""
+        # A single request larger than the bucket would never fit; clamp it to a full bucket.
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1) -> float:
+        """Blocks until `amount` tokens are available. Returns the time waited."""
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, amount: float = 1) -> float:
+        """Asyncio variant of `acquire`."""
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def parse_retry_after(value) -> float | None:
+    """
+    Parses a Retry-After header (delta-seconds or HTTP-date) into seconds.
+    Returns None when the header is missing or malformed.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        target = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if target is None:
+        return None
+    return max(0.0, target.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, retry_after: float | None = None) -> float:
+    """
+    Delay before retry number `attempt` (0-based).
+
+    A server-provided Retry-After wins; otherwise "full jitter" exponential backoff
+    is used so that concurrent workers do not retry in lockstep.
+    """
+    if retry_after is not None:
+        return min(cap, retry_after) + random.uniform(0, base / 2)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RateLimiter:
+    """
+    Process-wide limiter for one upstream API.
+
+    Wraps a TokenBucket with a shared cooldown: when any caller receives a 429
+    with Retry-After, `pause()` holds back every caller, not just the one that
+    was throttled. Safe for threads and asyncio tasks, and records how many
+    callers are queued and how long they waited.
+
+    Args:
+        rate (float): Requests per second.
+        burst (float): Bucket capacity.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def pause(self, seconds: float):
+        """Blocks all callers for at least `seconds` (e.g. from a Retry-After header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _cooldown(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+    def _enter(self):
+        with self._lock:
+            self._waiting += 1
+        return time.monotonic()
+
+    def _leave(self, started: float):
+        waited = time.monotonic() - started
+        with self._lock:
+            self._waiting -= 1
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent. Returns the time waited."""
+        started = self._enter()
+        try:
+            while True:
+                cooldown = self._cooldown()
+                if cooldown > 0:
+                    time.sleep(cooldown)
+                self.bucket.acquire(1)
+                # A 429 may have arrived while we waited for a token.
+                if self._cooldown() <= 0:
+                    break
+        finally:
+            waited = self._leave(started)
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Asyncio variant of `acquire`."""
+        started = self._enter()
+        try:
+            while True:
+                cooldown = self._cooldown()
+                if cooldown > 0:
+                    await asyncio.sleep(cooldown)
+                await self.bucket.acquire_async(1)
+                if self._cooldown() <= 0:
+                    break
+        finally:
+            waited = self._leave(started)
+        return waited
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._waiting,
+                "acquired": self._acquired,
+                "total_wait_s": round(self._total_wait, 3),
+                "avg_wait_s": round(self._total_wait / self._acquired, 3) if self._acquired else 0.0,
+                "max_wait_s": round(self._max_wait, 3),
+                "cooldown_s": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            }
@@ -0,0 +1,325 @@
+import math
+import os
+from abc import ABC, abstractmethod
+from difflib import SequenceMatcher
+from matching import TitleIndex
+from s2_client import search_authors, get_authors
+
+SEARCH_FIELDS = "authorId,name,affiliations,paperCount,citationCount"
+ANCHOR_FIELDS = "authorId,name,affiliations,papers.title"
+JUDGE_FIELDS = "authorId,name,affiliations,paperCount,citationCount,papers.title,papers.year"
+# Score a candidate must reach for the resolution to stop early and count as confident.
+RESOLVE_THRESHOLD = float(os.getenv("SCHOLARSCOUT_RESOLVE_THRESHOLD", "0.8"))
+# Candidates whose details are fetched per round, best first; verification stops at the first match.
+CANDIDATE_WAVES = (1, 2, 2)
+
+# Evidence weights. Name similarity alone can never resolve a person.
+NAME_WEIGHT = 0.3
+AFFILIATION_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.3
+ANCHOR_WEIGHT = 1.0
+JUDGE_WEIGHTS = {"High": 0.6, "Medium": 0.3, "Low": -0.5}
+
+
+def _norm(s):
+    if not s:
+        return ""
+    return "".join(ch.lower() for ch in s if ch.isalnum() or ch.isspace())
+
+def affiliation_match(affiliations, target) -> bool:
+    """True when the normalized `target` occurs in any of the affiliations."""
+    if not affiliations or not target:
+        return False
+    t = _norm(target).strip()
+    return bool(t) and any(t in _norm(a) for a in affiliations)
+
+
+class Resolution:
+    """
+    State of one person's resolution, shared by the stages.
+
+    Attributes:
+        candidates (dict): authorId -> search record, in discovery order.
+        scores (dict): authorId -> accumulated evidence.
+        details (dict): authorId -> detailed record, for candidates fetched by a stage.
+        stages_run (list): Names of the stages that ran.
+    """
+
+    def __init__(self, name, uni, anchors=None, keyword=None, profile=None):
+        self.name = name
+        self.uni = uni
+        self.anchors = [a for a in anchors or [] if isinstance(a, str) and a.strip()]
+        self.keyword = keyword
+        self.profile = profile or {}
+        self.candidates = {}
+        self.scores = {}
+        self.details = {}
+        self.reasons = {}
+        self.stages_run = []
+
+    def add_candidate(self, cand: dict) -> bool:
+        author_id = cand.get("authorId")
+        # Authors without papers can neither be verified nor summarized.
+        if not author_id or author_id in self.candidates or cand.get("paperCount", 1) == 0:
+            return False
+        self.candidates[author_id] = cand
+        self.scores[author_id] = 0.0
+        return True
+
+    def add(self, author_id, score, reason=None):
+        self.scores[author_id] = self.scores.get(author_id, 0.0) + score
+        if reason:
+            self.reasons.setdefault(author_id, []).append(reason)
+
+    def ranked(self) -> list:
+        """Candidate ids, best first (discovery order breaks ties)."""
+        order = {a: i for i, a in enumerate(self.candidates)}
+        return sorted(self.candidates, key=lambda a: (-self.scores[a], order[a]))
+
+    def best(self):
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+
+
+def verification_order(res: Resolution) -> list:
+    """Candidates in the order their papers should be checked: affiliation matches first, then by score."""
+    return sorted(res.ranked(), key=lambda a: not affiliation_match(res.candidates[a].get("affiliations"), res.uni))
+
+
+# --- Stages, cheapest first. Each adds evidence to the Resolution. ---
+
+class Stage(ABC):
+    """
+    One source of identity evidence.
+
+    `cost` is the number of API/LLM calls the stage may make, for reporting;
+    `applies()` lets a stage opt out for people it has nothing to say about.
+    """
+    name = "stage"
+    cost = 0
+
+    def applies(self, res: Resolution) -> bool:
+        return True
+
+    @abstractmethod
+    def run(self, res: Resolution):
+        """Adds this stage's evidence to `res`."""
+
+
+class SearchStage(Stage):
+    """One author search (name + university, then name only if empty); scores names and paper counts."""
+    name = "search"
+    cost = 1
+
+    def __init__(self, limit: int = 5):
+        self.limit = limit
+
+    def run(self, res):
+        search = search_authors(f"{res.name} {res.uni}", SEARCH_FIELDS, self.limit)
+        data = (search or {}).get("data") or []
+        if not data:
+            search = search_authors(res.name, SEARCH_FIELDS, self.limit * 2)
+            data = (search or {}).get("data") or []
+        for cand in data:
+            if res.add_candidate(cand):
+                similarity = SequenceMatcher(None, _norm(res.name), _norm(cand.get("name"))).ratio()
+                paper_count = cand.get("paperCount") or 0
+                # The paperCount bonus only orders namesakes; it stays well below any real evidence.
+                res.add(cand["authorId"], NAME_WEIGHT * similarity + 0.05 * min(1.0, math.log10(paper_count + 1) / 3))
+
+
+class AffiliationStage(Stage):
+    """
+    Affiliation (or keyword) match against the search payload. Free.
+
+    Skipped when anchor titles are available: they are stronger evidence and
+    used to be required, so a namesake at the same university is not locked.
+    """
+    name = "affiliation"
+
+    def applies(self, res):
+        return not res.anchors
+
+    def run(self, res):
+        for author_id, cand in res.candidates.items():
+            if affiliation_match(cand.get("affiliations"), res.uni):
+                res.add(author_id, AFFILIATION_WEIGHT, "affiliation")
+            elif res.keyword and affiliation_match(cand.get("affiliations"), res.keyword):
+                res.add(author_id, KEYWORD_WEIGHT, "keyword_affiliation")
+
+
+class AnchorStage(Stage):
+    """
+    Fuzzy-matches the profile's paper titles against candidates' papers,
+    fetching details in small /author/batch waves and stopping at the first match.
+    """
+    name = "anchors"
+    cost = len(CANDIDATE_WAVES)
+
+    def __init__(self, waves=CANDIDATE_WAVES):
+        self.waves = waves
+
+    def applies(self, res):
+        return bool(res.anchors) and bool(res.candidates)
+
+    def run(self, res):
+        # Affiliation is not scored when anchors exist, but it still decides who is checked first.
+        ranked = verification_order(res)
+        start = 0
+        for wave in self.waves:
+            batch = ranked[start:start + wave]
+            start += wave
+            if not batch:
+                break
+            # Details may already be there from Resolver.prefetch.
+            missing = [a for a in batch if a not in res.details]
+            if missing:
+                res.details.update(get_authors(missing, ANCHOR_FIELDS))
+            # Score the anchors against every paper of the wave in one pass.
+            owners, papers = [], []
+            for author_id in batch:
+                for p in (res.details.get(author_id) or {}).get("papers") or []:
+                    owners.append(author_id)
+                    papers.append(p)
+            match = TitleIndex(papers).best_match(res.anchors)
+            if match:
+                res.add(owners[match[0]], ANCHOR_WEIGHT, "anchor_paper")
+                return
+
+
+class KeywordSearchStage(Stage):
+    """Searches name + research keyword; authors it returns get keyword evidence."""
+    name = "keyword_search"
+    cost = 1
+
+    def applies(self, res):
+        return bool(res.keyword)
+
+    def run(self, res):
+        search = search_authors(f"{res.name} {res.keyword}", SEARCH_FIELDS, 3)
+        for rank, cand in enumerate((search or {}).get("data") or []):
+            res.add_candidate(cand)
+            if cand.get("authorId") in res.candidates:
+                # S2 matched the keyword against the author's papers; trust the top hit most.
+                res.add(cand["authorId"], KEYWORD_WEIGHT / (rank + 1), "keyword_search")
+                if not res.anchors and affiliation_match(cand.get("affiliations"), res.uni) \
+                        and "affiliation" not in res.reasons.get(cand["authorId"], []):
+                    res.add(cand["authorId"], AFFILIATION_WEIGHT, "affiliation")
+
+
+class JudgeStage(Stage):
+    """Asks the AuthorJudge (LLM) about the current best candidate. Most expensive; off by default."""
+    name = "judge"
+    cost = 2
+
+    def __init__(self, judge=None):
+        self.judge = judge
+
+    def applies(self, res):
+        return bool(res.candidates)
+
+    def run(self, res):
+        from judge import AuthorJudge
+        judge = self.judge or AuthorJudge()
+        author_id = res.best()
+        details = get_authors([author_id], JUDGE_FIELDS).get(author_id)
+        if not details:
+            return
+        scraped = {"name": res.name, "research_keywords": res.keyword, **res.profile}
+        verdict = judge.judge_candidate(scraped, details, res.uni)
+        res.add(author_id, JUDGE_WEIGHTS.get(verdict.get("confidence"), 0.0), f"judge:{verdict.get('confidence')}")
+
+
+def default_stages(judge: bool = False) -> list:
+    stages = [SearchStage(), AffiliationStage(), AnchorStage(), KeywordSearchStage()]
+    if judge:
+        stages.append(JudgeStage())
+    return stages
+
+
+class Resolver:
+    """
+    Resolves a faculty member to a Semantic Scholar author.
+
+    Runs evidence stages from cheap to expensive and stops as soon as the best
+    candidate reaches `threshold`, so most people cost one search call.
+
+    Args:
+        stages (list, optional): Stage instances in the order to run (default_stages()).
+        threshold (float): Score for a confident match.
+    """
+
+    def __init__(self, stages=None, threshold: float = RESOLVE_THRESHOLD):
+        self.stages = stages if stages is not None else default_stages()
+        self.threshold = threshold
+
+    def prefetch(self, name: str, uni: str, detail_wave: int = 1) -> Resolution:
+        """
+        Speculatively runs the search stage and fetches paper titles for the
+        first `detail_wave` candidates, before the profile page (and its anchor
+        titles) is known. Pass the result to `resolve(prefetched=...)`.
+        """
+        res = Resolution(name, uni)
+        for stage in self.stages:
+            if isinstance(stage, SearchStage):
+                stage.run(res)
+                res.stages_run.append(stage.name)
+        first = verification_order(res)[:detail_wave]
+        if first:
+            res.details.update(get_authors(first, ANCHOR_FIELDS))
+        return res
+
+    def resolve(self, name: str, uni: str, anchors=None, keyword=None, profile=None, prefetched=None) -> dict | None:
+        """
+        Args:
+            prefetched (Resolution, optional): Result of `prefetch` for the same
+                name and university; its finished stages are not repeated.
+
+        Returns:
+            dict: {"authorId", "name", "affiliations", "paperCount", "citationCount",
+            "score", "is_confident_match", "resolved_by", "evidence", "stages_run"}
+            for the best candidate, or None if the search found nobody.
+        """
+        if prefetched is not None and (prefetched.name, prefetched.uni) == (name, uni):
+            res = prefetched
+            res.anchors = Resolution(name, uni, anchors).anchors
+            res.keyword, res.profile = keyword, profile or {}
+        else:
+            res = Resolution(name, uni, anchors, keyword, profile)
+        done = set(res.stages_run)
+        resolved_by = None
+        for stage in self.stages:
+            if stage.name in done or not stage.applies(res):
+                continue
+            stage.run(res)
+            res.stages_run.append(stage.name)
+            best = res.best()
+            if best is not None and res.scores[best] >= self.threshold:
+                resolved_by = stage.name
+                break
+        best = res.best()
+        if best is None:
+            return None
+        cand = {**res.candidates[best], **{k: v for k, v in (res.details.get(best) or {}).items() if k != "papers"}}
+        return {
+            "authorId": best,
+            "name": cand.get("name"),
+            "affiliations": cand.get("affiliations") or [],
+            "paperCount": cand.get("paperCount"),
+            "citationCount": cand.get("citationCount"),
+            "score": round(res.scores[best], 3),
+            "is_confident_match": resolved_by is not None,
+            "resolved_by": resolved_by,
+            "evidence": res.reasons.get(best, []),
+            "stages_run": res.stages_run,
+        }
+
+
+_default_resolver = None
+
+def get_resolver() -> Resolver:
+    """Shared resolver with the default stages (the LLM judge is enabled with SCHOLARSCOUT_RESOLVE_JUDGE=1)."""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = Resolver(default_stages(judge=os.getenv("SCHOLARSCOUT_RESOLVE_JUDGE") == "1"))
+    return _default_resolver
@@ -0,0 +1,361 @@
+import os
+import re
+import sys
+import json
+import uuid
+import argparse
+import threading
+from datetime import datetime
+from excel_writer import write_rows
+
+DEFAULT_ROOT = os.getenv("SCHOLARSCOUT_RESULTS_DIR", "results")
+INDEX_FILE = "runs.jsonl"
+# A run still "running" with no row written for this long was left behind by a
+# crashed process; new_rows marks it "aborted" and stops looking at it.
+STALE_RUN_HOURS = float(os.getenv("SCHOLARSCOUT_STALE_RUN_HOURS", "6"))
+_XLSX_NAME = re.compile(r"^(?P<uni>.+?)_(?P<date>\d{8})_(?P<time>\d{4,6})\.xlsx$")
+# Data_Source of rows whose Research_Summary is a placeholder ("No data available.", ...), see main._apply_summary.
+PLACEHOLDER_SOURCES = frozenset({"Empty", "LLM_Failed", "Budget_Exceeded"})
+
+
+def slugify(university: str) -> str:
+    """Same cleaning main.py uses for output filenames."""
+    return re.sub(r"_+", "_", re.sub(r"[^a-zA-Z0-9]", "_", university or "unknown")).strip("_") or "unknown"
+
+def research_summaries(row: dict) -> list:
+    """Research_Summary plus the per-language summary columns; none for placeholder rows."""
+    if row.get("Data_Source") in PLACEHOLDER_SOURCES:
+        return []
+    parts = [row.get("Research_Summary")] + [v for k, v in sorted(row.items()) if k.startswith("Research_Summary_")]
+    return [str(p) for p in parts if p]
+
+def _column_file(column: str) -> str:
+    return re.sub(r"[^\w.-]", "_", column) + ".jsonl"
+
+
+class RunWriter:
+    """
+    Appends the rows of one run column by column (one JSONL file per column,
+    one value per line). Columns that first appear mid-run are back-filled
+    with nulls so that line N of every file belongs to row N.
+    """
+
+    def __init__(self, store, meta: dict):
+        self.store = store
+        self.meta = meta
+        self.path = os.path.join(store.root, meta["partition"])
+        self.rows = 0
+        self.sources = {}
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, column):
+        if column not in self._files:
+            f = open(os.path.join(self.path, _column_file(column)), "a", encoding="utf-8")
+            f.write("null\n" * self.rows)
+            self._files[column] = f
+        return self._files[column]
+
+    def append(self, row: dict):
+        with self._lock:
+            for column in row:
+                self._file(column)
+            for column, f in self._files.items():
+                f.write(json.dumps(row.get(column), ensure_ascii=False, default=str) + "\n")
+                f.flush()
+            self.rows += 1
+            source = row.get("Data_Source") or "Empty"
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def close(self, status: str = "complete"):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+        self.store._index_append({
+            "run_id": self.meta["run_id"], "status": status, "rows": self.rows,
+            "sources": self.sources, "finished_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close("complete" if exc_type is None else "interrupted")
+        return False
+
+
+class ResultStore:
+    """
+    Append-only store of every run's results, partitioned by university and run:
+
+        results/runs.jsonl                                   run index (metadata)
+        results/university=<slug>/run=<run_id>/<Column>.jsonl
+
+    Queries consult the index first, then open only the partitions and the
+    column files they need. Parquet would be the natural format, but pyarrow is
+    not a dependency of this project; column-per-file JSONL gives the same
+    pruning with the standard library.
+
+    Args:
+        root (str): Store directory (SCHOLARSCOUT_RESULTS_DIR, default "results").
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root or DEFAULT_ROOT
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _index_append(self, record: dict):
+        with self._lock, open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def open_run(self, university: str, url: str = "", languages=None, started_at: datetime | None = None,
+                 source: str = "scrape") -> RunWriter:
+        """Registers a new run in the index and returns its writer."""
+        started_at = started_at or datetime.now()
+        run_id = f"{started_at:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        meta = {
+            "run_id": run_id, "status": "running", "university": university, "url": url,
+            "languages": list(languages or []), "source": source,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "partition": f"university={slugify(university)}/run={run_id}",
+        }
+        self._index_append(meta)
+        return RunWriter(self, meta)
+
+    def changed_at(self) -> int:
+        """Modification time (ns) of the run index: changes whenever a run starts or finishes."""
+        try:
+            return os.stat(os.path.join(self.root, INDEX_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def runs(self, universities=None, status=None) -> list:
+        """
+        Run metadata (index records merged per run, oldest first).
+
+        Args:
+            universities (list, optional): University names or slugs to keep (case-insensitive).
+            status (str, optional): e.g. "complete".
+        """
+        path = os.path.join(self.root, INDEX_FILE)
+        merged = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    merged.setdefault(record["run_id"], {}).update(record)
+        runs = [r for r in merged.values() if "partition" in r]
+        if universities:
+            wanted = {slugify(u).lower() for u in universities}
+            runs = [r for r in runs if slugify(r.get("university")).lower() in wanted]
+        if status:
+            runs = [r for r in runs if r.get("status") == status]
+        return sorted(runs, key=lambda r: r.get("started_at") or "")
+
+    def _columns_of(self, run: dict) -> list:
+        path = os.path.join(self.root, run["partition"])
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(path) if name.endswith(".jsonl"))
+
+    def _scan(self, run: dict, columns: list, start: int = 0):
+        """Yields rows of one run from row `start` on, reading only `columns` (missing columns read as None)."""
+        path = os.path.join(self.root, run["partition"])
+        files, readers = [], []
+        try:
+            for column in columns:
+                file_path = os.path.join(path, _column_file(column))
+                if os.path.exists(file_path):
+                    f = open(file_path, encoding="utf-8")
+                    files.append(f)
+                    readers.append(f)
+                else:
+                    readers.append(None)
+            if not files:
+                return
+            for f in files:
+                # Skipped rows are not decoded.
+                for _ in range(start):
+                    if not f.readline().endswith("\n"):
+                        return
+            while True:
+                row = {}
+                for column, reader in zip(columns, readers):
+                    if reader is None:
+                        row[column] = None
+                        continue
+                    line = reader.readline()
+                    if not line.endswith("\n"):
+                        # End of file, or a line cut short by a crash.
+                        return
+                    row[column] = json.loads(line)
+                yield row
+        finally:
+            for f in files:
+                f.close()
+
+    def query(self, columns=None, where=None, universities=None, latest_only: bool = False, status=None, run_ids=None,
+              start: int = 0):
+        """
+        Yields result rows across runs.
+
+        Args:
+            columns (list, optional): Columns to return; all columns when omitted.
+            where (dict, optional): Column -> value, or column -> predicate(value).
+            universities (list, optional): Only scan these universities' partitions.
+            latest_only (bool): Only the most recent run per university.
+            status (str, optional): Only runs with this status (e.g. "complete").
+            run_ids (list, optional): Only these runs.
+            start (int): Skip the first `start` rows of each run (e.g. rows a reader already has).
+
+        Each row also carries "_university" and "_run_id".
+        """
+        where = where or {}
+        runs = self.runs(universities, status)
+        if run_ids:
+            runs = [r for r in runs if r["run_id"] in set(run_ids)]
+        if latest_only:
+            latest = {}
+            for run in runs:
+                latest[slugify(run.get("university")).lower()] = run
+            runs = sorted(latest.values(), key=lambda r: r.get("started_at") or "")
+        for run in runs:
+            wanted = list(columns) if columns else self._columns_of(run)
+            needed = wanted + [c for c in where if c not in wanted]
+            for row in self._scan(run, needed, start):
+                if not all(cond(row.get(c)) if callable(cond) else row.get(c) == cond for c, cond in where.items()):
+                    continue
+                out = {c: row.get(c) for c in wanted}
+                out["_university"] = run.get("university")
+                out["_run_id"] = run["run_id"]
+                yield out
+
+    def _last_write(self, run: dict) -> float:
+        """When a row was last appended to the run (its start time if none was)."""
+        path = os.path.join(self.root, run["partition"])
+        times = [os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path)] if os.path.isdir(path) else []
+        if not times and run.get("started_at"):
+            times.append(datetime.fromisoformat(run["started_at"]).timestamp())
+        return max(times, default=0)
+
+    def abort_stale_runs(self, max_hours: float | None = None) -> list:
+        """
+        Marks runs that are still "running" but have not written a row for
+        `max_hours` (default STALE_RUN_HOURS) as "aborted", with the rows they
+        got to. A run that does finish later is recorded as usual.
+
+        Returns:
+            list: The run ids marked.
+        """
+        cutoff = datetime.now().timestamp() - 3600 * (STALE_RUN_HOURS if max_hours is None else max_hours)
+        aborted = []
+        for run in self.runs(status="running"):
+            if self._last_write(run) < cutoff:
+                columns = self._columns_of(run)[:1]
+                self._index_append({
+                    "run_id": run["run_id"], "status": "aborted",
+                    "rows": sum(1 for _ in self._scan(run, columns)) if columns else 0,
+                    "finished_at": datetime.now().isoformat(timespec="seconds"),
+                })
+                aborted.append(run["run_id"])
+        return aborted
+
+    def new_rows(self, synced: dict):
+        """
+        Yields (run, rows) for the rows added since an index last caught up,
+        oldest run first. `synced` maps run_id -> (rows seen, status) and is
+        updated in place; persist it after handling each run. Only the rows
+        past the ones seen are read, and stale runs are aborted first
+        (abort_stale_runs) so they are not looked at again.
+        """
+        self.abort_stale_runs()
+        for run in self.runs():
+            done, status = synced.get(run["run_id"], (0, None))
+            if status in ("complete", "interrupted") or (status == run.get("status") and done == run.get("rows")):
+                continue
+            columns = self._columns_of(run)
+            rows = list(self._scan(run, columns, start=done)) if columns else []
+            synced[run["run_id"]] = (done + len(rows), run.get("status"))
+            yield run, rows
+
+    def export_excel(self, filename: str, **query) -> int:
+        """Writes the rows of `query(**query)` to an .xlsx file. Returns the row count."""
+        rows = list(self.query(**query))
+        columns = list(query.get("columns") or [])
+        if not columns:
+            for row in rows:
+                columns.extend(k for k in row if k not in columns)
+        else:
+            columns += ["_university", "_run_id"]
+        return write_rows(rows, filename, columns)
+
+    def ingest_excel(self, path: str, university: str | None = None) -> str:
+        """
+        Imports a result workbook written by an earlier version (e.g.
+        University_of_Wisconsin_Madison_20251227_2110.xlsx). University and run
+        time come from the filename unless `university` is given.
+
+        Returns:
+            str: The new run id.
+        """
+        from openpyxl import load_workbook
+        started_at = None
+        match = _XLSX_NAME.match(os.path.basename(path))
+        if match:
+            university = university or match.group("uni").replace("_", " ")
+            stamp = match.group("date") + match.group("time").ljust(6, "0")
+            started_at = datetime.strptime(stamp, "%Y%m%d%H%M%S")
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h) for h in next(rows, [])]
+            with self.open_run(university or os.path.basename(path), started_at=started_at, source=f"xlsx:{os.path.basename(path)}") as run:
+                for values in rows:
+                    if any(v is not None for v in values):
+                        run.append({h: ("" if v is None else v) for h, v in zip(header, values)})
+        finally:
+            workbook.close()
+        return run.meta["run_id"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query and maintain the multi-run result store.")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="Import existing result .xlsx files")
+    ingest.add_argument("files", nargs="+")
+    sub.add_parser("runs", help="List runs")
+    query = sub.add_parser("query", help="Filter rows and optionally export them to Excel")
+    query.add_argument("--columns", help="Comma-separated columns")
+    query.add_argument("--university", action="append")
+    query.add_argument("--source", help="Data_Source to keep, e.g. S2_Verified")
+    query.add_argument("--latest", action="store_true", help="Only the latest run per university")
+    query.add_argument("--export", help="Write the result to this .xlsx file")
+    args = parser.parse_args()
+
+    store = ResultStore(args.root)
+    if args.command == "ingest":
+        for path in args.files:
+            print(f"📥 {path} -> run {store.ingest_excel(path)}")
+    elif args.command == "runs":
+        for run in store.runs():
+            print(f"{run['run_id']}  {run.get('status'):<11} {run.get('rows', '?'):>5} rows  {run.get('university')}")
+    else:
+        spec = {
+            "columns": args.columns.split(",") if args.columns else None,
+            "where": {"Data_Source": args.source} if args.source else None,
+            "universities": args.university,
+            "latest_only": args.latest,
+        }
+        if args.export:
+            print(f"✅ Exported {store.export_excel(args.export, **spec)} rows to {args.export}")
+        else:
+            for row in store.query(**spec):
+                json.dump(row, sys.stdout, ensure_ascii=False)
+                sys.stdout.write("\n")
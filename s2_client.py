@@ -2,271 +2,379 @@ import os
 import time
 import requests
 import json
+import re
+import threading
 from dotenv import load_dotenv
+from cache import DiskCache, MISS
+from compaction import select_papers
+from rate_limit import RateLimiter, backoff_delay, parse_retry_after
+from s2_local import get_local_index
+from utils import http_session
+from credentials import get_key
 
 # Load environment variables
 load_dotenv()
 
+S2_API_BASE = os.getenv("S2_API_BASE", "https://api.semanticscholar.org/graph/v1")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# Requests per second. Keyed users get a dedicated 1 rps; anonymous calls share a public pool.
+S2_RPS_WITH_KEY = float(os.getenv("S2_RPS", "1.0"))
+S2_RPS_ANONYMOUS = float(os.getenv("S2_RPS_ANONYMOUS", "0.5"))
+S2_MAX_RETRIES = int(os.getenv("S2_MAX_RETRIES", "5"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Recent-paper window (years back from now) and paging of /author/{id}/papers.
+RECENT_YEARS = int(os.getenv("S2_RECENT_YEARS", "2"))
+AUTHOR_PAPERS_PAGE = int(os.getenv("S2_AUTHOR_PAPERS_PAGE", "100"))
+AUTHOR_PAPERS_MAX_PAGES = int(os.getenv("S2_AUTHOR_PAPERS_MAX_PAGES", "10"))
+# Only the papers that make it into the summary prompt need a tldr (matches llm_engine.SUMMARY_TOP_K).
+TLDR_TOP_K = int(os.getenv("SUMMARY_TOP_K", "12"))
+# Documented per-request maxima of the batch endpoints.
+AUTHOR_BATCH_MAX = 1000
+PAPER_BATCH_MAX = 500
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns the process-wide S2 limiter. The bucket size depends on whether
+    S2_API_KEY is set (it can be set at runtime, e.g. from the Streamlit sidebar).
+    """
+    keyed = bool(get_key("S2_API_KEY"))
+    with _limiters_lock:
+        if keyed not in _limiters:
+            _limiters[keyed] = RateLimiter(S2_RPS_WITH_KEY if keyed else S2_RPS_ANONYMOUS)
+        return _limiters[keyed]
+
+def rate_limit_metrics() -> dict:
+    """Queue depth and wait-time metrics of the active S2 limiter."""
+    return get_rate_limiter().metrics()
+
+def _s2_call(method: str, path: str, params: dict | None = None, payload: dict | None = None):
+    """
+    Calls the S2 Graph API (GET or POST). Every call goes through the shared
+    rate limiter; transport errors and 429/5xx responses are retried with
+    jittered exponential backoff, and a Retry-After on 429 pauses all callers.
+
+    Returns:
+        tuple: (status, body). body is the decoded JSON when status is 200,
+        else the error text; status is None when no response arrived.
+    """
+    proxy = os.getenv("HTTP_PROXY")
+    proxies = {"http": proxy, "https": proxy} if proxy else {}
+    headers = {"User-Agent": USER_AGENT}
+    s2_api_key = get_key("S2_API_KEY")
+    if s2_api_key:
+        headers["x-api-key"] = s2_api_key
+    url = f"{S2_API_BASE}{path}"
+    limiter = get_rate_limiter()
+    for attempt in range(S2_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            response = http_session().request(
+                method, url, params=params, json=payload, headers=headers, proxies=proxies, timeout=10
+            )
+        except requests.RequestException as e:
+            # Timeouts and dropped connections are as transient as a 503.
+            if attempt == S2_MAX_RETRIES:
+                print(f"❌ Request failed: {e}")
+                return None, str(e)
+            delay = backoff_delay(attempt, base=1.0, cap=60.0)
+            print(f"⚠️ S2 request failed ({e}). Retrying in {delay:.1f}s... (Attempt {attempt+1}/{S2_MAX_RETRIES+1})")
+            time.sleep(delay)
+            continue
+        if response.status_code == 200:
+            return 200, response.json()
+        if response.status_code not in RETRYABLE_STATUS or attempt == S2_MAX_RETRIES:
+            if response.status_code != 404:
+                print(f"❌ API Error {response.status_code}: {response.text[:200]}")
+            return response.status_code, response.text
+        delay = backoff_delay(attempt, base=1.0, cap=60.0, retry_after=parse_retry_after(response.headers.get("Retry-After")))
+        print(f"⚠️ S2 {response.status_code}. Retrying in {delay:.1f}s... (Attempt {attempt+1}/{S2_MAX_RETRIES+1})")
+        if response.status_code == 429:
+            # Throttling applies to the key (or IP), so every caller backs off together.
+            limiter.pause(delay)
+        else:
+            time.sleep(delay)
+    return None, ""
+
+def _s2_request(method: str, path: str, params: dict | None = None, payload: dict | None = None):
+    """
+    Calls the S2 Graph API, see _s2_call.
+
+    Returns:
+        The decoded JSON, or None on failure.
+    """
+    status, body = _s2_call(method, path, params, payload)
+    return body if status == 200 else None
+
+# Persistent cache: S2 data barely changes week to week and we are limited to ~1 rps.
+S2_CACHE_TTLS = {
+    "search": float(os.getenv("S2_CACHE_TTL_SEARCH", str(7 * 24 * 3600))),
+    "author": float(os.getenv("S2_CACHE_TTL_AUTHOR", str(7 * 24 * 3600))),
+    "negative": float(os.getenv("S2_CACHE_TTL_NEGATIVE", str(24 * 3600))),
+}
+S2_CACHE_MAX_ENTRIES = int(os.getenv("S2_CACHE_MAX_ENTRIES", "50000"))
+_s2_caches = {}
+
+def _s2_cache(kind: str):
+    """Returns the cache for "search", "author" or "negative", or None if caching is disabled."""
+    if os.getenv("S2_CACHE_DISABLED"):
+        return None
+    if kind not in _s2_caches:
+        _s2_caches[kind] = DiskCache(f"s2_{kind}", ttl=S2_CACHE_TTLS[kind], max_entries=S2_CACHE_MAX_ENTRIES)
+    return _s2_caches[kind]
+
+def _normalize_query(query: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", (query or "").lower()).split())
+
+def search_authors(query: str, fields: str, limit: int):
+    """
+    Cached GET /author/search, answered from the local index when one is configured.
+    Empty results are remembered in the negative cache with a shorter TTL.
+
+    Returns:
+        dict: The S2 payload ({"data": [...]}), or None if the request failed.
+    """
+    local = get_local_index()
+    if local is not None:
+        result = local.search_authors(query, fields, limit)
+        if result["data"]:
+            return result
+    key = f"{_normalize_query(query)}|{fields}|{limit}"
+    cache, negative = _s2_cache("search"), _s2_cache("negative")
+    if negative is not None and negative.get(f"search|{key}") is not MISS:
+        return {"data": []}
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not MISS:
+            return hit
+    data = _s2_request("GET", "/author/search", params={"query": query, "fields": fields, "limit": limit})
+    if data is None:
+        # Transport errors are not cached; only real answers are.
+        return None
+    if data.get("data"):
+        if cache is not None:
+            cache.set(key, data)
+    elif negative is not None:
+        negative.set(f"search|{key}", True)
+    return data
+
+def get_authors(author_ids: list, fields: str) -> dict:
+    """
+    Cached author details keyed by (authorId, field set). Only cache misses go
+    to /author/batch; ids S2 does not return are negatively cached. Authors in
+    the local index never reach the cache or the API.
+
+    Returns:
+        dict: authorId -> author record.
+    """
+    local = get_local_index()
+    found = local.get_authors(author_ids, fields) if local is not None else {}
+    author_ids = [a for a in author_ids if a not in found]
+    cache, negative = _s2_cache("author"), _s2_cache("negative")
+    missing = []
+    for author_id in author_ids:
+        key = f"{author_id}|{fields}"
+        if negative is not None and negative.get(f"author|{key}") is not MISS:
+            continue
+        hit = cache.get(key) if cache is not None else MISS
+        if hit is MISS:
+            missing.append(author_id)
+        else:
+            found[author_id] = hit
+    if missing:
+        fetched = fetch_authors_batch(missing, fields)
+        for author_id in missing:
+            key = f"{author_id}|{fields}"
+            if fetched and author_id in fetched:
+                found[author_id] = fetched[author_id]
+                if cache is not None:
+                    cache.set(key, fetched[author_id])
+            elif fetched is not None and negative is not None:
+                # Only trust a miss when the batch call itself succeeded.
+                negative.set(f"author|{key}", True)
+    return found
+
+def fetch_authors_batch(author_ids: list, fields: str) -> dict:
+    """
+    Fetches several authors in one POST /author/batch call.
+
+    Returns:
+        dict: authorId -> author record (authors S2 does not know are omitted),
+        or None if a request failed.
+    """
+    found = {}
+    for start in range(0, len(author_ids), AUTHOR_BATCH_MAX):
+        chunk = author_ids[start:start + AUTHOR_BATCH_MAX]
+        data = _s2_request("POST", "/author/batch", params={"fields": fields}, payload={"ids": chunk})
+        if data is None:
+            return None
+        for author in data:
+            if author and author.get("authorId"):
+                found[author["authorId"]] = author
+    return found
+
+def fetch_papers_batch(paper_ids: list, fields: str) -> dict:
+    """
+    Fetches several papers in one POST /paper/batch call; papers in the local
+    index are answered locally.
+
+    Returns:
+        dict: paperId -> paper record.
+    """
+    local = get_local_index()
+    found = local.get_papers(paper_ids, fields) if local is not None else {}
+    paper_ids = [p for p in paper_ids if p not in found]
+    for start in range(0, len(paper_ids), PAPER_BATCH_MAX):
+        chunk = paper_ids[start:start + PAPER_BATCH_MAX]
+        data = _s2_request("POST", "/paper/batch", params={"fields": fields}, payload={"ids": chunk})
+        for paper in data or []:
+            if paper and paper.get("paperId"):
+                found[paper["paperId"]] = paper
+    return found
+
+_date_filter_supported = True
+
+def _current_year() -> int:
+    return int(time.strftime("%Y"))
+
+def fetch_recent_papers(author_id: str, min_year: int, fields: str = "paperId,title,year,citationCount") -> list:
+    """
+    Papers of an author published in or after `min_year`, from GET /author/{id}/papers.
+
+    The year window is sent to the server (publicationDateOrYear) so old papers
+    are not transferred; if the server rejects the filter, it is applied
+    client-side instead. Pages are requested until the API has no more, or
+    until a page contains only papers older than the window (results come
+    newest first).
+
+    Returns:
+        list: Paper dicts with the requested fields; empty on failure.
+    """
+    global _date_filter_supported
+    local = get_local_index()
+    if local is not None and local.get_authors([author_id], "authorId"):
+        return [{k: v for k, v in p.items() if k in fields.split(",")} for p in local.recent_papers(author_id, min_year)]
+    cache = _s2_cache("author")
+    key = f"recent|{author_id}|{min_year}|{fields}"
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not MISS:
+            return hit
+    papers, offset, complete = [], 0, False
+    use_filter = _date_filter_supported
+    for _ in range(AUTHOR_PAPERS_MAX_PAGES):
+        params = {"fields": fields, "limit": AUTHOR_PAPERS_PAGE, "offset": offset}
+        if use_filter:
+            params["publicationDateOrYear"] = f"{min_year}:"
+        status, page = _s2_call("GET", f"/author/{author_id}/papers", params=params)
+        if status == 400 and use_filter and "publicationDateOrYear" in page:
+            # The endpoint rejects the filter: stop sending it and filter client-side.
+            # Other failures (timeouts, 5xx) say nothing about the filter.
+            use_filter = _date_filter_supported = False
+            params.pop("publicationDateOrYear")
+            status, page = _s2_call("GET", f"/author/{author_id}/papers", params=params)
+        if status != 200:
+            break
+        data = page.get("data") or []
+        recent = [p for p in data if isinstance(p.get("year"), int) and p["year"] >= min_year]
+        papers.extend(recent)
+        dated = [p for p in data if isinstance(p.get("year"), int)]
+        if page.get("next") is None or not data or (dated and not recent):
+            complete = True
+            break
+        offset = page["next"]
+    if complete and cache is not None:
+        cache.set(key, papers)
+    return papers
+
 def search_author_by_name_and_uni(name: str, university: str, keyword: str = None):
     """
     Search for an author using Semantic Scholar Graph API.
-    
+
+    Resolution is done by resolver.Resolver; this keeps the historical return
+    shape (best candidate plus papers and a verification_status).
+
     Args:
         name (str): Name of the author.
         university (str): University or affiliation.
         keyword (str, optional): Academic keyword (e.g., 'Anthropology').
-        
+
     Returns:
         dict: Top 1 author details or None if not found.
     """
-    base_url = "https://api.semanticscholar.org/graph/v1/author/search"
-    
-    # Configure Proxy
-    proxy = os.getenv("HTTP_PROXY")
-    proxies = {}
-    if proxy:
-        proxies = {
-            "http": proxy,
-            "https": proxy
-        }
-    
-    # Configure Headers (API Key)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    s2_api_key = os.getenv("S2_API_KEY")
-    if s2_api_key:
-        headers["x-api-key"] = s2_api_key
-        
-    # Search Fields (Basic Info) - STRICTLY FLAT to avoid API 400
-    search_fields = "authorId,name,affiliations,paperCount,citationCount"
-
-    def _get_author_details(author_id):
-        """Fetch papers for the specific author (Detailed Fields)."""
-        url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}"
-        # Use top-level limit for papers and flattened fields to be safe
-        params = {
-            "fields": "authorId,name,affiliations,papers.title,papers.year,papers.citationCount",
-            "limit": 5
-        }
-        return _make_api_call(url, params)
-
-    def _make_api_call(url, params):
-        # Retry logic for 429
-        max_retries = 3  # Increased retries
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.get(url, params=params, headers=headers, proxies=proxies, timeout=10)
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 429:
-                    # Check if API Key is present
-                    has_api_key = "x-api-key" in headers
-                    wait_time = 1 if has_api_key else 5
-                    print(f"⚠️ 429 Too Many Requests. Retrying in {wait_time} seconds... (Attempt {attempt+1}/{max_retries+1})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"❌ API Error {response.status_code}: {response.text}")
-                    return None
-            except requests.RequestException as e:
-                print(f"❌ Request failed: {e}")
-                return None
+    from resolver import get_resolver
+    resolution = get_resolver().resolve(name, university, keyword=keyword)
+    if not resolution:
         return None
+    if resolution["is_confident_match"]:
+        resolution["verification_status"] = f"verified_by_{resolution['resolved_by']}"
+        print(f"✅ Resolved {resolution['name']} by {resolution['resolved_by']} (score {resolution['score']})")
+    else:
+        resolution["verification_status"] = "needs_manual_check"
+        print(f"⚠️ No confident match. Using best candidate: {resolution['name']}")
+    details = get_authors([resolution["authorId"]], "authorId,name,affiliations,papers.title,papers.year,papers.citationCount")
+    resolution["papers"] = (details.get(resolution["authorId"]) or {}).get("papers") or []
+    return resolution
 
-    selected_author = None
-    verification_status = "needs_manual_check"
-    
-    # Helper for checking match
-    def _check_affiliation_match(author, target_str):
-        if not author or not target_str:
-            return False
-        affs = author.get("affiliations", [])
-        if not affs:
-            return False
-        target_key = target_str.lower()
-        return any(target_key in aff.lower() for aff in affs)
-
-    # Attempt 1: Name + University
-    print(f"🔍 Attempt 1: Searching '{name} {university}'")
-    params_1 = {"query": f"{name} {university}", "fields": search_fields, "limit": 1}
-    result_1 = _make_api_call(base_url, params_1)
-    
-    if result_1 and result_1.get("data"):
-        cand = result_1["data"][0]
-        if _check_affiliation_match(cand, university):
-            selected_author = cand
-            verification_status = "verified_by_query_uni"
-            print(f"✅ Attempt 1 Success: {cand.get('name')} (Affiliation Match)")
-            
-    # Attempt 2: Name + Keyword (if provided and Attempt 1 failed)
-    if not selected_author and keyword:
-        print(f"🔍 Attempt 2: Searching '{name} {keyword}'")
-        params_2 = {"query": f"{name} {keyword}", "fields": search_fields, "limit": 1}
-        result_2 = _make_api_call(base_url, params_2)
-        
-        if result_2 and result_2.get("data"):
-            cand = result_2["data"][0]
-            # If found by keyword search, we trust S2 matched the keyword (in papers or aff).
-            # We also check affiliation for university as a bonus.
-            if _check_affiliation_match(cand, university):
-                 verification_status = "verified_by_query_keyword_uni_match"
-                 print(f"✅ Attempt 2 Success: {cand.get('name')} (Affiliation matches Uni)")
-            else:
-                 verification_status = "verified_by_query_keyword"
-                 print(f"✅ Attempt 2 Success: {cand.get('name')} (Found by Keyword Search)")
-            selected_author = cand
-
-    # Attempt 3: Fallback Name Only + Re-ranking
-    if not selected_author:
-        print(f"⚠️ Attempts 1 & 2 failed. Attempt 3: Fallback to name only '{name}' with Re-ranking")
-        params_3 = {"query": name, "fields": search_fields, "limit": 10}
-        result_3 = _make_api_call(base_url, params_3)
-        
-        if result_3 and result_3.get("data"):
-            candidates = result_3["data"]
-            found_match = False
-            
-            # Manual Re-ranking
-            for cand in candidates:
-                # 1. Check University in Affiliations
-                if _check_affiliation_match(cand, university):
-                    selected_author = cand
-                    verification_status = "verified_by_rerank_uni"
-                    found_match = True
-                    print(f"✅ Re-ranking found match (Uni): {cand.get('name')}")
-                    break
-                
-                # 2. Check Keyword in Affiliations
-                if keyword and _check_affiliation_match(cand, keyword):
-                    selected_author = cand
-                    verification_status = "verified_by_rerank_keyword"
-                    found_match = True
-                    print(f"✅ Re-ranking found match (Keyword in Aff): {cand.get('name')}")
-                    break
-            
-            # If no match found in re-ranking, pick Top 1
-            if not found_match:
-                selected_author = candidates[0]
-                verification_status = "needs_manual_check"
-                print(f"⚠️ No enhanced match in Top 10. Using Top 1: {selected_author.get('name')}")
-
-    # Final Step: Fetch Detailed Info (Papers) for the Locked Author
-    if selected_author:
-        author_id = selected_author['authorId']
-        print(f"📄 Fetching detailed papers for Author ID: {author_id}...")
-        details = _get_author_details(author_id)
-        if details:
-            # Update selected_author with detailed info (especially papers)
-            selected_author.update(details)
-        
-        selected_author["verification_status"] = verification_status
-        return selected_author
-        
-    return None
-
-def search_and_fetch_papers(name: str, uni: str, anchor_papers: list[str] | None = None):
-    base_url = "https://api.semanticscholar.org/graph/v1/author/search"
-    proxy = os.getenv("HTTP_PROXY")
-    proxies = {}
-    if proxy:
-        proxies = {"http": proxy, "https": proxy}
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    s2_api_key = os.getenv("S2_API_KEY")
-    if s2_api_key:
-        headers["x-api-key"] = s2_api_key
-    search_fields = "authorId,name,affiliations,paperCount,citationCount"
-    def _make_api_call(url, params):
-        max_retries = 3
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.get(url, params=params, headers=headers, proxies=proxies, timeout=10)
-                if response.status_code == 200:
-                    return response.json()
-                if response.status_code == 429:
-                    has_api_key = "x-api-key" in headers
-                    wait_time = 1 if has_api_key else 5
-                    time.sleep(wait_time)
-                    continue
-                return None
-            except requests.RequestException:
-                return None
+def prefetch_author(name: str, uni: str):
+    """
+    Starts resolving a person before their profile page is parsed (search plus
+    the first candidate's paper titles). Returns an opaque handle for
+    `search_and_fetch_papers(prefetched=...)`, or None on failure.
+    """
+    from resolver import get_resolver
+    try:
+        return get_resolver().prefetch(name, uni)
+    except Exception as e:
+        print(f"    ⚠️ S2 prefetch failed: {e}")
         return None
-    def _get_author_details(author_id):
-        url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}"
-        params = {
-            "fields": "authorId,name,affiliations,papers.title,papers.year,papers.tldr",
-            "limit": 25
-        }
-        data = _make_api_call(url, params)
-        if not data:
-            params_fallback = {
-                "fields": "authorId,name,affiliations,papers.title,papers.year",
-                "limit": 25
-            }
-            data = _make_api_call(url, params_fallback)
-        return data
-    def _norm(s):
-        if not s:
-            return ""
-        return "".join(ch.lower() for ch in s if ch.isalnum() or ch.isspace())
-    def _affil_fuzzy_match(affs, target):
-        if not affs or not target:
-            return False
-        t = _norm(target)
-        for a in affs:
-            if _norm(a).find(t) != -1:
-                return True
-        return False
-    def _has_anchor_paper(papers, anchors):
-        if not anchors:
-            return False
-        anchors_norm = {a.strip().lower() for a in anchors if isinstance(a, str)}
-        for p in papers or []:
-            title = (p.get("title") or "").strip().lower()
-            if title in anchors_norm:
-                return True
-        return False
+
+def search_and_fetch_papers(name: str, uni: str, anchor_papers: list[str] | None = None, prefetched=None):
+    """
+    Finds the S2 author for a faculty member and returns their recent papers.
+
+    The author is resolved by resolver.Resolver (search, then affiliation or
+    anchor-title evidence, stopping at the first confident stage). Recent
+    papers of the resolved author come from the paginated, year-filtered
+    papers endpoint, and one /paper/batch call fetches tldrs for the papers
+    the summary will use.
+
+    `prefetched` is the handle from `prefetch_author`; it is ignored if the
+    name changed in the meantime (e.g. the profile page spells it differently).
+
+    Returns:
+        dict: {"is_confident_match", "authorId", "name", "affiliations",
+        "resolved_by", "papers"}, or None when no candidate is confident.
+    """
+    from resolver import get_resolver
     try:
-        params = {"query": f"{name} {uni}", "fields": search_fields, "limit": 5}
-        search = _make_api_call(base_url, params)
-        candidates = search.get("data") if search else []
-        locked = None
-        if candidates:
-            for cand in candidates:
-                details = _get_author_details(cand["authorId"])
-                papers = details.get("papers") if details else []
-                if anchor_papers and _has_anchor_paper(papers, anchor_papers):
-                    locked = details
-                    break
-                if not anchor_papers and _affil_fuzzy_match(cand.get("affiliations", []), uni):
-                    locked = details
-                    break
-        if not locked:
+        resolution = get_resolver().resolve(name, uni, anchors=anchor_papers, prefetched=prefetched)
+        if not resolution or not resolution["is_confident_match"]:
             return None
-        year_now = int(time.strftime("%Y"))
-        recent = []
-        for p in locked.get("papers", []):
-            y = p.get("year")
-            if isinstance(y, int) and y >= year_now - 2:
-                recent.append({
-                    "title": p.get("title"),
-                    "year": y,
-                    "tldr": p.get("tldr")
-                })
-        result = {
+        year_now = _current_year()
+        recent = [
+            {"paperId": p.get("paperId"), "title": p.get("title"), "year": p.get("year"),
+             "citationCount": p.get("citationCount"), "tldr": None}
+            for p in fetch_recent_papers(resolution["authorId"], year_now - RECENT_YEARS)
+        ]
+        # tldrs only for the papers that will be summarized, in one request.
+        chosen = {p["paperId"] for p in select_papers(recent, TLDR_TOP_K, year_now) if p["paperId"]}
+        tldrs = fetch_papers_batch(sorted(chosen), "paperId,tldr") if chosen else {}
+        for p in recent:
+            p["tldr"] = (tldrs.get(p["paperId"]) or {}).get("tldr")
+        return {
             "is_confident_match": True,
-            "authorId": locked.get("authorId"),
-            "name": locked.get("name"),
-            "affiliations": locked.get("affiliations"),
-            "papers": recent
+            "authorId": resolution["authorId"],
+            "name": resolution["name"],
+            "affiliations": resolution["affiliations"],
+            "resolved_by": resolution["resolved_by"],
+            "papers": recent,
         }
-        return result
     except Exception:
         return None
+
 if __name__ == "__main__":
     # Test case
     test_name = "Ying Ding"
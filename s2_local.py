@@ -0,0 +1,281 @@
+import os
+import re
+import gzip
+import json
+import sqlite3
+import argparse
+import threading
+
+# Path of the index built by `python s2_local.py ingest`. Unset = always use the live API.
+S2_LOCAL_INDEX = os.getenv("S2_LOCAL_INDEX")
+INGEST_CHUNK = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    authorId TEXT PRIMARY KEY, name TEXT, affiliations TEXT,
+    paperCount INTEGER, citationCount INTEGER);
+CREATE TABLE IF NOT EXISTS papers (
+    paperId TEXT PRIMARY KEY, corpusId TEXT, title TEXT, year INTEGER,
+    citationCount INTEGER, tldr TEXT);
+CREATE TABLE IF NOT EXISTS authorship (authorId TEXT NOT NULL, paperId TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS authors_fts USING fts5(
+    name, affiliations, content='authors', tokenize='unicode61 remove_diacritics 2');
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS papers_corpus ON papers (corpusId);
+CREATE UNIQUE INDEX IF NOT EXISTS authorship_pk ON authorship (authorId, paperId);
+"""
+_FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _first(record: dict, *keys):
+    """Bulk dumps use lowercase keys (authorid), the Graph API camelCase (authorId)."""
+    for key in keys:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+def _detect_kind(record: dict) -> str | None:
+    if "title" in record:
+        return "papers"
+    if "text" in record and ("model" in record or "corpusid" in record):
+        return "tldrs"
+    if "name" in record and _first(record, "authorid", "authorId"):
+        return "authors"
+    return None
+
+def _iter_records(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def _project(record: dict, fields: str, id_key: str) -> dict:
+    """Keeps only the requested fields, like the Graph API does (ids are always returned)."""
+    wanted = set(fields.split(","))
+    return {k: v for k, v in record.items() if k in wanted or k == id_key}
+
+
+class LocalS2Index:
+    """
+    Read-mostly SQLite copy of the S2 bulk datasets (authors, papers, tldrs).
+
+    Answers the subset of the Graph API that s2_client needs -- author search,
+    author details with papers, paper tldrs and recent papers -- in the same
+    JSON shapes, so callers cannot tell it apart from the live API.
+
+    Args:
+        path (str): SQLite file created by `ingest`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.executescript(_INDEXES)
+
+    def close(self):
+        self._conn.close()
+
+    # --- Ingestion ---
+
+    def ingest(self, paths: list, kind: str | None = None) -> dict:
+        """
+        Loads JSONL (optionally .gz) dataset files. The dataset of each file is
+        detected from its first record unless `kind` ("authors", "papers",
+        "tldrs") is given. Re-ingesting a file replaces existing rows.
+
+        Returns:
+            dict: Number of records loaded per dataset.
+        """
+        counts = {"authors": 0, "papers": 0, "tldrs": 0}
+        for path in paths:
+            rows, file_kind = [], kind
+            for record in _iter_records(path):
+                file_kind = file_kind or _detect_kind(record)
+                if file_kind is None:
+                    continue
+                rows.append(record)
+                if len(rows) >= INGEST_CHUNK:
+                    counts[file_kind] += self._load(file_kind, rows)
+                    rows = []
+            if rows:
+                counts[file_kind] += self._load(file_kind, rows)
+        with self._lock:
+            self._conn.execute("INSERT INTO authors_fts(authors_fts) VALUES ('rebuild')")
+            self._conn.execute("ANALYZE")
+            self._conn.commit()
+        return counts
+
+    def _load(self, kind: str, records: list) -> int:
+        with self._lock:
+            if kind == "authors":
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO authors VALUES (?, ?, ?, ?, ?)",
+                    [(
+                        str(_first(r, "authorid", "authorId")), r.get("name"),
+                        json.dumps(r.get("affiliations") or [], ensure_ascii=False),
+                        _first(r, "papercount", "paperCount") or 0,
+                        _first(r, "citationcount", "citationCount") or 0,
+                    ) for r in records],
+                )
+            elif kind == "papers":
+                papers, links = [], []
+                for r in records:
+                    corpus_id = _first(r, "corpusid", "corpusId")
+                    paper_id = str(_first(r, "paperId", "paperid") or corpus_id)
+                    tldr = r.get("tldr")
+                    papers.append((
+                        paper_id, str(corpus_id) if corpus_id is not None else None, r.get("title"),
+                        r.get("year"), _first(r, "citationcount", "citationCount") or 0,
+                        json.dumps(tldr, ensure_ascii=False) if tldr else None,
+                    ))
+                    for author in r.get("authors") or []:
+                        author_id = _first(author, "authorId", "authorid")
+                        if author_id:
+                            links.append((str(author_id), paper_id))
+                self._conn.executemany(
+                    "INSERT INTO papers VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(paperId) DO UPDATE SET"
+                    " corpusId = excluded.corpusId, title = excluded.title, year = excluded.year,"
+                    " citationCount = excluded.citationCount, tldr = COALESCE(excluded.tldr, papers.tldr)",
+                    papers,
+                )
+                self._conn.executemany("INSERT OR IGNORE INTO authorship VALUES (?, ?)", links)
+            elif kind == "tldrs":
+                self._conn.executemany(
+                    "UPDATE papers SET tldr = ? WHERE corpusId = ?",
+                    [(
+                        json.dumps({"model": r.get("model"), "text": r.get("text")}, ensure_ascii=False),
+                        str(_first(r, "corpusid", "corpusId")),
+                    ) for r in records],
+                )
+            self._conn.commit()
+        return len(records)
+
+    # --- Graph API equivalents ---
+
+    def _author_row(self, row) -> dict:
+        author_id, name, affiliations, paper_count, citation_count = row
+        return {
+            "authorId": author_id, "name": name, "affiliations": json.loads(affiliations or "[]"),
+            "paperCount": paper_count, "citationCount": citation_count,
+        }
+
+    def _paper_row(self, row) -> dict:
+        paper_id, title, year, citation_count, tldr = row
+        return {
+            "paperId": paper_id, "title": title, "year": year,
+            "citationCount": citation_count, "tldr": json.loads(tldr) if tldr else None,
+        }
+
+    def search_authors(self, query: str, fields: str, limit: int) -> dict:
+        """
+        Ranked (BM25) author search over names and affiliations, in the
+        /author/search response shape.
+        """
+        tokens = _FTS_TOKEN.findall(query or "")
+        if not tokens:
+            return {"total": 0, "offset": 0, "data": []}
+        match = " OR ".join(f'"{t}"' for t in tokens)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT a.authorId, a.name, a.affiliations, a.paperCount, a.citationCount"
+                " FROM authors_fts JOIN authors a ON a.rowid = authors_fts.rowid"
+                " WHERE authors_fts MATCH ? ORDER BY bm25(authors_fts, 10.0, 1.0), a.paperCount DESC LIMIT ?",
+                (match, int(limit)),
+            ).fetchall()
+        data = [_project(self._author_row(r), fields, "authorId") for r in rows]
+        return {"total": len(data), "offset": 0, "data": data}
+
+    def get_authors(self, author_ids: list, fields: str) -> dict:
+        """
+        Author records (with "papers.*" sub-fields if requested), like /author/batch.
+
+        Returns:
+            dict: authorId -> record, for the ids present in the index.
+        """
+        paper_fields = {f.split(".", 1)[1] for f in fields.split(",") if f.startswith("papers.")}
+        found = {}
+        with self._lock:
+            for author_id in author_ids:
+                row = self._conn.execute(
+                    "SELECT authorId, name, affiliations, paperCount, citationCount FROM authors WHERE authorId = ?",
+                    (str(author_id),),
+                ).fetchone()
+                if row is None:
+                    continue
+                author = _project(self._author_row(row), fields, "authorId")
+                if paper_fields:
+                    papers = self._conn.execute(
+                        "SELECT p.paperId, p.title, p.year, p.citationCount, p.tldr FROM authorship s"
+                        " JOIN papers p ON p.paperId = s.paperId WHERE s.authorId = ?"
+                        " ORDER BY p.year DESC",
+                        (str(author_id),),
+                    ).fetchall()
+                    author["papers"] = [
+                        {k: v for k, v in self._paper_row(p).items() if k in paper_fields} for p in papers
+                    ]
+                found[author["authorId"]] = author
+        return found
+
+    def get_papers(self, paper_ids: list, fields: str) -> dict:
+        """Paper records like /paper/batch. Returns paperId -> record."""
+        found = {}
+        with self._lock:
+            for paper_id in paper_ids:
+                row = self._conn.execute(
+                    "SELECT paperId, title, year, citationCount, tldr FROM papers WHERE paperId = ?",
+                    (str(paper_id),),
+                ).fetchone()
+                if row is not None:
+                    found[row[0]] = _project(self._paper_row(row), fields, "paperId")
+        return found
+
+    def recent_papers(self, author_id: str, min_year: int, limit: int = 100) -> list:
+        """Papers of an author published in or after `min_year`, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.paperId, p.title, p.year, p.citationCount, p.tldr FROM authorship s"
+                " JOIN papers p ON p.paperId = s.paperId WHERE s.authorId = ? AND p.year >= ?"
+                " ORDER BY p.year DESC, p.citationCount DESC LIMIT ?",
+                (str(author_id), int(min_year), int(limit)),
+            ).fetchall()
+        return [self._paper_row(r) for r in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_local_index():
+    """Returns the shared LocalS2Index if S2_LOCAL_INDEX points to an existing file, else None."""
+    global _index
+    if not S2_LOCAL_INDEX or not os.path.exists(S2_LOCAL_INDEX):
+        return None
+    with _index_lock:
+        if _index is None or _index.path != S2_LOCAL_INDEX:
+            _index = LocalS2Index(S2_LOCAL_INDEX)
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a local Semantic Scholar index from bulk dataset files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="Load authors/papers/tldrs JSONL(.gz) files")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--db", default=S2_LOCAL_INDEX or os.path.join(".cache", "s2_local.sqlite"))
+    ingest.add_argument("--kind", choices=["authors", "papers", "tldrs"], help="Dataset type (auto-detected by default)")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    index = LocalS2Index(args.db)
+    print(f"📥 Ingesting {len(args.files)} file(s) into {args.db}...")
+    counts = index.ingest(args.files, args.kind)
+    print(f"✅ Loaded {counts['authors']} authors, {counts['papers']} papers, {counts['tldrs']} tldrs ({len(index)} authors indexed).")
+    print(f"👉 Set S2_LOCAL_INDEX={args.db} to use it.")
@@ -3,15 +3,28 @@ import requests
 import json
 import traceback
 import random
-from bs4 import BeautifulSoup
+import hashlib
 from urllib.parse import urljoin
 from dotenv import load_dotenv
-from scrapegraphai.graphs import SmartScraperGraph
-from utils import clean_html
+from utils import http_session, parse_html, absolutize_links
+from html_pool import clean_page, declared_encoding
+from cache import DiskCache, MISS
+from credentials import get_key
+from extraction import extract_list, extract_object, FACULTY_SCHEMA, PROFILE_SCHEMA, PROFILE_KEYWORD_SCHEMA
 
 # Load environment variables
 load_dotenv()
 
+# Extracted faculty lists, keyed by a hash of the page text: an unchanged page needs no LLM call.
+FACULTY_LIST_CACHE_TTL = float(os.getenv("FACULTY_LIST_CACHE_TTL", str(30 * 24 * 3600)))
+_faculty_list_cache = None
+
+def _get_faculty_list_cache() -> DiskCache:
+    global _faculty_list_cache
+    if _faculty_list_cache is None:
+        _faculty_list_cache = DiskCache("faculty_list", ttl=FACULTY_LIST_CACHE_TTL, max_entries=5000)
+    return _faculty_list_cache
+
 def check_link_reachability(links, sample_size=3):
     """
     Randomly checks a few links to ensure they are reachable (not 404).
@@ -31,10 +44,10 @@ def check_link_reachability(links, sample_size=3):
     for link in sample:
         try:
             # Use HEAD request first, fallback to GET if needed
-            response = requests.head(link, headers=headers, timeout=5)
+            response = http_session().head(link, headers=headers, timeout=5)
             if response.status_code == 404:
                 # Double check with GET in case server blocks HEAD
-                response = requests.get(link, headers=headers, timeout=5)
+                response = http_session().get(link, headers=headers, timeout=5)
                 if response.status_code == 404:
                     print(f"    ❌ Link 404: {link}")
                     failures += 1
@@ -55,10 +68,7 @@ def make_links_absolute(html_content, base_url):
     This helps the LLM see the full URL instead of guessing.
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        for a in soup.find_all('a', href=True):
-            a['href'] = urljoin(base_url, a['href'])
-        return str(soup)
+        return str(absolutize_links(parse_html(html_content), base_url))
     except Exception as e:
         print(f"⚠️ Error in make_links_absolute: {e}")
         return html_content
@@ -95,9 +105,8 @@ def scrape_faculty_list(url: str, url_pattern_hint: str = None):
     }
     
     try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=30)
+        response = http_session().get(url, headers=headers, proxies=proxies, timeout=30)
         response.raise_for_status()
-        html_content = response.text
     except requests.RequestException as e:
         print(f"❌ Error fetching URL: {e}")
         return []
@@ -105,47 +114,27 @@ def scrape_faculty_list(url: str, url_pattern_hint: str = None):
     # Strategy: Absolutize Links BEFORE cleaning
     # This ensures the LLM sees "https://cs.byu.edu/.../chris-archibald" instead of "chris-archibald"
     # which prevents it from hallucinating the path.
-    print("🔗 Pre-processing: Converting relative links to absolute...")
-    html_content = make_links_absolute(html_content, url)
-
-    # 2. Clean (for LLM)
-    print("🧹 Cleaning HTML...")
-    cleaned_text = clean_html(html_content)
+    # 2. Clean (for LLM): absolutizing and cleaning share one parse of the raw bytes, in the HTML pool.
+    print("🧹 Cleaning HTML (links made absolute first)...")
+    cleaned_text = clean_page(response.content, declared_encoding(response), base_url=url)
     # print(f"Cleaned Text Preview:\n{cleaned_text[:500]}...") # Debug preview
 
-    # 3. Parse with SmartScraperGraph
+    # 3. Parse with DeepSeek (JSON mode)
     print("🧠 Parsing with DeepSeek...")
     
-    deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
+    deepseek_api_key = get_key("DEEPSEEK_API_KEY")
     if not deepseek_api_key:
         print("❌ DEEPSEEK_API_KEY not found in .env")
         return []
 
-    # LLM Config for DeepSeek (OpenAI-compatible)
-    llm_config = {
-        "api_key": os.getenv("DEEPSEEK_API_KEY"),
-        "model": "openai/deepseek-chat",
-        "model_name": "deepseek-chat",
-        "base_url": "https://api.deepseek.com",
-    }
-    
-    graph_config = {
-        "llm": llm_config,
-        "verbose": True,
-        "headless": True,
-    }
-
-    # Initialize SmartScraperGraph with error handling
     try:
         if not cleaned_text:
             raise ValueError("Cleaned text is empty")
 
-        # More explicit prompt to force JSON structure
         prompt = """
         You are a data extraction agent.
         Extract a list of faculty members from the text.
         
-        Strictly return a JSON LIST of objects. Do not include any markdown formatting (like ```json).
         Each object must have these keys:
         - "name": Full name of the faculty member.
         - "title": Job title (e.g., Professor, Assistant Professor).
@@ -153,59 +142,27 @@ def scrape_faculty_list(url: str, url_pattern_hint: str = None):
         - "email": Email address if available, else null.
         
         Example Output:
-        [
+        {"items": [
             {"name": "John Doe", "title": "Professor", "profile_link": "/people/john-doe", "email": "john@example.com"},
             {"name": "Jane Smith", "title": "Assistant Professor", "profile_link": "https://example.com/jane", "email": null}
-        ]
+        ]}
         """
 
-        scraper = SmartScraperGraph(
-            prompt=prompt,
-            source=cleaned_text,
-            config=graph_config
-        )
-        
-        result = scraper.run()
+        cache_key = hashlib.sha256(cleaned_text.encode("utf-8")).hexdigest()
+        result = _get_faculty_list_cache().get(cache_key)
+        if result is MISS:
+            # Items are schema-validated; entries without a name are dropped.
+            result = extract_list(prompt, cleaned_text, FACULTY_SCHEMA, required=("name",), usage_source="faculty_list")
+            if result:
+                _get_faculty_list_cache().set(cache_key, result)
+        else:
+            print(f"♻️ Page unchanged since the last run; reusing {len(result)} extracted entries.")
     except Exception as e:
         print(f"❌ Error inside scraper: {e}")
         traceback.print_exc()
         return []
 
     try:
-        # Validate result structure
-        if not isinstance(result, list):
-            # Sometimes LLM returns a dict with a key like "faculty" or "result"
-            if isinstance(result, dict):
-                # Try to find a list value
-                for key, value in result.items():
-                    if isinstance(value, list):
-                        result = value
-                        break
-                else:
-                    # If still dict, maybe it's a single object? Wrap it.
-                    result = [result]
-            else:
-                print(f"⚠️ Unexpected result type: {type(result)}. Content: {result}")
-                return []
-
-        # Double check if list elements are dicts
-        valid_result = []
-        for item in result:
-            if isinstance(item, dict):
-                valid_result.append(item)
-            elif isinstance(item, str):
-                # Try to parse if it's a JSON string
-                try:
-                    parsed = json.loads(item)
-                    if isinstance(parsed, dict):
-                        valid_result.append(parsed)
-                except:
-                    print(f"⚠️ Skipping invalid list item (string): {item[:50]}...")
-            else:
-                print(f"⚠️ Skipping invalid list item type: {type(item)}")
-
-        result = valid_result
-
         # Post-processing: Fix relative URLs
         for person in result:
             link = person.get('profile_link')
@@ -239,7 +196,7 @@ def scrape_faculty_list(url: str, url_pattern_hint: str = None):
                     
         return result
     except Exception as e:
-        print(f"❌ Error during graph execution: {e}")
+        print(f"❌ Error during post-processing: {e}")
         traceback.print_exc()
         return []
 
@@ -269,13 +226,36 @@ def scrape_profile_details(url: str):
     }
     
     try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=15)
+        response = http_session().get(url, headers=headers, proxies=proxies, timeout=15)
         response.raise_for_status()
-        html_content = response.text
     except requests.RequestException as e:
         print(f"    ❌ Error fetching profile: {e}")
         return {"search_keyword": None, "bio_summary": None}
 
+    # 2. Clean
+    cleaned_text = clean_page(response.content, declared_encoding(response))
+    # Truncate if too long to save tokens, but keep enough for bio
+    cleaned_text = cleaned_text[:15000] 
+
+    # 3. Parse with DeepSeek
+    deepseek_api_key = get_key("DEEPSEEK_API_KEY")
+    if not deepseek_api_key:
+        return {"search_keyword": None, "bio_summary": None}
+
+    # Precise prompt for keyword and bio
+    prompt = """
+    Analyze the profile text. 
+    1. Extract ONE specific academic discipline keyword in English (e.g., 'Anthropology', 'Computer Science', 'Bioinformatics'). 
+    2. Extract a very brief bio summary (max 50 words).
+    Return JSON: {"search_keyword": "...", "bio_summary": "..."}
+    """
+
+    try:
+        return extract_object(prompt, cleaned_text, PROFILE_KEYWORD_SCHEMA, usage_source="profile", max_tokens=512)
+    except Exception as e:
+        print(f"    ❌ Error analyzing profile: {e}")
+        return {"search_keyword": None, "bio_summary": None}
+
 def get_profile_data(url: str):
     print(f"    🔍 Scraping profile content: {url}")
     proxy = os.getenv("HTTP_PROXY")
@@ -286,29 +266,17 @@ def get_profile_data(url: str):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=15)
+        response = http_session().get(url, headers=headers, proxies=proxies, timeout=15)
         response.raise_for_status()
-        html_content = response.text
     except requests.RequestException:
         return {"name": None, "bio_text": None, "email": None, "research_interests": [], "recent_paper_titles": []}
-    cleaned_text = clean_html(html_content)
+    cleaned_text = clean_page(response.content, declared_encoding(response))
     cleaned_text = cleaned_text[:15000]
-    deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
+    deepseek_api_key = get_key("DEEPSEEK_API_KEY")
     if not deepseek_api_key:
         name = None
         bio_text = cleaned_text
         return {"name": name, "bio_text": bio_text, "email": None, "research_interests": [], "recent_paper_titles": []}
-    graph_config = {
-        "llm": {
-            "api_key": deepseek_api_key,
-            "model": "openai/deepseek-chat",
-            "model_name": "deepseek-chat",
-            "base_url": "https://api.deepseek.com",
-            "openai_api_base": "https://api.deepseek.com",
-        },
-        "verbose": False,
-        "headless": True,
-    }
     prompt = """
     Extract a JSON object with keys:
     - "name": inferred person name if present, else null
@@ -318,99 +286,18 @@ def get_profile_data(url: str):
     - "recent_paper_titles": up to 2 publication titles if a Publications or Selected Works section exists, else empty list
     Return only JSON.
     """
-    scraper = SmartScraperGraph(prompt=prompt, source=cleaned_text, config=graph_config)
     try:
-        result = scraper.run()
-        if isinstance(result, dict):
-            name = result.get("name")
-            bio_text = result.get("bio_text")
-            email = result.get("email")
-            interests = result.get("research_interests") or []
-            recent = result.get("recent_paper_titles") or []
-            if not bio_text:
-                bio_text = cleaned_text
-            if not isinstance(recent, list):
-                recent = []
-            if not isinstance(interests, list):
-                interests = []
-            return {
-                "name": name, 
-                "bio_text": bio_text, 
-                "email": email,
-                "research_interests": interests,
-                "recent_paper_titles": recent[:2]
-            }
-        if isinstance(result, list) and len(result) > 0 and isinstance(result[0], dict):
-            obj = result[0]
-            name = obj.get("name")
-            bio_text = obj.get("bio_text") or cleaned_text
-            email = obj.get("email")
-            interests = obj.get("research_interests") or []
-            recent = obj.get("recent_paper_titles") or []
-            if not isinstance(recent, list):
-                recent = []
-            if not isinstance(interests, list):
-                interests = []
-            return {
-                "name": name, 
-                "bio_text": bio_text, 
-                "email": email,
-                "research_interests": interests,
-                "recent_paper_titles": recent[:2]
-            }
-        return {"name": None, "bio_text": cleaned_text, "email": None, "research_interests": [], "recent_paper_titles": []}
+        result = extract_object(prompt, cleaned_text, PROFILE_SCHEMA, usage_source="profile", max_tokens=4096)
     except Exception:
         return {"name": None, "bio_text": cleaned_text, "email": None, "research_interests": [], "recent_paper_titles": []}
-
-    # 2. Clean
-    cleaned_text = clean_html(html_content)
-    # Truncate if too long to save tokens, but keep enough for bio
-    cleaned_text = cleaned_text[:15000] 
-
-    # 3. Parse with DeepSeek
-    deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-    if not deepseek_api_key:
-        return {"search_keyword": None, "bio_summary": None}
-
-    graph_config = {
-        "llm": {
-            "api_key": deepseek_api_key,
-            "model": "openai/deepseek-chat",
-            "model_name": "deepseek-chat",
-            "base_url": "https://api.deepseek.com",
-            "openai_api_base": "https://api.deepseek.com",
-        },
-        "verbose": False, # Reduce noise
-        "headless": True,
+    return {
+        "name": result["name"],
+        "bio_text": result["bio_text"] or cleaned_text,
+        "email": result["email"],
+        "research_interests": result["research_interests"],
+        "recent_paper_titles": result["recent_paper_titles"][:2]
     }
 
-    # Precise prompt for keyword and bio
-    prompt = """
-    Analyze the profile text. 
-    1. Extract ONE specific academic discipline keyword in English (e.g., 'Anthropology', 'Computer Science', 'Bioinformatics'). 
-    2. Extract a very brief bio summary (max 50 words).
-    Return JSON: {"search_keyword": "...", "bio_summary": "..."}
-    """
-
-    scraper = SmartScraperGraph(
-        prompt=prompt,
-        source=cleaned_text,
-        config=graph_config
-    )
-
-    try:
-        result = scraper.run()
-        # Ensure result is dict
-        if isinstance(result, dict):
-            return result
-        # Sometimes list is returned if prompt implies list
-        if isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return {"search_keyword": None, "bio_summary": None}
-    except Exception as e:
-        print(f"    ❌ Error analyzing profile: {e}")
-        return {"search_keyword": None, "bio_summary": None}
-
 if __name__ == "__main__":
     # Test URL
     test_url = "https://ischool.utexas.edu/people/faculty-staff-students/full-time-faculty"
@@ -0,0 +1,364 @@
+import os
+import re
+import time
+import sqlite3
+import argparse
+import threading
+from result_store import ResultStore, slugify, research_summaries, PLACEHOLDER_SOURCES
+
+SEARCH_INDEX_PATH = os.getenv("SCHOLARSCOUT_SEARCH_INDEX", os.path.join(".cache", "search.sqlite"))
+# BM25 column weights: name, keywords, summaries. Keywords are the densest signal.
+BM25_WEIGHTS = (2.0, 3.0, 1.0)
+# Matches ranked per query at most; broader queries rank the most recently indexed ones.
+SEARCH_CANDIDATES = int(os.getenv("SCHOLARSCOUT_SEARCH_CANDIDATES", "10000"))
+
+# Bump when the FTS table changes; older index files are re-indexed on open.
+SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS faculty (
+    id INTEGER PRIMARY KEY, university_slug TEXT NOT NULL, person_key TEXT NOT NULL,
+    university TEXT, run_id TEXT, name TEXT, title TEXT, email TEXT, profile_link TEXT,
+    data_source TEXT, keywords TEXT, summary TEXT,
+    UNIQUE (university_slug, person_key));
+CREATE INDEX IF NOT EXISTS faculty_source ON faculty (data_source);
+CREATE TABLE IF NOT EXISTS synced_runs (run_id TEXT PRIMARY KEY, rows INTEGER, status TEXT);
+"""
+# The FTS table keeps its own copy of the text, segmented by _segment (see there),
+# so it cannot use faculty as external content; add() keeps the two in step. The
+# title and facets (university, Data_Source) columns only serve the search filters:
+# matching them in the FTS query is much cheaper than joining faculty per match.
+_FTS_SCHEMA = """
+DROP TRIGGER IF EXISTS faculty_ai;
+DROP TRIGGER IF EXISTS faculty_ad;
+DROP TRIGGER IF EXISTS faculty_au;
+DROP TABLE IF EXISTS faculty_fts;
+CREATE VIRTUAL TABLE faculty_fts USING fts5(
+    name, keywords, summary, title, facets, tokenize='unicode61 remove_diacritics 2', prefix='3');
+"""
+# Chinese, Japanese and Korean characters: unicode61 would keep a whole run as one "word".
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_GAP = re.compile(rf"(?<=[{_CJK}])(?=[{_CJK}\w])|(?<=\w)(?=[{_CJK}])")
+_WORD = re.compile(r"\w+", re.UNICODE)
+_QUERY_TOKEN = re.compile(r'"([^"]+)"|(\w+)(\*?)', re.UNICODE)
+
+
+def _segment(text: str) -> str:
+    """
+    Puts a space between CJK characters (and between them and adjacent words),
+    so the tokenizer indexes every character. A query word then becomes a phrase
+    of consecutive characters: 联邦学习 finds 研究联邦学习与隐私, as a substring would.
+    """
+    return _CJK_GAP.sub(" ", text)
+
+def _unsegment(snippet: str, highlight=("", "")) -> str:
+    """Removes the spaces _segment put between CJK characters, also around highlight markers."""
+    start, end = (re.escape(m) for m in highlight)
+    gap = rf"(?<=[{_CJK}]) (?=[{_CJK}])"
+    if start:
+        gap += rf"|(?<=[{_CJK}]) (?={start}[{_CJK}])"
+    if end:
+        gap += rf"|(?<=[{_CJK}]{end}) (?=[{_CJK}])"
+    return re.sub(gap, "", snippet)
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word (or "quoted phrase") must
+    occur; a trailing * keeps prefix search (e.g. robot*).
+    """
+    terms = []
+    for phrase, word, star in _QUERY_TOKEN.findall(text or ""):
+        if phrase:
+            terms.append(f'"{_segment(phrase)}"')
+        elif word:
+            terms.append(f'"{_segment(word)}"{star}')
+    return " ".join(terms)
+
+def _facet(kind: str, value: str) -> str:
+    """One FTS token per university slug / Data_Source value (hex, so the tokenizer keeps it whole)."""
+    return kind + value.encode("utf-8").hex()
+
+def _fts_columns(name, keywords, summary, title, slug, source) -> tuple:
+    """faculty_fts values for one faculty row."""
+    if source in PLACEHOLDER_SOURCES:
+        summary = ""  # rows indexed before placeholder summaries were left out
+    return (_segment(name or ""), _segment(keywords or ""), _segment(summary or ""), _segment(title or ""),
+            f"{_facet('u', slug)} {_facet('s', source or '')}")
+
+def _summary_text(row: dict) -> str:
+    """The row's summaries (not the placeholder text of rows without one)."""
+    return "\n".join(research_summaries(row))
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+class SearchIndex:
+    """
+    Full-text index (SQLite FTS5, BM25) over the faculty rows of the result store.
+
+    Holds one row per person and university -- the most recent run wins -- so
+    the same professor scraped twice is found once. `sync()` feeds it from the
+    result store incrementally (only rows not indexed yet are read).
+
+    Args:
+        path (str): SQLite file (SCHOLARSCOUT_SEARCH_INDEX, default .cache/search.sqlite).
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or SEARCH_INDEX_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._rebuild_fts()
+
+    def _rebuild_fts(self):
+        """(Re)creates the FTS table from the faculty rows, for new and older index files."""
+        with self._conn:
+            self._conn.executescript(_FTS_SCHEMA)
+            self._conn.executemany(
+                "INSERT INTO faculty_fts (rowid, name, keywords, summary, title, facets) VALUES (?, ?, ?, ?, ?, ?)",
+                ((r[0], *_fts_columns(*r[1:])) for r in self._conn.execute(
+                    "SELECT id, name, keywords, summary, title, university_slug, data_source FROM faculty").fetchall()),
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def add(self, rows, university: str, run_id: str = "") -> int:
+        """Indexes result rows of one university, replacing earlier rows of the same people."""
+        records = []
+        for row in rows:
+            name = _text(row.get("Name")).strip()
+            link = _text(row.get("Profile_Link")).strip()
+            if not name and not link:
+                continue
+            records.append((
+                slugify(university).lower(), link or name.lower(), university, run_id, name,
+                _text(row.get("Title")), _text(row.get("Email")), link, _text(row.get("Data_Source")),
+                _text(row.get("Research_Keywords")), _summary_text(row),
+            ))
+        with self._lock:
+            for record in records:
+                row_id = self._conn.execute(
+                    "INSERT INTO faculty (university_slug, person_key, university, run_id, name, title, email,"
+                    " profile_link, data_source, keywords, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (university_slug, person_key) DO UPDATE SET university = excluded.university,"
+                    " run_id = excluded.run_id, name = excluded.name, title = excluded.title, email = excluded.email,"
+                    " profile_link = excluded.profile_link, data_source = excluded.data_source,"
+                    " keywords = excluded.keywords, summary = excluded.summary RETURNING id",
+                    record,
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM faculty_fts WHERE rowid = ?", (row_id,))
+                slug, _, _, _, name, title, _, _, source, keywords, summary = record
+                self._conn.execute(
+                    "INSERT INTO faculty_fts (rowid, name, keywords, summary, title, facets) VALUES (?, ?, ?, ?, ?, ?)",
+                    (row_id, *_fts_columns(name, keywords, summary, title, slug, source)),
+                )
+            self._conn.commit()
+        return len(records)
+
+    def sync(self, store: ResultStore | None = None) -> int:
+        """
+        Indexes the result-store rows added since the last sync (runs oldest
+        first, so the latest run of a university wins). Cheap when nothing changed.
+
+        Returns:
+            int: Rows indexed.
+        """
+        store = store or ResultStore()
+        with self._lock:
+            synced = {r["run_id"]: (r["rows"], r["status"])
+                      for r in self._conn.execute("SELECT run_id, rows, status FROM synced_runs")}
+        added = 0
+        for run, rows in store.new_rows(synced):
+            added += self.add(rows, run.get("university") or "", run["run_id"])
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO synced_runs VALUES (?, ?, ?)",
+                                   (run["run_id"], *synced[run["run_id"]]))
+                self._conn.commit()
+        return added
+
+    def search(self, query: str, universities=None, title: str | None = None, sources=None,
+               limit: int = 20, highlight=("**", "**")) -> list:
+        """
+        BM25-ranked faculty matching `query` (every term must occur in the
+        name, keywords or summaries). When more than SEARCH_CANDIDATES rows
+        match, only the most recently indexed of them are ranked.
+
+        Args:
+            query (str): Free text; "quoted phrases" and prefix* are supported.
+            universities (list, optional): University names to keep (case-insensitive).
+            title (str, optional): Substring of the job title, e.g. "Assistant".
+            sources (list, optional): Data_Source values to keep, e.g. ["S2_Verified"].
+            limit (int): Maximum number of hits.
+            highlight (tuple): Markers around matched terms in the snippet.
+
+        Returns:
+            list: Dicts with the result columns plus "University", "Score" and "Snippet", best first.
+        """
+        terms = fts_query(query)
+        if not terms:
+            return []
+        match = terms
+        # Filters are FTS terms on the title/facets columns (weight 0, so they do not
+        # change the score). Rank on the FTS table alone, then load rows and build
+        # snippets for the hits (from the query terms only): snippet() is costly.
+        if universities:
+            slugs = " OR ".join(f'"{_facet("u", slugify(u).lower())}"' for u in universities)
+            match = f"({match}) AND facets : ({slugs})"
+        if title and _WORD.search(title):
+            words = " ".join(f'"{_segment(w)}"*' for w in _WORD.findall(title))
+            match = f"({match}) AND title : ({words})"
+        if sources:
+            values = " OR ".join(f'"{_facet("s", s)}"' for s in sources)
+            match = f"({match}) AND facets : ({values})"
+        with self._lock:
+            # bm25() scores every match before the sort (~2 µs each), so a very broad
+            # query only ranks its SEARCH_CANDIDATES most recently indexed matches.
+            cutoff = self._conn.execute(
+                "SELECT rowid FROM faculty_fts WHERE faculty_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (match, SEARCH_CANDIDATES - 1),
+            ).fetchone()
+            ranked = self._conn.execute(
+                "SELECT rowid, bm25(faculty_fts, ?, ?, ?, 0, 0) AS score FROM faculty_fts"
+                " WHERE faculty_fts MATCH ? AND rowid >= ? ORDER BY score LIMIT ?",
+                (*BM25_WEIGHTS, match, cutoff[0] if cutoff else 0, int(limit)),
+            ).fetchall()
+            if not ranked:
+                return []
+            ids = [r[0] for r in ranked]
+            marks = ", ".join("?" * len(ids))
+            rows = {r["id"]: r for r in self._conn.execute(f"SELECT * FROM faculty WHERE id IN ({marks})", ids)}
+            # Looking rows up by rowid re-expands a prefix* term for every hit; with one
+            # in the query, a single pass over the matches from the lowest hit on is cheaper.
+            seek = "+rowid" if "*" in terms else "rowid"
+            snippets = dict(self._conn.execute(
+                f"SELECT rowid, snippet(faculty_fts, 2, ?, ?, '…', 16) FROM faculty_fts"
+                f" WHERE faculty_fts MATCH ? AND rowid >= ? AND {seek} IN ({marks})",
+                (*highlight, terms, min(ids), *ids),
+            ).fetchall())
+        hits = []
+        for row_id, score in ranked:
+            r = rows[row_id]
+            hits.append({
+                "Name": r["name"], "Title": r["title"], "Email": r["email"], "Profile_Link": r["profile_link"],
+                "Data_Source": r["data_source"], "Research_Keywords": r["keywords"], "University": r["university"],
+                # bm25() is lower-is-better; flip it so larger means more relevant.
+                "Score": round(-score, 3), "Snippet": _unsegment(snippets.get(row_id, ""), highlight),
+                "_run_id": r["run_id"],
+            })
+        return hits
+
+    def universities(self) -> list:
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT university FROM faculty GROUP BY university_slug ORDER BY university")]
+
+    def sources(self) -> list:
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT data_source FROM faculty WHERE data_source != '' ORDER BY data_source")]
+
+    def optimize(self):
+        """Merges the FTS segments; worth running after large imports."""
+        with self._lock:
+            self._conn.execute("INSERT INTO faculty_fts (faculty_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index() -> SearchIndex:
+    """Shared SearchIndex at SEARCH_INDEX_PATH."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.path != SEARCH_INDEX_PATH:
+            _index = SearchIndex(SEARCH_INDEX_PATH)
+        return _index
+
+def sync_search_index():
+    """Feeds new result-store rows to the search index. Never fails the caller's run."""
+    try:
+        added = get_search_index().sync()
+        if added:
+            print(f"🔎 Indexed {added} rows for search.")
+    except Exception as e:
+        print(f"⚠️ Search index sync failed: {e}")
+
+
+def _benchmark(path: str, rows: int, queries: list):
+    """Fills a scratch index with synthetic faculty and times the queries."""
+    import random
+    random.seed(0)
+    topics = ("learning federated robots vision language privacy systems networks graph quantum security"
+              " human interaction health causal inference optimization databases compilers climate").split()
+    # Zipf-like vocabulary, so common and rare terms behave as in real summaries.
+    vocabulary = [f"term{i}" for i in range(5000)]
+    for rank, topic in enumerate(topics):
+        vocabulary.insert(rank * 40, topic)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    index = SearchIndex(path)
+    if len(index) < rows:
+        batch = []
+        for i in range(len(index), rows):
+            batch.append({
+                "Name": f"Person {i}", "Title": random.choice(["Professor", "Assistant Professor", "Lecturer"]),
+                "Profile_Link": f"https://u{i // 5000}.edu/p/{i}", "Data_Source": random.choice(["S2_Verified", "Web_Bio"]),
+                "Research_Keywords": ", ".join(random.sample(topics, 3)),
+                "Research_Summary": " ".join(random.choices(vocabulary, weights, k=60)),
+            })
+            if len(batch) == 5000 or i == rows - 1:
+                index.add(batch, f"University {i // 5000}")
+                batch = []
+        index.optimize()
+    for query in queries:
+        for filters in ({}, {"sources": ["S2_Verified"], "title": "Assistant"}, {"universities": ["University 7"]}):
+            start = time.perf_counter()
+            hits = index.search(query, **filters)
+            print(f"{(time.perf_counter() - start) * 1000:7.1f} ms  {len(hits):>3} hits  {query!r} {filters}")
+    index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search over collected faculty results.")
+    parser.add_argument("--db", default=SEARCH_INDEX_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="Index new rows from the result store")
+    query = sub.add_parser("query", help="Search the index")
+    query.add_argument("text")
+    query.add_argument("--university", action="append")
+    query.add_argument("--title")
+    query.add_argument("--source", action="append", help="Data_Source to keep, e.g. S2_Verified")
+    query.add_argument("--limit", type=int, default=20)
+    bench = sub.add_parser("bench", help="Time queries against a synthetic index")
+    bench.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        _benchmark(args.db, args.rows, ["learning", "federated learning", "robot*", '"human interaction" privacy'])
+        raise SystemExit(0)
+    index = SearchIndex(args.db)
+    if args.command == "sync":
+        print(f"✅ Indexed {index.sync()} new rows ({len(index)} faculty in the index).")
+    else:
+        index.sync()
+        hits = index.search(args.text, args.university, args.title, args.source, args.limit, highlight=("[", "]"))
+        for hit in hits:
+            print(f"{hit['Score']:6.2f}  {hit['Name']} ({hit['Title']}, {hit['University']}) [{hit['Data_Source']}]")
+            print(f"        {hit['Snippet']}")
+        if not hits:
+            print("🔍 No matches.")
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from jobs import JobRunner, ACTIVE
+
+SERVICE_HOST = os.getenv("SCHOLARSCOUT_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SCHOLARSCOUT_SERVICE_PORT", "8765"))
+SERVICE_WORKERS = int(os.getenv("SCHOLARSCOUT_SERVICE_WORKERS", "2"))
+# How often a streaming /rows request checks for new rows.
+STREAM_POLL_INTERVAL = 0.5
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    JSON API over a JobRunner:
+
+        GET  /health                      uptime and job counts
+        POST /jobs                        {"url", "university", "languages"?, "language"?, "url_pattern_hint"?, "force"?}
+        GET  /jobs                        recent jobs
+        GET  /jobs/<id>                   status and progress
+        GET  /jobs/<id>/rows?offset=N     rows produced so far (JSON)
+        GET  /jobs/<id>/rows?stream=1     rows as NDJSON, one per line, until the job ends
+        POST /jobs/<id>/cancel
+    """
+    server_version = "ScholarScout"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        url = urlparse(self.path)
+        return [p for p in url.path.split("/") if p], {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+    def _int_param(self, query: dict, name: str, default: int):
+        """A non-negative integer query parameter; None (after sending a 400) if it is not one."""
+        try:
+            value = int(query.get(name, default))
+        except ValueError:
+            value = -1
+        if value < 0:
+            self._send(400, {"error": f"'{name}' must be a non-negative integer"})
+            return None
+        return value
+
+    def do_GET(self):
+        parts, query = self._route()
+        runner = self.server.runner
+        if parts == ["health"]:
+            jobs = runner.list(limit=1000)
+            return self._send(200, {
+                "status": "ok", "uptime": round(time.time() - self.server.started_at, 1),
+                "active_jobs": sum(j["status"] in ACTIVE for j in jobs), "jobs": len(jobs),
+            })
+        if parts == ["jobs"]:
+            limit = self._int_param(query, "limit", 20)
+            if limit is not None:
+                self._send(200, runner.list(limit=limit))
+            return
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = runner.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"Unknown job {parts[1]}"})
+            if len(parts) == 2:
+                return self._send(200, job)
+            if parts[2:] == ["rows"]:
+                offset = self._int_param(query, "offset", 0)
+                if offset is None:
+                    return
+                if query.get("stream") in ("1", "true"):
+                    return self._stream_rows(job["id"], offset)
+                rows = runner.results(job["id"], offset)
+                return self._send(200, {"status": job["status"], "offset": offset, "rows": rows})
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parts, _ = self._route()
+        runner = self.server.runner
+        if parts == ["jobs"]:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "Body must be JSON"})
+            if not isinstance(params, dict):
+                return self._send(400, {"error": "Body must be a JSON object"})
+            if not all(isinstance(params.get(k), str) and params[k].strip() for k in ("url", "university")):
+                return self._send(400, {"error": "'url' and 'university' are required"})
+            before = {j["id"] for j in runner.list(limit=1000)}
+            job_id = runner.submit(
+                params["url"], params["university"], languages=params.get("languages"),
+                language=params.get("language", "zh"), url_pattern_hint=params.get("url_pattern_hint"),
+                force=bool(params.get("force")),
+            )
+            return self._send(202, {"id": job_id, "reused": job_id in before, "job": runner.get(job_id)})
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            if runner.get(parts[1]) is None:
+                return self._send(404, {"error": f"Unknown job {parts[1]}"})
+            runner.cancel(parts[1])
+            return self._send(200, runner.get(parts[1]))
+        self._send(404, {"error": "Not found"})
+
+    def _stream_rows(self, job_id: str, offset: int):
+        """Writes rows as NDJSON while the job runs; the response ends when the job does."""
+        runner = self.server.runner
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = offset
+        try:
+            while True:
+                # Read the status first, so rows written just before the job ended are not missed.
+                job = runner.get(job_id)
+                # Only the rows not sent yet are read, so each poll costs the new rows, not the whole run.
+                rows = runner.results(job_id, sent)
+                for row in rows:
+                    self.wfile.write((json.dumps(row, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                sent += len(rows)
+                self.wfile.flush()
+                if job["status"] not in ACTIVE:
+                    break
+                time.sleep(STREAM_POLL_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+class ScholarScoutService(ThreadingHTTPServer):
+    """
+    Long-lived local service: one process runs every job in worker threads, so
+    imports, HTTP connection pools, the S2/LLM/faculty-list caches and the LLM
+    clients stay warm from one department to the next.
+
+    Args:
+        address (tuple): (host, port); port 0 picks a free port.
+        runner (JobRunner, optional): Defaults to an in-process (thread) runner.
+        verbose (bool): Log every request.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=(SERVICE_HOST, SERVICE_PORT), runner=None, verbose: bool = False):
+        self.runner = runner or JobRunner(max_workers=SERVICE_WORKERS, use_processes=False)
+        self.verbose = verbose
+        self.started_at = time.time()
+        super().__init__(address, ServiceHandler)
+
+    def start(self) -> threading.Thread:
+        """Serves in a background thread (for scripts and tests)."""
+        thread = threading.Thread(target=self.serve_forever, name="scholarscout-service", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.runner.shutdown(wait=False)
+
+
+def warm_up():
+    """Loads the pipeline (and the LLM client, which imports openai) up front, so the first job does not pay for it."""
+    import main  # noqa: F401
+    import llm_engine
+    if os.getenv("DEEPSEEK_API_KEY"):
+        llm_engine.get_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ScholarScout as a local HTTP/JSON service.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Concurrent jobs")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    warm_up()
+    service = ScholarScoutService((args.host, args.port), JobRunner(max_workers=args.workers, use_processes=False),
+                                  verbose=args.verbose)
+    print(f"🛰️ ScholarScout service on http://{args.host}:{service.server_port} ({args.workers} workers)")
+    print(f"👉 curl -X POST localhost:{service.server_port}/jobs -d '{{\"url\": \"...\", \"university\": \"...\"}}'")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping service...")
+    finally:
+        service.server_close()
+        service.runner.shutdown(wait=False)
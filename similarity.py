@@ -0,0 +1,477 @@
+import os
+import re
+import sys
+import json
+import zlib
+import uuid
+import shutil
+import argparse
+import threading
+from contextlib import contextmanager
+import numpy as np
+from scipy import sparse
+from result_store import ResultStore, slugify, research_summaries
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one writer at a time is up to the user.
+    fcntl = None
+
+SIMILARITY_INDEX_DIR = os.getenv("SCHOLARSCOUT_SIMILARITY_DIR", os.path.join(".cache", "similarity"))
+# Hashed feature space: no vocabulary to store or grow, collisions are rare at this size.
+N_FEATURES = 2 ** 20
+# Segments are merged (and replaced rows dropped) once there are more than this many.
+MAX_SEGMENTS = 8
+# Relative weight of each field in a person's vector.
+FIELD_WEIGHTS = {"keywords": 2.0, "summary": 1.0, "titles": 1.0}
+
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+_CJK = re.compile(r"[㐀-鿿]+")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the their this to was were with
+we our they his her he she also such using use based new via research work works focuses focus studies
+""".split())
+
+
+def _tokens(text: str) -> list:
+    """Lower-cased words and word bigrams; CJK runs become character bigrams."""
+    words = [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS and not _CJK.match(w)]
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for run in _CJK.findall(text):
+        tokens += [run[i:i + 2] for i in range(max(1, len(run) - 1))]
+    return tokens
+
+def vectorize(fields: dict, n_features: int = N_FEATURES):
+    """
+    Hashed term-frequency vector of a person's text fields.
+
+    Args:
+        fields (dict): FIELD_WEIGHTS key -> text.
+
+    Returns:
+        tuple: (sorted feature indices, log-scaled weights), both numpy arrays.
+    """
+    counts = {}
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        for token in _tokens(text or ""):
+            h = zlib.crc32(token.encode("utf-8")) % n_features
+            counts[h] = counts.get(h, 0.0) + weight
+    indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+    values = np.log1p(np.array([counts[i] for i in indices], dtype=np.float32))
+    return indices, values
+
+def row_fields(row: dict) -> dict:
+    """The text of a result row that describes the person's research (placeholder summaries left out)."""
+    titles = row.get("S2_Paper_Titles") or []
+    return {
+        "keywords": _text(row.get("Research_Keywords")),
+        "summary": "\n".join(research_summaries(row)),
+        "titles": "\n".join(str(t) for t in titles) if isinstance(titles, list) else str(titles),
+    }
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+class SimilarityIndex:
+    """
+    "Find similar faculty": TF-IDF cosine similarity over hashed word and
+    bigram features, entirely offline (NumPy/SciPy, no embedding API).
+
+    Term frequencies are stored per document; IDF is applied at query time,
+    so adding people never rewrites existing vectors. New rows go to an
+    in-memory segment; `save()` writes it as an immutable CSR segment of .npy
+    files, which `load` memory-maps. A person scraped again replaces their
+    earlier row (the old one is masked until `compact()` drops it).
+
+    Several processes may share the directory (job workers, the CLI, the task
+    queue): writes take an exclusive file lock and first reload whatever
+    another process saved, and every instance reloads a changed manifest
+    before answering a query.
+
+    Args:
+        path (str): Index directory (SCHOLARSCOUT_SIMILARITY_DIR, default .cache/similarity).
+        mmap (bool): Memory-map saved segments instead of reading them into memory.
+    """
+
+    def __init__(self, path: str | None = None, mmap: bool = True, n_features: int = N_FEATURES):
+        self.path = path or SIMILARITY_INDEX_DIR
+        self.n_features = n_features
+        self._mmap = mmap
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._reset()
+        self._refresh()
+
+    # --- Persistence ---
+
+    def _reset(self):
+        self.docs = []            # per row: {"key", "Name", "Title", "University", ...}
+        self.dead = set()         # rows replaced by a newer version
+        self.synced = {}          # result-store run_id -> (rows seen, status)
+        self.df = np.zeros(self.n_features, dtype=np.int32)
+        self._segments = []       # [(name, csr_matrix)]
+        self._pending = []        # [(indices, values)] not yet saved
+        self._by_key = {}
+        self._norms = None
+        self._columns = None
+        self._loaded = None       # manifest file signature this state was read from (or written as)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        """
+        Cross-process lock on the index directory. Re-entrant within this
+        instance (callers hold self._lock), so save() inside sync() is fine.
+        """
+        if fcntl is None or self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _signature(self):
+        try:
+            st = os.stat(os.path.join(self.path, "manifest.json"))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        """Reloads the index if another process saved it since this instance last read or wrote it."""
+        if self._signature() == self._loaded:
+            return
+        start = len(self.docs) - len(self._pending)
+        pending = list(zip(self.docs[start:], self._pending))
+        with self._file_lock(exclusive=False):
+            self._reset()
+            self._load()
+        # Rows added here but not saved yet go on top of the fresh state.
+        for doc, (indices, values) in pending:
+            self._append(doc, indices, values)
+
+    def _load(self):
+        self._loaded = self._signature()
+        if self._loaded is None:
+            return
+        with open(os.path.join(self.path, "manifest.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.n_features = meta["n_features"]
+        self.docs = meta["docs"]
+        self.dead = set(meta["dead"])
+        self.synced = {k: tuple(v) for k, v in meta["synced"].items()}
+        self.df = np.array(np.load(os.path.join(self.path, "df.npy")))
+        mode = "r" if self._mmap else None
+        for name, rows in meta["segments"]:
+            seg = os.path.join(self.path, name)
+            arrays = [np.load(os.path.join(seg, f"{part}.npy"), mmap_mode=mode) for part in ("data", "indices", "indptr")]
+            self._segments.append((name, sparse.csr_matrix(tuple(arrays), shape=(rows, self.n_features), copy=False)))
+        self._by_key = {doc["key"]: i for i, doc in enumerate(self.docs) if i not in self.dead}
+
+    def save(self):
+        """Writes pending rows as a new segment and the manifest (compacting when there are many segments)."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._pending:
+                matrix = self._pending_matrix()
+                name = f"seg_{uuid.uuid4().hex[:10]}"
+                self._write_segment(name, matrix)
+                self._segments.append((name, matrix))
+                self._pending = []
+            if len(self._segments) > MAX_SEGMENTS:
+                self.compact()
+            else:
+                self._write_manifest()
+
+    def _write_segment(self, name: str, matrix):
+        seg = os.path.join(self.path, name)
+        os.makedirs(seg, exist_ok=True)
+        for part in ("data", "indices", "indptr"):
+            np.save(os.path.join(seg, f"{part}.npy"), getattr(matrix, part))
+
+    def _write_manifest(self):
+        """Writes df.npy and the manifest; callers hold the exclusive file lock."""
+        os.makedirs(self.path, exist_ok=True)
+        tmp_id = f"{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+        df_tmp = os.path.join(self.path, f"df.{tmp_id}.npy")
+        np.save(df_tmp, self.df)
+        os.replace(df_tmp, os.path.join(self.path, "df.npy"))
+        meta = {
+            "n_features": self.n_features, "docs": self.docs, "dead": sorted(self.dead),
+            "synced": self.synced, "segments": [(name, m.shape[0]) for name, m in self._segments],
+        }
+        tmp = os.path.join(self.path, f"manifest.{tmp_id}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        # Readers see either the old or the new manifest, never half of one.
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+        self._loaded = self._signature()
+
+    def compact(self):
+        """Merges all segments into one, dropping replaced rows (and segments no manifest refers to)."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            matrix = self._matrix()
+            keep = [i for i in range(len(self.docs)) if i not in self.dead]
+            merged = sparse.csr_matrix(matrix[keep]) if keep else self._empty()
+            self.docs = [self.docs[i] for i in keep]
+            self.dead = set()
+            self._by_key = {doc["key"]: i for i, doc in enumerate(self.docs)}
+            name = f"seg_{uuid.uuid4().hex[:10]}"
+            self._write_segment(name, merged)
+            self._segments = [(name, merged)]
+            self._pending = []
+            self._norms = self._columns = None
+            self._write_manifest()
+            # Safe under the lock: other processes load segments only while holding it
+            # (shared), and memory maps they already hold keep the deleted files alive.
+            for entry in os.listdir(self.path):
+                if entry.startswith("seg_") and entry != name:
+                    shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    # --- Updates ---
+
+    def _empty(self):
+        return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+
+    def _to_csr(self, vectors: list):
+        """CSR matrix with one row per (indices, values) vector."""
+        indptr = np.zeros(len(vectors) + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([len(i) for i, _ in vectors])
+        indices = np.concatenate([i for i, _ in vectors]) if vectors else np.zeros(0)
+        data = np.concatenate([v for _, v in vectors]) if vectors else np.zeros(0)
+        return sparse.csr_matrix((data.astype(np.float32), indices.astype(np.int32), indptr),
+                                 shape=(len(vectors), self.n_features))
+
+    def _pending_matrix(self):
+        return self._to_csr(self._pending)
+
+    def _matrix(self):
+        """All rows (saved segments and pending), in row-id order."""
+        parts = [m for _, m in self._segments] + ([self._pending_matrix()] if self._pending else [])
+        if not parts:
+            return self._empty()
+        return parts[0] if len(parts) == 1 else sparse.vstack(parts, format="csr")
+
+    def _row(self, doc_id: int):
+        """(indices, values) of one row, without materializing the whole matrix."""
+        offset = 0
+        for _, matrix in self._segments:
+            if doc_id < offset + matrix.shape[0]:
+                start, end = matrix.indptr[doc_id - offset], matrix.indptr[doc_id - offset + 1]
+                return np.asarray(matrix.indices[start:end]), np.asarray(matrix.data[start:end])
+            offset += matrix.shape[0]
+        return self._pending[doc_id - offset]
+
+    def _row_indices(self, doc_id: int):
+        return self._row(doc_id)[0]
+
+    def _append(self, doc: dict, indices, values):
+        """Adds one vector as a new row; an earlier row with the same key is masked."""
+        old = self._by_key.get(doc["key"])
+        if old is not None:
+            self.dead.add(old)
+            self.df[self._row_indices(old)] -= 1
+        self._by_key[doc["key"]] = len(self.docs)
+        self.docs.append(doc)
+        self._pending.append((indices, values))
+        self.df[indices] += 1
+        self._norms = self._columns = None
+
+    def add(self, rows, university: str) -> int:
+        """Adds result rows of one university; a person already indexed is replaced."""
+        added = 0
+        with self._lock:
+            for row in rows:
+                name = _text(row.get("Name")).strip()
+                link = _text(row.get("Profile_Link")).strip()
+                indices, values = vectorize(row_fields(row), self.n_features)
+                if (not name and not link) or not len(indices):
+                    continue
+                self._append({
+                    "key": f"{slugify(university).lower()}|{link or name.lower()}", "Name": name,
+                    "Title": _text(row.get("Title")), "University": university,
+                    "Profile_Link": link, "Data_Source": _text(row.get("Data_Source")),
+                }, indices, values)
+                added += 1
+        return added
+
+    def sync(self, store: ResultStore | None = None) -> int:
+        """Adds the result-store rows that finished since the last sync and saves. Returns rows added."""
+        store = store or ResultStore()
+        added = 0
+        # Hold the lock from reading `synced` to saving, so two processes never index the same rows.
+        with self._lock, self._file_lock():
+            self._refresh()
+            before = dict(self.synced)
+            for run, rows in store.new_rows(self.synced):
+                added += self.add(rows, run.get("university") or "")
+            if self._pending or self.synced != before:
+                self.save()
+        return added
+
+    # --- Queries ---
+
+    def _idf(self):
+        n = max(1, len(self.docs) - len(self.dead))
+        return np.log((1 + n) / (1 + self.df.astype(np.float32))) + 1
+
+    def _doc_norms(self, idf):
+        """|tf * idf| per row, cached until the index changes."""
+        if self._norms is None:
+            matrix = self._matrix()
+            squared = matrix.multiply(matrix) @ (idf * idf)
+            self._norms = np.sqrt(np.asarray(squared, dtype=np.float32)).ravel()
+        return self._norms
+
+    def _by_feature(self):
+        """Column-major (CSC) copy of the matrix: an inverted index, so a query touches only its own features."""
+        if self._columns is None:
+            self._columns = self._matrix().tocsc()
+        return self._columns
+
+    def _scores(self, queries):
+        """Cosine similarity (n_queries x n_docs) of tf query rows against every live row."""
+        idf = self._idf()
+        queries = sparse.csr_matrix(queries, dtype=np.float32)
+        features = np.unique(queries.indices)
+        # Dot products of tf*idf vectors: only the query's features contribute.
+        weighted = queries[:, features].toarray().T * (idf[features] ** 2)[:, None]
+        dots = (self._by_feature()[:, features] @ weighted).T
+        q_norms = np.sqrt(np.asarray(queries.multiply(queries) @ (idf * idf)).ravel())
+        d_norms = self._doc_norms(idf)
+        scores = dots / np.outer(np.where(q_norms > 0, q_norms, 1), np.where(d_norms > 0, d_norms, 1))
+        if self.dead:
+            scores[:, sorted(self.dead)] = -1
+        return scores
+
+    def _top_k(self, scores, k: int, allowed=None, exclude=()) -> list:
+        if allowed is not None:
+            mask = np.full(scores.shape, -1, dtype=scores.dtype)
+            mask[allowed] = scores[allowed]
+            scores = mask
+        for doc_id in exclude:
+            scores[doc_id] = -1
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [{**{f: self.docs[i][f] for f in ("Name", "Title", "University", "Profile_Link", "Data_Source")},
+                 "Score": round(float(scores[i]), 4)} for i in top if scores[i] > 0]
+
+    def _allowed(self, universities):
+        if not universities:
+            return None
+        slugs = {slugify(u).lower() for u in universities}
+        return np.array([i for i, d in enumerate(self.docs) if d["key"].split("|", 1)[0] in slugs], dtype=np.int64)
+
+    def query(self, texts: list, k: int = 10, universities=None) -> list:
+        """
+        Top-k faculty for each free-text interest statement, computed as one
+        sparse matrix product for the whole batch.
+
+        Returns:
+            list: One ranked list of {"Name", "Title", "University", "Profile_Link", "Data_Source", "Score"} per text.
+        """
+        with self._lock:
+            self._refresh()
+            if not self.docs:
+                return [[] for _ in texts]
+            scores = self._scores(self._to_csr([vectorize({"summary": t}, self.n_features) for t in texts]))
+            allowed = self._allowed(universities)
+            return [self._top_k(s, k, allowed) for s in scores]
+
+    def find(self, name: str, university: str | None = None) -> list:
+        """Row ids of live people with this name (optionally at this university)."""
+        slug = slugify(university).lower() if university else None
+        return [i for i, d in enumerate(self.docs)
+                if i not in self.dead and d["Name"].lower() == name.strip().lower()
+                and (slug is None or d["key"].split("|", 1)[0] == slug)]
+
+    def similar(self, name: str, university: str | None = None, k: int = 10, universities=None) -> list:
+        """Faculty whose research is most similar to an indexed person's (the person excluded)."""
+        with self._lock:
+            self._refresh()
+            found = self.find(name, university)
+            if not found:
+                return []
+            doc_id = found[-1]
+            scores = self._scores(self._to_csr([self._row(doc_id)]))[0]
+            return self._top_k(scores, k, self._allowed(universities), exclude=[doc_id])
+
+    def __len__(self):
+        return len(self.docs) - len(self.dead)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_similarity_index() -> SimilarityIndex:
+    """Shared SimilarityIndex at SIMILARITY_INDEX_DIR."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.path != SIMILARITY_INDEX_DIR:
+            _index = SimilarityIndex(SIMILARITY_INDEX_DIR)
+        return _index
+
+def sync_similarity_index():
+    """Adds new result-store rows to the similarity index. Never fails the caller's run."""
+    try:
+        added = get_similarity_index().sync()
+        if added:
+            print(f"🧭 Added {added} rows to the similarity index.")
+    except Exception as e:
+        print(f"⚠️ Similarity index update failed: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find faculty with similar research.")
+    parser.add_argument("--dir", default=SIMILARITY_INDEX_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="Add new rows from the result store")
+    sub.add_parser("compact", help="Merge segments and drop replaced rows")
+    like = sub.add_parser("like", help="Faculty similar to an indexed person")
+    like.add_argument("name")
+    like.add_argument("--university")
+    text = sub.add_parser("query", help="Faculty matching free-text interests (one result list per text)")
+    text.add_argument("texts", nargs="+")
+    for p in (like, text):
+        p.add_argument("-k", type=int, default=10)
+        p.add_argument("--within", action="append", help="Only return faculty of this university")
+    args = parser.parse_args()
+
+    index = SimilarityIndex(args.dir)
+    if args.command == "sync":
+        print(f"✅ Added {index.sync()} rows ({len(index)} faculty indexed).")
+    elif args.command == "compact":
+        index.compact()
+        print(f"✅ Compacted to {len(index)} faculty.")
+    else:
+        index.sync()
+        if args.command == "like":
+            results = [index.similar(args.name, args.university, args.k, args.within)]
+            if not index.find(args.name, args.university):
+                print(f"⚠️ {args.name} is not in the index.")
+                sys.exit(1)
+        else:
+            results = index.query(args.texts, args.k, args.within)
+        for hits in results:
+            for hit in hits:
+                print(f"{hit['Score']:.3f}  {hit['Name']} ({hit['Title']}, {hit['University']})")
+            print()
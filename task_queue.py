@@ -0,0 +1,407 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+QUEUE_PATH = os.getenv("SCHOLARSCOUT_QUEUE_PATH", os.path.join(".cache", "queue.sqlite"))
+# A leased task goes back to the queue if its worker has not sent a heartbeat for this long.
+LEASE_SECONDS = float(os.getenv("SCHOLARSCOUT_LEASE_SECONDS", "120"))
+# Tasks that failed (or whose worker died) this many times are given up on.
+MAX_ATTEMPTS = int(os.getenv("SCHOLARSCOUT_MAX_ATTEMPTS", "3"))
+# Idle workers poll this often for new tasks (with --wait).
+POLL_INTERVAL = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY, campaign TEXT NOT NULL, payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued', worker TEXT, token TEXT, lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT,
+    created_at TEXT, finished_at TEXT);
+CREATE TABLE IF NOT EXISTS collected (task_id TEXT PRIMARY KEY, run_id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS tasks_pending ON tasks (status, lease_until);
+CREATE INDEX IF NOT EXISTS tasks_campaign ON tasks (campaign, status);
+"""
+
+
+class TaskDeferred(Exception):
+    """Raised by a handler to hand its task back untouched, e.g. when this worker's budget ran out."""
+
+
+# Heartbeat of the task this process is working on (run_worker runs one task at a time).
+_running = None
+
+def lease_lost() -> bool:
+    """True while the task being worked on has lost its lease; handlers should stop spending on it."""
+    return _running is not None and _running.lost
+
+
+def task_id(campaign: str, key: str) -> str:
+    """Deterministic id, so enqueuing the same person twice is a no-op."""
+    return hashlib.sha1(f"{campaign}\x00{key}".encode("utf-8")).hexdigest()[:20]
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class TaskQueue:
+    """
+    Shared work queue on SQLite with lease/heartbeat semantics.
+
+    A worker leases a task for `lease_seconds` and extends the lease with
+    heartbeats while it works. If the worker dies, the lease runs out and the
+    task is handed to someone else (up to MAX_ATTEMPTS times). Only the current
+    lease holder can complete a task: once a stalled worker's task has been
+    re-leased, its late result is rejected, so a task is never counted twice.
+
+    Several processes or machines can share one queue file as long as they see
+    the same file with working locks (a local disk or a shared volume that
+    supports POSIX locking). Postgres would scale further but is not a
+    dependency of this project.
+
+    Args:
+        path (str): SQLite file (SCHOLARSCOUT_QUEUE_PATH, default .cache/queue.sqlite).
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or QUEUE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit; multi-statement updates use explicit BEGIN IMMEDIATE.
+        self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _row(self, row) -> dict:
+        task = dict(row)
+        task["payload"] = json.loads(task["payload"])
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    def enqueue(self, campaign: str, payloads: list, key=None) -> int:
+        """
+        Adds tasks to a campaign. `key(payload)` identifies a task (default:
+        the payload's JSON); payloads already in the campaign are skipped.
+
+        Returns:
+            int: Number of new tasks.
+        """
+        key = key or (lambda p: json.dumps(p, sort_keys=True, ensure_ascii=False))
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (id, campaign, payload, created_at) VALUES (?, ?, ?, ?)",
+                [(task_id(campaign, key(p)), campaign, json.dumps(p, ensure_ascii=False), now) for p in payloads],
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS, campaign: str | None = None) -> dict | None:
+        """
+        Takes the oldest available task: queued, or leased with an expired lease.
+
+        Returns:
+            dict: The task (with its lease "token"), or None if nothing is available.
+        """
+        now = time.time()
+        query = ("SELECT * FROM tasks WHERE (status = 'queued' OR (status = 'leased' AND lease_until < ?))"
+                 " AND attempts < ?")
+        args = [now, MAX_ATTEMPTS]
+        if campaign:
+            query += " AND campaign = ?"
+            args.append(campaign)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Workers keep dying on these; stop handing them out.
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = 'Lease expired too often'"
+                    " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, MAX_ATTEMPTS),
+                )
+                row = self._conn.execute(query + " ORDER BY created_at, rowid LIMIT 1", args).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                token = uuid.uuid4().hex
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, token = ?, lease_until = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (worker, token, now + lease_seconds, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        task = self._row(row)
+        task.update(status="leased", worker=worker, token=token, attempts=row["attempts"] + 1)
+        return task
+
+    def heartbeat(self, task_id: str, token: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Extends a lease. False means the lease was lost (expired and taken, or the task is finished)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                (time.time() + lease_seconds, task_id, token),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, task_id: str, token: str, result) -> bool:
+        """
+        Records a task's result. Returns False (and changes nothing) unless
+        `token` still holds the lease: a task already completed, or re-leased
+        to another worker after this one stalled, keeps its current state.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, lease_until = NULL, error = NULL,"
+                " finished_at = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False, default=str),
+                 datetime.now().isoformat(timespec="seconds"), task_id, token),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, task_id: str, token: str, error: str):
+        """Returns a task to the queue, or marks it failed once it has used up its attempts."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " error = ?, lease_until = NULL WHERE id = ? AND token = ? AND status = 'leased'",
+                (MAX_ATTEMPTS, error, task_id, token),
+            )
+
+    def release(self, task_id: str, token: str):
+        """Gives a leased task back untouched (e.g. the worker ran out of budget); no attempt is counted."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = 'queued', attempts = attempts - 1, lease_until = NULL"
+                " WHERE id = ? AND token = ? AND status = 'leased'",
+                (task_id, token),
+            )
+
+    def stats(self, campaign: str | None = None) -> dict:
+        """Task counts by status (expired leases count as queued)."""
+        query = ("SELECT CASE WHEN status = 'leased' AND lease_until < ? THEN 'queued' ELSE status END AS s,"
+                 " COUNT(*) FROM tasks")
+        args = [time.time()]
+        if campaign:
+            query += " WHERE campaign = ?"
+            args.append(campaign)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY s", args).fetchall()
+        return {status: count for status, count in rows}
+
+    def tasks(self, campaign: str, status: str | None = None, uncollected: bool = False) -> list:
+        query, args = "SELECT * FROM tasks WHERE campaign = ?", [campaign]
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        if uncollected:
+            query += " AND id NOT IN (SELECT task_id FROM collected)"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at, rowid", args).fetchall()
+        return [self._row(r) for r in rows]
+
+    def mark_collected(self, task_ids: list, run_id: str):
+        """Records that these tasks' results were merged into a result-store run."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("INSERT OR IGNORE INTO collected (task_id, run_id) VALUES (?, ?)",
+                                   [(t, run_id) for t in task_ids])
+            self._conn.execute("COMMIT")
+
+
+class Heartbeat:
+    """Keeps a lease alive from a background thread while the task runs; `lost` is set if it is taken away."""
+
+    def __init__(self, queue: TaskQueue, task: dict, lease_seconds: float = LEASE_SECONDS):
+        self.queue = queue
+        self.task = task
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{task['id']}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(self.task["id"], self.task["token"], self.lease_seconds):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_worker(path: str, handler, worker: str | None = None, campaign: str | None = None,
+               lease_seconds: float = LEASE_SECONDS, wait: bool = False, should_stop=None) -> int:
+    """
+    Leases and runs tasks until the queue is empty (or, with `wait`, until
+    `should_stop()` returns True). If a task's lease is lost while it runs
+    (see lease_lost), whatever the handler produced is dropped: the task
+    belongs to another worker now.
+
+    Args:
+        handler (callable): payload -> JSON-serializable result.
+        should_stop (callable, optional): Checked before each lease, e.g. a spent budget.
+
+    Returns:
+        int: Tasks this worker completed.
+    """
+    global _running
+    worker = worker or default_worker_id()
+    queue = TaskQueue(path)
+    done = 0
+    try:
+        while should_stop is None or not should_stop():
+            task = queue.lease(worker, lease_seconds, campaign)
+            if task is None:
+                if not wait:
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+            heartbeat = Heartbeat(queue, task, lease_seconds)
+            error = None
+            try:
+                with heartbeat:
+                    _running = heartbeat
+                    result = handler(task["payload"])
+            except Exception as e:
+                error = e
+            finally:
+                _running = None
+            if heartbeat.lost:
+                print(f"⚠️ [{worker}] Lost the lease on task {task['id']}; dropping this attempt.")
+                continue
+            if isinstance(error, TaskDeferred):
+                print(f"⏸️ [{worker}] Handing back task {task['id']}: {error}")
+                queue.release(task["id"], task["token"])
+                break
+            if error is not None:
+                print(f"❌ [{worker}] Task {task['id']} failed: {type(error).__name__}: {error}")
+                queue.fail(task["id"], task["token"], f"{type(error).__name__}: {error}")
+                continue
+            if queue.complete(task["id"], task["token"], result):
+                done += 1
+    finally:
+        queue.close()
+    return done
+
+
+# --- The faculty pipeline on top of the queue ---
+
+def enqueue_faculty(queue: TaskQueue, url: str, university: str, languages=None, url_pattern_hint=None,
+                    campaign: str | None = None) -> tuple:
+    """
+    Scrapes a faculty list and enqueues one task per person.
+
+    Returns:
+        tuple: (campaign, number of new tasks)
+    """
+    from scraper import scrape_faculty_list
+    campaign = campaign or university
+    people = scrape_faculty_list(url, url_pattern_hint=url_pattern_hint)
+    payloads = [{"person": p, "university": university, "url": url, "languages": list(languages or ["zh"])}
+                for p in people]
+    added = queue.enqueue(campaign, payloads, key=lambda p: f"{p['university']}|{p['person'].get('profile_link') or p['person'].get('name')}")
+    return campaign, added
+
+def process_task(payload: dict) -> dict:
+    """Worker handler: the result row for one person, using this worker's own API keys and budget."""
+    from main import process_person
+    row = process_person(payload["person"], payload["university"], payload.get("languages"))
+    if row.get("Data_Source") == "Budget_Exceeded":
+        raise TaskDeferred("worker budget exhausted")
+    return row
+
+def collect(queue: TaskQueue, campaign: str) -> str | None:
+    """
+    Merges the rows of a campaign's finished tasks into one result-store run
+    (and the search/similarity indexes). Tasks merged by an earlier call are
+    skipped, so running it again only adds what finished since.
+
+    Returns:
+        str: The new run id, or None if nothing new had finished.
+    """
+    from result_store import ResultStore
+    from search_index import sync_search_index
+    from similarity import sync_similarity_index
+    finished = [t for t in queue.tasks(campaign, "done", uncollected=True) if t["result"]]
+    if not finished:
+        return None
+    first = finished[0]["payload"]
+    with ResultStore().open_run(first["university"], url=first.get("url", ""), languages=first.get("languages"),
+                                source=f"queue:{campaign}") as run:
+        for task in finished:
+            run.append(task["result"])
+    queue.mark_collected([t["id"] for t in finished], run.meta["run_id"])
+    sync_search_index()
+    sync_similarity_index()
+    return run.meta["run_id"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distribute per-faculty work over a shared task queue.")
+    parser.add_argument("--queue", default=QUEUE_PATH, help="Shared queue file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="Scrape a faculty list and queue one task per person")
+    enqueue.add_argument("url")
+    enqueue.add_argument("university")
+    enqueue.add_argument("--languages", default="zh", help="Comma-separated summary languages")
+    enqueue.add_argument("--hint", help="URL pattern that profile links must contain")
+    enqueue.add_argument("--campaign", help="Defaults to the university name")
+    work = sub.add_parser("work", help="Process tasks with this machine's keys and quotas")
+    work.add_argument("--env-file", help="API keys / SCHOLARSCOUT_MAX_* for this worker (dotenv format)")
+    work.add_argument("--worker-id")
+    work.add_argument("--campaign")
+    work.add_argument("--wait", action="store_true", help="Keep polling when the queue is empty")
+    status = sub.add_parser("status", help="Task counts")
+    status.add_argument("--campaign")
+    merge = sub.add_parser("collect", help="Merge finished rows into the result store")
+    merge.add_argument("campaign")
+    args = parser.parse_args()
+
+    queue = TaskQueue(args.queue)
+    if args.command == "enqueue":
+        langs = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+        campaign, added = enqueue_faculty(queue, args.url, args.university, langs, args.hint, args.campaign)
+        print(f"📥 Queued {added} new tasks for campaign '{campaign}'.")
+    elif args.command == "work":
+        if args.env_file:
+            from dotenv import load_dotenv
+            # This worker's keys take precedence over anything inherited.
+            load_dotenv(args.env_file, override=True)
+        from budget import RunBudget, use_budget
+        budget = RunBudget.from_env()
+        # A task whose lease was lost makes no further LLM calls.
+        budget.stop_if = lease_lost
+        worker_id = args.worker_id or default_worker_id()
+        print(f"👷 Worker {worker_id} pulling from {args.queue}...")
+        with use_budget(budget):
+            # Stop leasing once this worker's own quota is spent; other workers pick up the rest.
+            count = run_worker(args.queue, process_task, worker_id, args.campaign, wait=args.wait,
+                               should_stop=lambda: budget.time_exceeded() or budget.tokens_exceeded())
+        usage = budget.report()
+        print(f"✅ {worker_id} completed {count} tasks ({usage['total_tokens']} tokens, ~${usage['cost_usd']:.4f}).")
+    elif args.command == "status":
+        print(json.dumps(queue.stats(args.campaign), indent=2))
+    else:
+        run_id = collect(queue, args.campaign)
+        print(f"✅ Merged into run {run_id}." if run_id else "⚠️ No newly finished tasks to merge.")
+    queue.close()
@@ -0,0 +1,42 @@
+import pytest
+import llm_engine
+from budget import RunBudget, BudgetExceeded, estimate_tokens, use_budget, current_budget
+from test_llm_engine import FakeClient
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 400) == 101
+    # CJK text costs about one token per character.
+    assert estimate_tokens("研究方向") >= 4
+
+def test_ceilings():
+    budget = RunBudget(max_tokens=1000, reserve=0.2)
+    budget.record({"prompt_tokens": 700, "completion_tokens": 100}, "summary")
+    assert budget.total_tokens == 800
+    assert budget.in_reserve()
+    budget.check(100)
+    with pytest.raises(BudgetExceeded):
+        budget.check(500)
+    assert RunBudget(max_seconds=0).time_exceeded()
+    assert not RunBudget().in_reserve()
+
+def test_usage_is_recorded_per_call(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    budget = RunBudget()
+    with use_budget(budget):
+        assert current_budget() is budget
+        llm_engine.summarize_from_bio("Works on databases.", name="Jane Doe", language="en")
+    assert current_budget() is None
+    assert budget.report()["by_source"] == {"summary": 200}
+    assert budget.calls == 1
+
+def test_over_budget_call_is_not_sent(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    with use_budget(RunBudget(max_tokens=50)):
+        summary = llm_engine.summarize_from_bio("x" * 2000, name="Jane Doe")
+    assert isinstance(summary, llm_engine.LLMFailure)
+    assert summary.over_budget
+    assert client.calls == 0
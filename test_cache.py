@@ -0,0 +1,50 @@
+import time
+import cache as cache_module
+from cache import DiskCache, MISS
+
+
+def test_get_set_and_negative_entries(tmp_path):
+    cache = DiskCache("s2_search", path=str(tmp_path / "cache.sqlite"))
+    assert cache.get("missing") is MISS
+    cache.set("none", None)
+    assert cache.get("none") is None
+    cache.set("k", {"data": [1, 2]})
+    # A second instance on the same file sees the same entries.
+    assert DiskCache("s2_search", path=str(tmp_path / "cache.sqlite")).get("k") == {"data": [1, 2]}
+    assert DiskCache("other", path=str(tmp_path / "cache.sqlite")).get("k") is MISS
+
+def test_ttl_expiry():
+    cache = DiskCache("t", path=":memory:", ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.get("short") is MISS
+    assert cache.get("long") == 2
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(cache_module, "TOUCH_INTERVAL", 0)
+    cache = DiskCache("t", path=":memory:", max_entries=3)
+    for i in range(5):
+        cache.set(f"k{i}", i)
+        time.sleep(0.001)
+    cache.get("k0")
+    cache.evict()
+    assert len(cache) == 3
+    assert cache.get("k0") == 0
+    assert cache.get("k1") is MISS
+
+def test_hits_write_access_times_only_when_stale(monkeypatch):
+    cache = DiskCache("t", path=":memory:", max_entries=10)
+    cache.set("k", 1)
+    writes = cache._conn.total_changes
+    for _ in range(100):
+        assert cache.get("k") == 1
+    assert cache._conn.total_changes == writes
+    monkeypatch.setattr(cache_module, "TOUCH_INTERVAL", 0)
+    cache.get("k")
+    assert cache._conn.total_changes == writes + 1
+    unbounded = DiskCache("u", path=":memory:")
+    unbounded.set("k", 1)
+    writes = unbounded._conn.total_changes
+    unbounded.get("k")
+    assert unbounded._conn.total_changes == writes
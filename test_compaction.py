@@ -0,0 +1,44 @@
+from budget import estimate_tokens
+from compaction import dedupe_papers, rank_papers, compact_papers, normalize_title, strip_version_suffix
+
+
+def test_normalize_title():
+    assert normalize_title("Deep  Learning: A Survey!") == "deep learning a survey"
+
+def test_dedupe_keeps_best_version():
+    papers = [
+        {"title": "Graph Neural Networks for Code (arXiv preprint)", "year": 2023, "citationCount": 3},
+        {"title": "Graph neural networks for code", "year": 2024, "citationCount": 10,
+         "tldr": {"text": "GNNs for program analysis."}},
+        {"title": "Something Else Entirely", "year": 2024, "citationCount": 1},
+    ]
+    result = dedupe_papers(papers)
+    assert len(result) == 2
+    assert result[0]["year"] == 2024
+    assert result[0]["citationCount"] == 10
+
+def test_version_words_only_stripped_from_suffixes():
+    assert strip_version_suffix("Graph Nets: Extended Abstract") == "Graph Nets"
+    assert strip_version_suffix("Graph Nets [Full Version] (arXiv)") == "Graph Nets"
+    assert strip_version_suffix("Abstract Interpretation of Programs") == "Abstract Interpretation of Programs"
+    papers = [{"title": "Abstract Interpretation of Neural Networks"}, {"title": "Interpretation of Neural Networks"}]
+    assert len(dedupe_papers(papers)) == 2
+
+def test_rank_prefers_cited_and_recent():
+    papers = [
+        {"title": "Old Classic", "year": 2015, "citationCount": 5000},
+        {"title": "Recent Uncited", "year": 2025, "citationCount": 0},
+        {"title": "Recent Cited", "year": 2025, "citationCount": 50},
+    ]
+    ranked = [p["title"] for p in rank_papers(papers, year_now=2025)]
+    assert ranked.index("Recent Cited") < ranked.index("Recent Uncited")
+
+def test_compact_is_bounded_for_prolific_authors():
+    papers = [
+        {"title": f"Paper number {i} on topic {i}", "year": 2024, "citationCount": i, "tldr": "x " * 300}
+        for i in range(200)
+    ]
+    text = compact_papers(papers, token_budget=400, top_k=12, year_now=2025)
+    assert 0 < len(text.splitlines()) <= 12
+    assert estimate_tokens(text) <= 420
+    assert text.startswith("- 2024 | 199 cit. | Paper number 199")
@@ -0,0 +1,62 @@
+import os
+import pytest
+from openpyxl import load_workbook
+from excel_writer import ExcelStreamWriter, excel_bytes, recover, result_columns, sidecar_path, write_rows
+
+ROWS = [
+    {"Name": "Jane Doe", "Title": "Professor", "Research_Summary": "Robots.", "Research_Summary_EN": "Robots!", "Data_Source": "S2_Verified"},
+    {"Name": "John Smith", "Research_Keywords": ["HCI", "Robotics"], "Research_Summary": "x" * 80, "Data_Source": "Web_Bio"},
+]
+
+
+def read(path):
+    sheet = load_workbook(path).active
+    return sheet, [[c.value for c in row] for row in sheet.iter_rows()]
+
+
+def test_columns_follow_languages():
+    assert result_columns(["zh", "en"]) == [
+        "Name", "Title", "Email", "Research_Keywords", "Profile_Link",
+        "Research_Summary", "Research_Summary_EN", "Data_Source",
+    ]
+
+def test_rows_and_widths(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    assert write_rows(ROWS, path, result_columns(["zh", "en"])) == 2
+    sheet, values = read(path)
+    assert values[0][0] == "Name"
+    assert values[1][:2] == ["Jane Doe", "Professor"]
+    assert values[2][3] == "HCI, Robotics"
+    assert sheet.column_dimensions["A"].width == pytest.approx(len("John Smith") + 2, abs=1)
+    assert sheet.column_dimensions["F"].width == pytest.approx(50, abs=1)
+    assert not os.path.exists(sidecar_path(path))
+
+def test_interrupted_run_leaves_a_workbook(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    with pytest.raises(KeyboardInterrupt):
+        with ExcelStreamWriter(path) as writer:
+            writer.append(ROWS[0])
+            raise KeyboardInterrupt
+    assert read(path)[1][1][0] == "Jane Doe"
+
+def test_recover_from_sidecar(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    writer = ExcelStreamWriter(path)
+    for row in ROWS:
+        writer.append(row)
+    # Simulate a hard kill: the workbook is never closed, only the sidecar exists.
+    writer._sidecar.close()
+    with open(sidecar_path(path), "a", encoding="utf-8") as f:
+        f.write('{"Name": "Cut off')
+    assert recover(path) == 2
+    _, values = read(path)
+    assert values[0][6] == "Research_Summary_EN"
+    assert values[1][6] == "Robots!"
+    assert not os.path.exists(sidecar_path(path))
+
+def test_excel_bytes_in_memory(tmp_path):
+    data = excel_bytes(ROWS, result_columns(["zh"]))
+    path = tmp_path / "download.xlsx"
+    path.write_bytes(data)
+    assert read(str(path))[1][2][0] == "John Smith"
+    assert os.listdir(tmp_path) == ["download.xlsx"]
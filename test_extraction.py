@@ -0,0 +1,62 @@
+import json
+import pytest
+import llm_engine
+from extraction import extract_list, extract_object, validate, ExtractionError, FACULTY_SCHEMA, PROFILE_SCHEMA
+from test_llm_engine import FakeClient
+
+
+class ScriptedClient(FakeClient):
+    """Returns the queued replies in order."""
+
+    def __init__(self, replies):
+        super().__init__()
+        self.replies = list(replies)
+        self.kwargs = []
+
+    def create(self, **kwargs):
+        self.kwargs.append(kwargs)
+        self.content = self.replies.pop(0)
+        return super().create(**kwargs)
+
+
+def _use(monkeypatch, replies):
+    client = ScriptedClient(replies)
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    return client
+
+def test_validate_coerces_and_drops():
+    assert validate({"name": "  Jane  ", "email": "null", "extra": 1}, FACULTY_SCHEMA) == {
+        "name": "Jane", "title": None, "profile_link": None, "email": None
+    }
+    assert validate({"title": "Professor"}, FACULTY_SCHEMA, required=("name",)) is None
+    profile = validate({"research_interests": "HCI", "recent_paper_titles": ["A", None, ""]}, PROFILE_SCHEMA)
+    assert profile["research_interests"] == ["HCI"]
+    assert profile["recent_paper_titles"] == ["A"]
+
+def test_extract_list_uses_json_mode(monkeypatch):
+    reply = json.dumps({"items": [
+        {"name": "John Doe", "title": "Professor", "profile_link": "/people/john", "email": None},
+        {"name": None, "title": "Staff"},
+        "not an object",
+    ]})
+    client = _use(monkeypatch, [reply])
+    result = extract_list("Extract faculty.", "John Doe, Professor", FACULTY_SCHEMA, required=("name",))
+    assert [p["name"] for p in result] == ["John Doe"]
+    assert client.kwargs[0]["response_format"] == {"type": "json_object"}
+
+def test_extract_list_accepts_other_wrappers(monkeypatch):
+    _use(monkeypatch, ['```json\n{"faculty": [{"name": "Jane Smith"}]}\n```'])
+    result = extract_list("Extract faculty.", "text", FACULTY_SCHEMA)
+    assert result[0]["name"] == "Jane Smith"
+
+def test_extract_object_retries_invalid_json(monkeypatch):
+    client = _use(monkeypatch, ["not json at all", '{"name": "Jane", "bio_text": "Studies HCI."}'])
+    result = extract_object("Extract profile.", "text", PROFILE_SCHEMA)
+    assert result["bio_text"] == "Studies HCI."
+    assert result["recent_paper_titles"] == []
+    assert client.calls == 2
+
+def test_extract_object_gives_up(monkeypatch):
+    _use(monkeypatch, ["nope", "still nope"])
+    with pytest.raises(ExtractionError):
+        extract_object("Extract profile.", "text", PROFILE_SCHEMA)
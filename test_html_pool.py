@@ -0,0 +1,85 @@
+import requests
+import html_pool
+from html_pool import parse_page, clean_page, declared_encoding
+from scraper import make_links_absolute
+from utils import clean_html
+
+PAGE = """
+<html><head><meta charset="gbk"><script>var x = 1;</script></head>
+<body><nav><a href="/">Home</a></nav>
+<main><h1>师资队伍</h1><a href="/people/zhang">张伟 教授</a><a href="https://other.edu/li">Li Na</a></main>
+<footer>版权所有</footer></body></html>
+"""
+
+
+def test_parse_page_matches_clean_html():
+    raw = PAGE.encode("gbk")
+    base = "https://cs.example.edu/faculty/"
+    expected = clean_html(make_links_absolute(PAGE, base))
+    assert parse_page(raw, None, base) == expected
+    assert "张伟 教授 (https://cs.example.edu/people/zhang)" in expected
+    assert parse_page(raw) == clean_html(PAGE)
+    assert parse_page(b"") == ""
+
+
+def test_clean_page_in_pool(monkeypatch):
+    monkeypatch.setattr(html_pool, "HTML_WORKERS", 2)
+    monkeypatch.setattr(html_pool, "HTML_POOL_MIN_BYTES", 0)
+    try:
+        raw = PAGE.encode("gbk")
+        assert clean_page(raw, base_url="https://cs.example.edu/") == parse_page(raw, None, "https://cs.example.edu/")
+        assert html_pool._pool is not None
+    finally:
+        html_pool.shutdown_html_pool()
+
+
+def test_declared_encoding():
+    response = requests.Response()
+    response.headers["Content-Type"] = "text/html"
+    response.encoding = "ISO-8859-1"  # what requests assumes when no charset is sent
+    assert declared_encoding(response) is None
+    response.headers["Content-Type"] = "text/html; charset=GBK"
+    response.encoding = "GBK"
+    assert declared_encoding(response) == "GBK"
+
+
+def test_process_job_with_pool_enabled_exits(monkeypatch, tmp_path):
+    import threading
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from jobs import JobRunner
+
+    page = (PAGE * 200).encode("gbk")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Spawned job workers read their configuration from the environment.
+    for key, value in {"SCHOLARSCOUT_HTML_WORKERS": "2", "SCHOLARSCOUT_HTML_POOL_MIN_BYTES": "0",
+                       "SCHOLARSCOUT_RESULTS_DIR": str(tmp_path / "results"),
+                       "SCHOLARSCOUT_SEARCH_INDEX": str(tmp_path / "search.sqlite"),
+                       "SCHOLARSCOUT_SIMILARITY_DIR": str(tmp_path / "similarity"),
+                       "SCHOLARSCOUT_CACHE_PATH": str(tmp_path / "cache.sqlite"), "NO_PROXY": "*"}.items():
+        monkeypatch.setenv(key, value)
+    for key in ("DEEPSEEK_API_KEY", "HTTP_PROXY"):
+        monkeypatch.delenv(key, raising=False)
+
+    runner = JobRunner(str(tmp_path / "jobs.sqlite"), max_workers=1, use_processes=True)
+    try:
+        job_id = runner.submit(f"http://127.0.0.1:{server.server_port}/faculty", "Example University")
+        assert runner.wait(job_id, timeout=60)["status"] == "done"
+    finally:
+        stopper = threading.Thread(target=runner.shutdown)
+        stopper.start()
+        stopper.join(timeout=30)
+        server.shutdown()
+    assert not stopper.is_alive(), "job worker hung on exit"
@@ -0,0 +1,129 @@
+import time
+import pytest
+import jobs
+import main
+import result_store
+import search_index
+import similarity
+from jobs import JobRunner, JobRegistry
+
+
+def fake_process(url, university_name, url_pattern_hint=None, language="zh", budget=None, languages=None,
+                 on_summary=None, on_row=None, on_progress=None):
+    people = ["Jane Doe", "John Smith", "Ada Lovelace"]
+    rows = []
+    for i, name in enumerate(people):
+        on_progress(i, len(people), name)
+        on_summary(name, f"{name} works on robots.")
+        row = {"Name": name, "Research_Summary": f"{name} works on robots.", "Data_Source": "S2_Verified"}
+        on_row(row)
+        rows.append(row)
+        if url.endswith("slow"):
+            time.sleep(0.2)
+    return rows
+
+
+@pytest.fixture
+def runner(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "process_faculty_url", fake_process)
+    monkeypatch.setattr(result_store, "DEFAULT_ROOT", str(tmp_path / "results"))
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_PATH", str(tmp_path / "search.sqlite"))
+    monkeypatch.setattr(similarity, "SIMILARITY_INDEX_DIR", str(tmp_path / "similarity"))
+    r = JobRunner(str(tmp_path / "jobs.sqlite"), max_workers=2, use_processes=False)
+    yield r
+    r.shutdown()
+
+
+def test_job_runs_in_background_and_results_by_id(runner, tmp_path):
+    job_id = runner.submit("https://example.edu/people", "Example University", languages=["zh", "en"])
+    job = runner.wait(job_id, timeout=10)
+    assert job["status"] == "done"
+    assert job["rows"] == 3
+    assert job["params"]["languages"] == ["zh", "en"]
+    assert not list(tmp_path.glob("*.xlsx"))
+    assert [r["Name"] for r in runner.results(job_id)] == ["Jane Doe", "John Smith", "Ada Lovelace"]
+    assert [h["Name"] for h in search_index.get_search_index().search("robots")][:1] == ["Jane Doe"]
+
+def test_concurrent_jobs_and_cancel(runner):
+    first = runner.submit("https://a.edu/slow", "A University")
+    second = runner.submit("https://b.edu/slow", "B University")
+    third = runner.submit("https://c.edu/slow", "C University")
+    runner.cancel(second)
+    runner.cancel(third)
+    assert runner.wait(first, timeout=10)["status"] == "done"
+    assert runner.wait(second, timeout=10)["status"] == "cancelled"
+    assert runner.get(third)["status"] == "cancelled" and runner.get(third)["finished_at"]
+    assert {j["id"] for j in runner.list()} == {first, second, third}
+
+def test_same_inputs_reuse_job(runner, monkeypatch):
+    first = runner.submit("https://example.edu/people", "Example University")
+    runner.wait(first, timeout=10)
+    assert runner.submit(" https://example.edu/people", "Example University ") == first
+    assert runner.submit("https://example.edu/people", "Example University", languages=["en"]) != first
+    forced = runner.submit("https://example.edu/people", "Example University", force=True)
+    assert forced != first
+    runner.wait(forced, timeout=10)
+    monkeypatch.setattr(jobs, "RESULT_TTL", 0)
+    assert runner.submit("https://example.edu/people", "Example University") not in (first, forced)
+
+def test_empty_job_is_not_reused(runner, monkeypatch):
+    monkeypatch.setattr(main, "process_faculty_url", lambda *args, **kwargs: [])
+    first = runner.submit("https://example.edu/people", "Example University")
+    assert runner.wait(first, timeout=10)["rows"] == 0
+    assert runner.submit("https://example.edu/people", "Example University") != first
+
+def test_concurrent_jobs_keep_their_own_keys(runner, monkeypatch):
+    from credentials import get_key
+    seen = {}
+    def keyed_process(url, university_name, **kwargs):
+        for _ in range(5):
+            seen.setdefault(url, set()).add(get_key("DEEPSEEK_API_KEY"))
+            time.sleep(0.02)
+        return fake_process(url, university_name, **kwargs)
+    monkeypatch.setattr(main, "process_faculty_url", keyed_process)
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "server-key")
+    first = runner.submit("https://a.edu/people", "A University", env={"DEEPSEEK_API_KEY": "key-a"})
+    second = runner.submit("https://b.edu/people", "B University", env={"DEEPSEEK_API_KEY": "key-b"})
+    runner.wait(first, timeout=10)
+    runner.wait(second, timeout=10)
+    assert seen == {"https://a.edu/people": {"key-a"}, "https://b.edu/people": {"key-b"}}
+    assert get_key("DEEPSEEK_API_KEY") == "server-key"
+
+def test_registry_survives_restart(tmp_path):
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite"))
+    job_id = registry.create({"url": "u", "university": "U"})
+    registry.update(job_id, status="running", pid=2 ** 22 + 12345)
+    registry.close()
+    runner = JobRunner(str(tmp_path / "jobs.sqlite"), use_processes=False)
+    try:
+        job = runner.get(job_id)
+        assert job["status"] == "failed"
+        assert "Interrupted" in job["error"]
+    finally:
+        runner.shutdown()
+
+def test_shared_registry_runs_queued_job_once(runner, monkeypatch, tmp_path):
+    calls = []
+    def counting_process(url, university_name, **kwargs):
+        calls.append(url)
+        return fake_process(url, university_name, **kwargs)
+    monkeypatch.setattr(main, "process_faculty_url", counting_process)
+    path = str(tmp_path / "shared.sqlite")
+    registry = JobRegistry(path)
+    job_id = registry.create({"url": "https://example.edu/people", "university": "Example University"})
+    cancelled = registry.create({"url": "https://other.edu/people", "university": "Other University"})
+    registry.update(cancelled, cancel_requested=1)
+    # Both runners (say, the app and service.py) recover and resubmit the queued jobs.
+    first = JobRunner(path, use_processes=False)
+    second = JobRunner(path, use_processes=False)
+    try:
+        for r in (first, second):
+            r.wait(job_id, timeout=10)
+            r.wait(cancelled, timeout=10)
+        assert registry.get(job_id)["status"] == "done"
+        assert registry.get(cancelled)["status"] == "cancelled"
+        assert calls == ["https://example.edu/people"]
+    finally:
+        first.shutdown()
+        second.shutdown()
+        registry.close()
@@ -88,5 +88,18 @@ def run_tests():
     else:
         print("⚠️ Case 3 Warning: AI returned non-Low confidence.")
 
+def test_hard_affiliation_match():
+    result = AuthorJudge(use_llm=False).judge_candidate(
+        {"name": "Test User"}, {"affiliations": ["University of Texas at Austin"], "papers": []}, "Austin"
+    )
+    assert result == {"confidence": "High", "reason": "Affiliation Hard Match"}
+
+def test_heuristic_without_llm():
+    judge = AuthorJudge(use_llm=False)
+    ai = {"affiliations": [], "papers": [{"title": "Deep Learning for Image Recognition"}, {"title": "Neural Networks in Practice"}]}
+    physics = {"affiliations": [], "papers": [{"title": "Quantum Entanglement in Superconductors"}]}
+    assert judge.judge_candidate({"bio": "Expert in Deep Learning and Neural Networks."}, ai, "Austin")["confidence"] == "Medium"
+    assert judge.judge_candidate({"bio": "Historian specializing in medieval Europe."}, physics, "Austin")["confidence"] == "Low"
+
 if __name__ == "__main__":
     run_tests()
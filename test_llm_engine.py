@@ -0,0 +1,165 @@
+import llm_engine
+from rate_limit import TokenBucket, backoff_delay, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = FakeResponse(headers)
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChoice:
+    def __init__(self, content):
+        self.message = FakeMessage(content)
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens=120, completion_tokens=80):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class FakeCompletion:
+    def __init__(self, content):
+        self.choices = [FakeChoice(content)]
+        self.usage = FakeUsage()
+
+
+class FakeClient:
+    """Mimics client.chat.completions.create, failing with the queued errors first."""
+
+    def __init__(self, errors=None, content="Summary text."):
+        self.errors = list(errors or [])
+        self.content = content
+        self.calls = 0
+        self.requests = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeCompletion(self.content)
+
+
+def test_token_bucket_waits_when_empty():
+    bucket = TokenBucket(rate=1000, capacity=2)
+    assert bucket.acquire(2) == 0
+    waited = bucket.acquire(1)
+    assert 0 < waited < 0.05
+
+def test_parse_retry_after_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 3.0 <= backoff_delay(0, base=1.0, retry_after=3.0) <= 3.5
+    for attempt in range(6):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= 8.0
+
+def test_complete_retries_on_429(monkeypatch):
+    sleeps = []
+    client = FakeClient(errors=[FakeStatusError(429, retry_after="2")])
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-test")
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    monkeypatch.setattr(llm_engine.time, "sleep", sleeps.append)
+
+    summary = llm_engine.summarize_from_bio("Works on databases.", name="Jane Doe", language="en")
+
+    assert summary == "Summary text."
+    assert client.calls == 2
+    assert sleeps and sleeps[0] >= 2.0
+
+def test_permanent_failure_is_distinct_from_empty(monkeypatch):
+    client = FakeClient(errors=[FakeStatusError(401)])
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+
+    summary = llm_engine.summarize_from_papers([{"title": "A Paper"}], name="Jane Doe")
+
+    assert not summary
+    assert isinstance(summary, llm_engine.LLMFailure)
+    assert "401" in summary.reason
+    assert client.calls == 1
+
+def test_get_client_is_shared(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-test")
+    assert llm_engine.get_client() is llm_engine.get_client()
+
+def test_multilingual_single_request_then_cache(monkeypatch):
+    from cache import DiskCache
+    monkeypatch.setattr(llm_engine, "_summary_cache", DiskCache("summary", path=":memory:"))
+    client = FakeClient(content='{"zh": "中文简介。", "en": "English bio."}')
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    papers = [{"title": "A Paper", "year": 2024}]
+
+    first = llm_engine.summarize_papers_multilingual(papers, name="Jane", languages=["zh", "en"], cache_key="s2:1")
+    assert first == {"zh": "中文简介。", "en": "English bio."}
+    assert client.calls == 1
+    # The multi-language prompt must not also ask for English only.
+    prompt = client.requests[0]["messages"][-1]["content"]
+    assert "in English" not in prompt and '"zh"' in prompt
+
+    again = llm_engine.summarize_papers_multilingual(papers, name="Jane", languages=["en", "zh"], cache_key="s2:1")
+    assert again == {"en": "English bio.", "zh": "中文简介。"}
+    assert client.calls == 1
+
+    # A new language is translated from a cached summary rather than regenerated.
+    client.content = '{"de": "Deutsche Bio."}'
+    more = llm_engine.summarize_papers_multilingual(papers, name="Jane", languages=["zh", "de"], cache_key="s2:1")
+    assert more["de"] == "Deutsche Bio."
+    assert client.calls == 2
+
+class FakeDelta:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChunk:
+    def __init__(self, content=None, usage=None):
+        self.choices = [type("Choice", (), {"delta": FakeDelta(content)})()] if content is not None else []
+        self.usage = usage
+
+
+class StreamingClient(FakeClient):
+    def create(self, **kwargs):
+        self.calls += 1
+        assert kwargs["stream"] is True
+        return iter([FakeChunk("Works "), FakeChunk("on HCI."), FakeChunk(usage=FakeUsage(50, 5))])
+
+def test_streaming_summary(monkeypatch):
+    from budget import RunBudget, use_budget
+    client = StreamingClient()
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    budget = RunBudget()
+    with use_budget(budget):
+        stream = llm_engine.summarize_from_bio("bio", name="Jane", language="en", stream=True)
+        deltas = list(stream)
+    assert deltas == ["Works ", "on HCI."]
+    assert stream.result == "Works on HCI."
+    assert budget.total_tokens == 55
+
+def test_multilingual_streams_single_language(monkeypatch):
+    client = StreamingClient()
+    monkeypatch.setattr(llm_engine, "get_client", lambda: client)
+    seen = []
+    result = llm_engine.summarize_bio_multilingual("bio", name="Jane", languages=["en"], on_delta=seen.append)
+    assert result == {"en": "Works on HCI."}
+    assert seen == ["Works ", "on HCI."]
+
+if __name__ == "__main__":
+    test_token_bucket_waits_when_empty()
+    test_parse_retry_after_and_backoff()
+    print("✅ Rate limit tests passed.")
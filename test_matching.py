@@ -0,0 +1,33 @@
+from matching import TitleIndex, has_anchor_paper
+
+PAPERS = [
+    {"title": "Interactive Robots for Everyone"},
+    {"title": None},
+    {"title": "Learning to Program Robots: A Survey of End-User Approaches"},
+    {"title": "Graph Neural Networks"},
+]
+
+
+def test_punctuation_and_case_variants_match():
+    assert has_anchor_paper(PAPERS, ["interactive robots, for everyone."])
+
+def test_subtitle_variants_match():
+    assert has_anchor_paper(PAPERS, ["Learning to Program Robots"])
+
+def test_short_titles_need_a_close_match():
+    assert not has_anchor_paper(PAPERS, ["Graph Networks"])
+    assert not has_anchor_paper(PAPERS, ["Robots"])
+
+def test_best_match_maps_back_to_original_positions():
+    index = TitleIndex(PAPERS)
+    assert len(index) == 3
+    position, score = index.best_match(["Unrelated Title", "Learning to program robots: a survey of end user approaches"])
+    assert position == 2
+    assert score == 100
+
+def test_scores_matrix_shape_and_threshold():
+    index = TitleIndex(PAPERS)
+    assert index.scores(["a", "b"]).shape == (2, 3)
+    assert index.best_match(["Interactive Robots for Every One"], threshold=100) is None
+    assert index.best_match([]) is None
+    assert TitleIndex([]).best_match(["Anything"]) is None
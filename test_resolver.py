@@ -0,0 +1,87 @@
+import resolver
+from resolver import Resolver, Stage, SearchStage, AffiliationStage, AnchorStage, KeywordSearchStage, JudgeStage
+
+CANDIDATES = [
+    {"authorId": "1", "name": "Jane Doe", "affiliations": ["Other University"], "paperCount": 10},
+    {"authorId": "2", "name": "Jane Doe", "affiliations": ["University of Wisconsin-Madison"], "paperCount": 3},
+    {"authorId": "3", "name": "J. Doe", "affiliations": [], "paperCount": 0},
+]
+PAPERS = {"1": [{"title": "Old Unrelated Work"}], "2": [{"title": "A Classic Study of Robots in Homes"}]}
+
+
+class FakeS2:
+    def __init__(self):
+        self.calls = []
+
+    def search_authors(self, query, fields, limit):
+        self.calls.append(("search", query))
+        return {"data": [dict(c) for c in CANDIDATES]}
+
+    def get_authors(self, ids, fields):
+        self.calls.append(("authors", tuple(ids)))
+        return {i: {"authorId": i, "papers": PAPERS.get(i, []), "paperCount": 3} for i in ids}
+
+
+class CountingStage(Stage):
+    name = "counting"
+
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, res):
+        self.runs += 1
+
+
+def fake(monkeypatch):
+    s2 = FakeS2()
+    monkeypatch.setattr(resolver, "search_authors", s2.search_authors)
+    monkeypatch.setattr(resolver, "get_authors", s2.get_authors)
+    return s2
+
+
+def test_affiliation_resolves_after_one_call(monkeypatch):
+    s2 = fake(monkeypatch)
+    expensive = CountingStage()
+    result = Resolver([SearchStage(), AffiliationStage(), expensive]).resolve("Jane Doe", "Wisconsin")
+    assert result["authorId"] == "2"
+    assert result["resolved_by"] == "affiliation"
+    assert result["is_confident_match"]
+    assert expensive.runs == 0
+    assert s2.calls == [("search", "Jane Doe Wisconsin")]
+
+def test_anchors_override_affiliation_order(monkeypatch):
+    s2 = fake(monkeypatch)
+    result = Resolver().resolve("Jane Doe", "Other", anchors=["A classic study of robots in homes"])
+    assert result["authorId"] == "2"
+    assert result["resolved_by"] == "anchors"
+    assert result["evidence"] == ["anchor_paper"]
+    # The affiliation-matched candidate is checked first, then the next wave.
+    assert s2.calls[1:] == [("authors", ("1",)), ("authors", ("2",))]
+
+def test_below_threshold_is_not_confident(monkeypatch):
+    fake(monkeypatch)
+    result = Resolver([SearchStage(), AffiliationStage()]).resolve("Jane Doe", "Nowhere")
+    assert result["is_confident_match"] is False
+    assert result["resolved_by"] is None
+    assert result["stages_run"] == ["search", "affiliation"]
+    # Authors without papers are never candidates.
+    assert result["authorId"] in {"1", "2"}
+
+def test_keyword_stage_only_runs_with_keyword(monkeypatch):
+    s2 = fake(monkeypatch)
+    Resolver([SearchStage(), KeywordSearchStage()]).resolve("Jane Doe", "Nowhere")
+    assert len(s2.calls) == 1
+    result = Resolver([SearchStage(), KeywordSearchStage()], threshold=0.5).resolve("Jane Doe", "Nowhere", keyword="Robots")
+    assert result["resolved_by"] == "keyword_search"
+    assert result["authorId"] == "1"
+
+def test_judge_stage(monkeypatch):
+    fake(monkeypatch)
+
+    class StubJudge:
+        def judge_candidate(self, scraped, s2_author, target_uni):
+            return {"confidence": "High", "reason": "stub"}
+
+    result = Resolver([SearchStage(), JudgeStage(StubJudge())]).resolve("Jane Doe", "Nowhere")
+    assert result["resolved_by"] == "judge"
+    assert result["evidence"] == ["judge:High"]
@@ -0,0 +1,93 @@
+import os
+import shutil
+from openpyxl import load_workbook
+from result_store import ResultStore, slugify
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def fill(store, university, rows):
+    with store.open_run(university, url="https://example.edu", languages=["zh"]) as run:
+        for row in rows:
+            run.append(row)
+    return run.meta["run_id"]
+
+
+def test_query_prunes_partitions_and_columns(tmp_path):
+    store = ResultStore(str(tmp_path))
+    fill(store, "MIT", [
+        {"Name": "A", "Research_Summary": "s1", "Data_Source": "S2_Verified"},
+        {"Name": "B", "Research_Summary": "s2", "Data_Source": "Web_Bio"},
+    ])
+    fill(store, "Stanford University", [{"Name": "C", "Data_Source": "S2_Verified", "Research_Summary_EN": "en"}])
+    rows = list(store.query(columns=["Name"], where={"Data_Source": "S2_Verified"}))
+    assert [(r["Name"], r["_university"]) for r in rows] == [("A", "MIT"), ("C", "Stanford University")]
+    assert list(store.query(columns=["Name"], universities=["stanford university"]))[0]["Name"] == "C"
+    run = store.runs(["MIT"])[0]
+    assert run["status"] == "complete"
+    assert run["rows"] == 2
+    assert run["sources"] == {"S2_Verified": 1, "Web_Bio": 1}
+
+def test_late_columns_stay_aligned(tmp_path):
+    store = ResultStore(str(tmp_path))
+    fill(store, "MIT", [{"Name": "A"}, {"Name": "B", "Email": "b@mit.edu"}])
+    assert [r["Email"] for r in store.query(columns=["Email"])] == [None, "b@mit.edu"]
+    assert [r["Name"] for r in store.query(columns=["Name"], start=1)] == ["B"]
+
+def test_latest_only_and_interrupted_runs(tmp_path):
+    store = ResultStore(str(tmp_path))
+    fill(store, "MIT", [{"Name": "old"}])
+    try:
+        with store.open_run("MIT") as run:
+            run.append({"Name": "new"})
+            raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    assert [r["Name"] for r in store.query(columns=["Name"], latest_only=True)] == ["new"]
+    assert store.runs(status="interrupted")[0]["rows"] == 1
+    assert [r["Name"] for r in store.query(columns=["Name"], status="complete")] == ["old"]
+
+def test_ingest_existing_workbooks_and_export(tmp_path):
+    store = ResultStore(str(tmp_path / "store"))
+    name = "Massachusetts_Institute_of_Technology_20251227_2242.xlsx"
+    shutil.copy(os.path.join(REPO, name), tmp_path / name)
+    store.ingest_excel(str(tmp_path / name))
+    run = store.runs()[0]
+    assert run["university"] == "Massachusetts Institute of Technology"
+    assert run["started_at"] == "2025-12-27T22:42:00"
+    assert slugify(run["university"]) in run["partition"]
+    out = str(tmp_path / "verified.xlsx")
+    count = store.export_excel(out, columns=["Name", "Data_Source"], where={"Data_Source": "S2_Verified"})
+    sheet = load_workbook(out).active
+    assert sheet.max_row == count + 1
+    assert [c.value for c in sheet[1]] == ["Name", "Data_Source", "_university", "_run_id"]
+
+def test_changed_at_tracks_run_index(tmp_path):
+    store = ResultStore(str(tmp_path / "results"))
+    assert store.changed_at() == 0
+    run = store.open_run("Example University")
+    started = store.changed_at()
+    assert started
+    run.close()
+    assert store.changed_at() >= started
+
+def test_new_rows_reads_on_from_the_offset_and_aborts_stale_runs(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "results"))
+    run = store.open_run("MIT")
+    run.append({"Name": "A"})
+    synced = {}
+    assert [[r["Name"] for r in rows] for _, rows in store.new_rows(synced)] == [["A"]]
+    run.append({"Name": "B"})
+    assert [[r["Name"] for r in rows] for _, rows in store.new_rows(synced)] == [["B"]]
+    # The writer's process dies: the run stays "running" and nothing is written any more.
+    path = os.path.join(store.root, run.meta["partition"])
+    for name in os.listdir(path):
+        os.utime(os.path.join(path, name), (0, 0))
+    # Marked aborted once (no new rows, only the new status to record) ...
+    assert list(store.new_rows(synced)) == [(store.runs()[0], [])]
+    assert store.runs()[0]["status"] == "aborted" and store.runs()[0]["rows"] == 2
+    # ... and never scanned again.
+    scans = []
+    monkeypatch.setattr(store, "_scan", lambda *args, **kwargs: scans.append(args) or iter(()))
+    assert list(store.new_rows(synced)) == []
+    assert scans == []
@@ -0,0 +1,274 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import cache
+import s2_client
+import s2_local
+from rate_limit import RateLimiter
+
+AUTHORS = {
+    "1": {
+        "authorId": "1", "name": "Jane Doe", "affiliations": ["Other University"], "paperCount": 1,
+        "papers": [
+            {"paperId": "p1", "title": "Old Unrelated Work", "year": 2010, "citationCount": 5},
+        ],
+    },
+    "2": {
+        "authorId": "2", "name": "Jane Doe", "affiliations": ["University of Wisconsin-Madison"], "paperCount": 4,
+        "papers": [
+            {"paperId": "p2", "title": "Interactive Robots for Everyone", "year": 2099, "citationCount": 12},
+            {"paperId": "p4", "title": "Robots in the Classroom", "year": 2098, "citationCount": 3},
+            {"paperId": "p5", "title": "Teaching Robots by Demonstration", "year": 2097, "citationCount": 1},
+            {"paperId": "p3", "title": "A Classic Study", "year": 2001, "citationCount": 400},
+        ],
+    },
+    "3": {
+        "authorId": "3", "name": "J. Doe", "affiliations": [], "paperCount": 0, "papers": [],
+    },
+}
+TLDRS = {"p2": {"model": "tldr@v2", "text": "Robots that anyone can program."}}
+
+
+class MockS2Handler(BaseHTTPRequestHandler):
+    """Serves the subset of the S2 Graph API used by s2_client from in-memory fixtures."""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fields(self, query):
+        return set(query.get("fields", [""])[0].split(","))
+
+    def _author(self, author, fields):
+        # Like the real API, ids are always returned.
+        out = {k: v for k, v in author.items() if k in fields or k == "authorId"}
+        paper_fields = {f.split(".", 1)[1] for f in fields if f.startswith("papers.")}
+        if paper_fields:
+            out["papers"] = [{k: v for k, v in p.items() if k in paper_fields} for p in author["papers"]]
+        return out
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.calls.append(("GET", url.path))
+        if self.server.throttle:
+            self.server.throttle -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0.05")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path == "/author/search":
+            fields = self._fields(query)
+            data = [self._author(a, fields) for a in AUTHORS.values()]
+            return self._send(200, {"total": len(data), "offset": 0, "data": data})
+        parts = url.path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "author" and parts[2] == "papers" and parts[1] in AUTHORS:
+            since = query.get("publicationDateOrYear", [None])[0]
+            if self.server.papers_error:
+                status, body = self.server.papers_error
+                self.server.papers_error = None
+                return self._send(status, body)
+            if since and self.server.reject_date_filter:
+                return self._send(400, {"error": "Unrecognized parameter publicationDateOrYear"})
+            fields = self._fields(query)
+            papers = sorted(AUTHORS[parts[1]]["papers"], key=lambda p: p["year"], reverse=True)
+            if since:
+                papers = [p for p in papers if p["year"] >= int(since.rstrip(":"))]
+            offset, limit = int(query["offset"][0]), int(query["limit"][0])
+            page = [{k: v for k, v in p.items() if k in fields or k == "paperId"} for p in papers[offset:offset + limit]]
+            body = {"offset": offset, "data": page}
+            if offset + limit < len(papers):
+                body["next"] = offset + limit
+            return self._send(200, body)
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        ids = json.loads(self.rfile.read(length) or b"{}").get("ids", [])
+        self.server.calls.append(("POST", url.path))
+        self.server.batch_ids.append(ids)
+        fields = self._fields(query)
+        if url.path == "/author/batch":
+            return self._send(200, [self._author(AUTHORS[i], fields) if i in AUTHORS else None for i in ids])
+        if url.path == "/paper/batch":
+            return self._send(200, [{"paperId": i, "tldr": TLDRS.get(i)} for i in ids])
+        self._send(404, {"error": "not found"})
+
+
+@pytest.fixture
+def mock_s2(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, "DEFAULT_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(s2_client, "_s2_caches", {})
+    fast = RateLimiter(rate=1000, burst=100)
+    monkeypatch.setattr(s2_client, "_limiters", {False: fast, True: fast})
+    monkeypatch.setattr(s2_client, "_date_filter_supported", True)
+    # Far-future fixture years keep the recency window stable.
+    monkeypatch.setattr(s2_client, "_current_year", lambda: 2099)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockS2Handler)
+    server.calls = []
+    server.batch_ids = []
+    server.throttle = 0
+    server.reject_date_filter = False
+    server.papers_error = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(s2_client, "S2_API_BASE", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_verification_by_anchor(mock_s2):
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"])
+    assert result["authorId"] == "2"
+    assert [p["paperId"] for p in result["papers"]] == ["p2", "p4", "p5"]
+    assert result["papers"][0]["tldr"]["text"] == "Robots that anyone can program."
+    # One search, one author batch for the best pre-scored candidate, one recent-papers page, one paper batch for tldrs.
+    assert mock_s2.calls == [
+        ("GET", "/author/search"), ("POST", "/author/batch"), ("GET", "/author/2/papers"), ("POST", "/paper/batch"),
+    ]
+    assert mock_s2.batch_ids[0] == ["2"]
+
+def test_recent_papers_are_paginated(mock_s2, monkeypatch):
+    monkeypatch.setattr(s2_client, "AUTHOR_PAPERS_PAGE", 2)
+    papers = s2_client.fetch_recent_papers("2", 2097)
+    assert [p["paperId"] for p in papers] == ["p2", "p4", "p5"]
+    assert mock_s2.calls == [("GET", "/author/2/papers")] * 2
+
+def test_recent_papers_stop_early_without_date_filter(mock_s2, monkeypatch):
+    monkeypatch.setattr(s2_client, "AUTHOR_PAPERS_PAGE", 2)
+    mock_s2.reject_date_filter = True
+    papers = s2_client.fetch_recent_papers("2", 2098)
+    assert [p["paperId"] for p in papers] == ["p2", "p4"]
+    # Rejected filtered request, then page 1 and page 2; page 2 is entirely too old, so paging stops.
+    assert mock_s2.calls == [("GET", "/author/2/papers")] * 3
+    assert s2_client._date_filter_supported is False
+
+@pytest.mark.parametrize("status, body", [(503, {"error": "Service Unavailable"}), (400, {"error": "Bad offset"})])
+def test_other_failures_keep_the_date_filter(mock_s2, monkeypatch, status, body):
+    monkeypatch.setattr(s2_client, "S2_MAX_RETRIES", 0)
+    mock_s2.papers_error = (status, body)
+    assert s2_client.fetch_recent_papers("2", 2098) == []
+    assert s2_client._date_filter_supported is True
+    assert [p["paperId"] for p in s2_client.fetch_recent_papers("2", 2098)] == ["p2", "p4"]
+
+def test_tldrs_only_for_summarized_papers(mock_s2, monkeypatch):
+    monkeypatch.setattr(s2_client, "TLDR_TOP_K", 1)
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"])
+    assert len(result["papers"]) == 3
+    assert mock_s2.batch_ids[-1] == ["p2"]
+
+def test_anchor_titles_match_fuzzily(mock_s2):
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A classic study."])
+    assert result["authorId"] == "2"
+
+def test_later_waves_when_best_candidate_fails(mock_s2):
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Other", anchor_papers=["A Classic Study"])
+    assert result["authorId"] == "2"
+    # Author 1 ranks first on affiliation, author 2 comes in the next wave, author 3 has no papers.
+    assert mock_s2.batch_ids[:2] == [["1"], ["2"]]
+
+def test_batch_verification_by_affiliation(mock_s2):
+    result = s2_client.search_and_fetch_papers("Jane Doe", "University of Wisconsin-Madison")
+    assert result["authorId"] == "2"
+    # Affiliation comes with the search results, so no author details are needed.
+    assert ("POST", "/author/batch") not in mock_s2.calls
+
+def test_no_confident_match(mock_s2):
+    assert s2_client.search_and_fetch_papers("Jane Doe", "Nowhere", anchor_papers=["Unknown Title"]) is None
+
+def test_cache_serves_repeat_lookups(mock_s2):
+    s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"])
+    mock_s2.calls.clear()
+    result = s2_client.search_and_fetch_papers("  jane doe,", "WISCONSIN ", anchor_papers=["A Classic Study"])
+    assert result["authorId"] == "2"
+    # Search and author details come from the cache; only the tldr batch goes out.
+    assert mock_s2.calls == [("POST", "/paper/batch")]
+
+def test_negative_results_are_cached(mock_s2):
+    assert s2_client.get_authors(["404"], "name") == {}
+    assert s2_client.get_authors(["404", "1"], "name") == {"1": {"authorId": "1", "name": "Jane Doe"}}
+    assert s2_client.get_authors(["404"], "name") == {}
+    assert mock_s2.calls == [("POST", "/author/batch"), ("POST", "/author/batch")]
+
+def test_retry_after_pauses_and_retries(mock_s2):
+    mock_s2.throttle = 2
+    result = s2_client.search_authors("Jane Doe", "authorId,name", 5)
+    assert len(result["data"]) == len(AUTHORS)
+    assert mock_s2.calls == [("GET", "/author/search")] * 3
+    metrics = s2_client.rate_limit_metrics()
+    assert metrics["acquired"] == 3
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_wait_s"] >= 0.04
+
+def test_transport_errors_are_retried(mock_s2, monkeypatch):
+    import requests
+    session, failures = s2_client.http_session(), []
+
+    class Flaky:
+        def request(self, *args, **kwargs):
+            if len(failures) < 2:
+                failures.append(args)
+                raise requests.ConnectionError("connection reset")
+            return session.request(*args, **kwargs)
+
+    monkeypatch.setattr(s2_client, "http_session", Flaky)
+    monkeypatch.setattr(s2_client, "backoff_delay", lambda *args, **kwargs: 0)
+    assert len(s2_client.search_authors("Jane Doe", "authorId,name", 5)["data"]) == len(AUTHORS)
+    assert len(failures) == 2
+    monkeypatch.setattr(s2_client, "S2_MAX_RETRIES", 1)
+    failures.clear()
+    assert s2_client._s2_request("GET", "/author/search", params={"query": "x"}) is None
+    assert len(failures) == 2
+
+def test_limiter_spaces_requests():
+    limiter = RateLimiter(rate=50, burst=1)
+    waits = [limiter.acquire() for _ in range(3)]
+    assert waits[0] < 0.005
+    assert 0.01 < waits[2] < 0.05
+    limiter.pause(0.03)
+    assert limiter.acquire() >= 0.025
+
+def test_local_index_answers_without_api(mock_s2, monkeypatch, tmp_path):
+    from test_s2_local import write_dump
+    path = str(tmp_path / "s2.sqlite")
+    s2_local.LocalS2Index(path).ingest(write_dump(tmp_path))
+    monkeypatch.setattr(s2_local, "S2_LOCAL_INDEX", path)
+    monkeypatch.setattr(s2_local, "_index", None)
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"])
+    assert result["authorId"] == "10"
+    assert result["papers"][0]["tldr"]["text"] == "Robots that anyone can program."
+    assert mock_s2.calls == []
+    # People missing from the dump still go to the live API.
+    assert s2_client.get_authors(["2"], "name") == {"2": {"authorId": "2", "name": "Jane Doe"}}
+    assert mock_s2.calls == [("POST", "/author/batch")]
+
+def test_prefetch_takes_search_off_the_critical_path(mock_s2):
+    handle = s2_client.prefetch_author("Jane Doe", "Wisconsin")
+    assert mock_s2.calls == [("GET", "/author/search"), ("POST", "/author/batch")]
+    mock_s2.calls.clear()
+    result = s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"], prefetched=handle)
+    assert result["authorId"] == "2"
+    assert result["resolved_by"] == "anchors"
+    # Search and the first candidate's titles were already fetched speculatively.
+    assert mock_s2.calls == [("GET", "/author/2/papers"), ("POST", "/paper/batch")]
+
+def test_prefetch_for_another_name_is_ignored(mock_s2, monkeypatch):
+    monkeypatch.setenv("S2_CACHE_DISABLED", "1")
+    handle = s2_client.prefetch_author("J. Doe", "Wisconsin")
+    mock_s2.calls.clear()
+    s2_client.search_and_fetch_papers("Jane Doe", "Wisconsin", anchor_papers=["A Classic Study"], prefetched=handle)
+    assert mock_s2.calls[0] == ("GET", "/author/search")
@@ -0,0 +1,61 @@
+import gzip
+import json
+import pytest
+from s2_local import LocalS2Index
+
+# A tiny dump in the bulk-dataset format (lowercase keys, corpus ids, separate tldr file).
+AUTHORS = [
+    {"authorid": "10", "name": "Jane Doe", "affiliations": ["University of Wisconsin-Madison"], "papercount": 2, "citationcount": 412},
+    {"authorid": "11", "name": "Jane Doe", "affiliations": ["Other University"], "papercount": 1, "citationcount": 5},
+    {"authorid": "12", "name": "John Smith", "affiliations": ["University of Wisconsin-Madison"], "papercount": 1, "citationcount": 1},
+]
+PAPERS = [
+    {"corpusid": 100, "title": "Interactive Robots for Everyone", "year": 2099, "citationcount": 12,
+     "authors": [{"authorId": "10", "name": "Jane Doe"}, {"authorId": "12", "name": "John Smith"}]},
+    {"corpusid": 101, "title": "A Classic Study", "year": 2001, "citationcount": 400, "authors": [{"authorId": "10"}]},
+    {"corpusid": 102, "title": "Old Unrelated Work", "year": 2010, "citationcount": 5, "authors": [{"authorId": "11"}]},
+]
+TLDRS = [{"corpusid": 100, "model": "tldr@v2", "text": "Robots that anyone can program."}]
+
+
+def write_dump(directory):
+    paths = []
+    for name, records in (("authors.jsonl.gz", AUTHORS), ("papers.jsonl", PAPERS), ("tldrs.jsonl", TLDRS)):
+        path = directory / name
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(r) for r in records) + "\n")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = LocalS2Index(str(tmp_path / "s2.sqlite"))
+    assert idx.ingest(write_dump(tmp_path)) == {"authors": 3, "papers": 3, "tldrs": 1}
+    yield idx
+    idx.close()
+
+
+def test_search_ranks_name_and_affiliation(index):
+    result = index.search_authors("Jane Doe Wisconsin", "authorId,name,affiliations", 5)
+    assert [a["authorId"] for a in result["data"][:2]] == ["10", "11"]
+    assert set(result["data"][0]) == {"authorId", "name", "affiliations"}
+    assert index.search_authors("Nobody", "name", 5)["data"] == []
+
+def test_get_authors_with_papers(index):
+    found = index.get_authors(["10", "404"], "name,papers.title,papers.year")
+    assert list(found) == ["10"]
+    assert found["10"]["papers"] == [
+        {"title": "Interactive Robots for Everyone", "year": 2099},
+        {"title": "A Classic Study", "year": 2001},
+    ]
+
+def test_tldrs_and_recent_papers(index):
+    assert index.get_papers(["100"], "paperId,tldr")["100"]["tldr"]["text"] == "Robots that anyone can program."
+    assert [p["paperId"] for p in index.recent_papers("10", 2020)] == ["100"]
+
+def test_reingest_replaces_rows(index, tmp_path):
+    index.ingest(write_dump(tmp_path))
+    assert len(index) == 3
+    assert len(index.get_authors(["10"], "papers.title")["10"]["papers"]) == 2
@@ -0,0 +1,94 @@
+import pytest
+from result_store import ResultStore
+from search_index import SearchIndex, fts_query
+
+
+def row(name, keywords, summary, title="Professor", source="S2_Verified"):
+    return {"Name": name, "Title": title, "Profile_Link": f"https://x.edu/{name.replace(' ', '_')}",
+            "Research_Keywords": keywords, "Research_Summary": summary, "Data_Source": source}
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results"))
+    with store.open_run("University of Wisconsin-Madison") as run:
+        run.append(row("Jane Doe", "federated learning, privacy", "Jane studies federated learning on phones."))
+        run.append(row("John Smith", "robotics", "Robots that learn from people.", title="Assistant Professor"))
+    with store.open_run("Purdue University") as run:
+        run.append(row("Ada Lovelace", "compilers", "Ada builds compilers; some federated systems.", source="Web_Bio"))
+    return store
+
+@pytest.fixture
+def index(tmp_path, store):
+    idx = SearchIndex(str(tmp_path / "search.sqlite"))
+    assert idx.sync(store) == 3
+    yield idx
+    idx.close()
+
+
+def test_fts_query_quotes_terms():
+    assert fts_query('federated "machine learning" robot* OR') == '"federated" "machine learning" "robot"* "OR"'
+    assert fts_query("  ") == ""
+
+def test_bm25_ranking_and_snippet(index):
+    hits = index.search("federated")
+    assert [h["Name"] for h in hits] == ["Jane Doe", "Ada Lovelace"]
+    assert "**federated**" in hits[0]["Snippet"]
+    assert [h["Name"] for h in index.search("federated learning")] == ["Jane Doe"]
+    assert [h["Name"] for h in index.search("robot*")] == ["John Smith"]
+
+def test_filters(index):
+    assert [h["Name"] for h in index.search("federated", universities=["purdue university"])] == ["Ada Lovelace"]
+    assert [h["Name"] for h in index.search("federated", sources=["S2_Verified"])] == ["Jane Doe"]
+    assert index.search("federated", title="Assistant") == []
+    assert index.universities() == ["Purdue University", "University of Wisconsin-Madison"]
+
+def test_sync_is_incremental_and_latest_run_wins(index, store):
+    assert index.sync(store) == 0
+    with store.open_run("Purdue University") as run:
+        run.append(row("Ada Lovelace", "quantum", "Ada moved on to quantum computing."))
+    assert index.sync(store) == 1
+    assert len(index) == 3
+    assert index.search("compilers") == []
+    assert index.search("quantum")[0]["Data_Source"] == "S2_Verified"
+
+def test_cjk_text_is_searchable(tmp_path):
+    idx = SearchIndex(str(tmp_path / "search.sqlite"))
+    idx.add([row("张伟", "联邦学习, 隐私计算", "研究联邦学习与隐私保护。", title="副教授"),
+             row("李娜", "机器人", "研究机器人学习。", title="教授")], "清华大学")
+    assert [h["Name"] for h in idx.search("联邦学习")] == ["张伟"]
+    assert sorted(h["Name"] for h in idx.search("学习")) == ["张伟", "李娜"]
+    assert idx.search("联邦学习")[0]["Snippet"] == "研究**联邦学习**与隐私保护。"
+    assert [h["Name"] for h in idx.search("学习", title="副教授")] == ["张伟"]
+    assert len(idx.search("学习", title="教授")) == 2
+    idx.close()
+
+def test_placeholder_summaries_are_not_indexed(tmp_path):
+    idx = SearchIndex(str(tmp_path / "search.sqlite"))
+    idx.add([row("Jane Doe", "privacy", "No data available.", source="Empty"),
+             row("John Smith", "robotics", "Summary generation failed.", source="LLM_Failed")], "MIT")
+    assert idx.search("available") == []
+    assert idx.search("generation failed") == []
+    assert [h["Name"] for h in idx.search("robotics")] == ["John Smith"]
+    idx.close()
+
+def test_old_index_files_are_reindexed(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "search.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE faculty (id INTEGER PRIMARY KEY, university_slug TEXT NOT NULL, person_key TEXT NOT NULL,
+            university TEXT, run_id TEXT, name TEXT, title TEXT, email TEXT, profile_link TEXT,
+            data_source TEXT, keywords TEXT, summary TEXT, UNIQUE (university_slug, person_key));
+        CREATE VIRTUAL TABLE faculty_fts USING fts5(name, keywords, summary, content='faculty', content_rowid='id');
+        CREATE TRIGGER faculty_ai AFTER INSERT ON faculty BEGIN
+            INSERT INTO faculty_fts (rowid, name, keywords, summary) VALUES (new.id, new.name, new.keywords, new.summary);
+        END;
+        INSERT INTO faculty (university_slug, person_key, university, name, title, data_source, keywords, summary)
+        VALUES ('mit', 'wang', 'MIT', 'Wang Fang', 'Professor', 'S2_Verified', '量子计算', 'Quantum computing.'),
+               ('mit', 'li', 'MIT', 'Li Lei', 'Professor', 'Empty', '', 'No data available.');
+    """)
+    conn.close()
+    idx = SearchIndex(path)
+    assert [h["Name"] for h in idx.search("量子", sources=["S2_Verified"], title="Prof")] == ["Wang Fang"]
+    assert idx.search("available") == []
+    idx.close()
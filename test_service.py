@@ -0,0 +1,70 @@
+import json
+import pytest
+import requests
+import main
+import result_store
+import search_index
+import similarity
+from jobs import JobRunner
+from service import ScholarScoutService
+from test_jobs import fake_process
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "process_faculty_url", fake_process)
+    monkeypatch.setattr(result_store, "DEFAULT_ROOT", str(tmp_path / "results"))
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_PATH", str(tmp_path / "search.sqlite"))
+    monkeypatch.setattr(similarity, "SIMILARITY_INDEX_DIR", str(tmp_path / "similarity"))
+    runner = JobRunner(str(tmp_path / "jobs.sqlite"), use_processes=False)
+    svc = ScholarScoutService(("127.0.0.1", 0), runner)
+    svc.start()
+    yield f"http://127.0.0.1:{svc.server_port}"
+    svc.stop()
+
+
+def test_submit_stream_and_status(service):
+    resp = requests.post(f"{service}/jobs", json={"url": "https://example.edu/slow", "university": "Example University"})
+    assert resp.status_code == 202
+    job_id = resp.json()["id"]
+    assert resp.json()["reused"] is False
+
+    with requests.get(f"{service}/jobs/{job_id}/rows", params={"stream": 1}, stream=True, timeout=10) as stream:
+        names = [json.loads(line)["Name"] for line in stream.iter_lines() if line]
+    assert names == ["Jane Doe", "John Smith", "Ada Lovelace"]
+
+    job = requests.get(f"{service}/jobs/{job_id}").json()
+    assert job["status"] == "done" and job["rows"] == 3
+    assert requests.get(f"{service}/jobs/{job_id}/rows", params={"offset": 2}).json()["rows"][0]["Name"] == "Ada Lovelace"
+    again = requests.post(f"{service}/jobs", json={"url": "https://example.edu/slow", "university": "Example University"})
+    assert again.json() == {**again.json(), "id": job_id, "reused": True}
+    assert requests.get(f"{service}/health").json()["jobs"] == 1
+
+def test_errors(service):
+    assert requests.get(f"{service}/jobs/nope").status_code == 404
+    assert requests.post(f"{service}/jobs", json={"url": "https://example.edu"}).status_code == 400
+    assert requests.post(f"{service}/jobs", data="not json").status_code == 400
+    assert requests.post(f"{service}/jobs", json=["https://example.edu"]).status_code == 400
+    assert requests.post(f"{service}/jobs", json={"url": 1, "university": "U"}).status_code == 400
+    assert requests.get(f"{service}/jobs", params={"limit": "ten"}).status_code == 400
+    job_id = requests.post(f"{service}/jobs", json={"url": "https://example.edu", "university": "U"}).json()["id"]
+    assert requests.get(f"{service}/jobs/{job_id}/rows", params={"offset": "x"}).status_code == 400
+    assert requests.get(f"{service}/jobs/{job_id}/rows", params={"offset": -1}).status_code == 400
+
+def test_stream_reads_only_new_rows(service, monkeypatch):
+    calls, results = [], JobRunner.results
+
+    def recording(self, job_id, offset=0):
+        rows = results(self, job_id, offset)
+        calls.append((offset, len(rows)))
+        return rows
+
+    monkeypatch.setattr(JobRunner, "results", recording)
+    job_id = requests.post(f"{service}/jobs", json={"url": "https://example.edu/slow", "university": "U"}).json()["id"]
+    with requests.get(f"{service}/jobs/{job_id}/rows", params={"stream": 1}, stream=True, timeout=10) as stream:
+        assert len([line for line in stream.iter_lines() if line]) == 3
+    assert len(calls) > 1
+    sent = 0
+    for offset, count in calls:
+        assert offset == sent
+        sent += count
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from result_store import ResultStore
+from similarity import SimilarityIndex, vectorize, row_fields
+
+PEOPLE = [
+    {"Name": "Jane Doe", "Research_Keywords": "federated learning, privacy",
+     "Research_Summary": "Federated learning with differential privacy on mobile devices."},
+    {"Name": "John Smith", "Research_Keywords": "robotics",
+     "Research_Summary": "Robot manipulation and grasping with reinforcement learning."},
+    {"Name": "Ada Lovelace", "Research_Keywords": "databases",
+     "Research_Summary": "Query optimization for databases.", "S2_Paper_Titles": ["Federated analytics under differential privacy"]},
+    {"Name": "Li Wei", "Research_Summary": "研究联邦学习与隐私保护。"},
+]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results"))
+    with store.open_run("Example University") as run:
+        for row in PEOPLE:
+            run.append(row)
+    return store
+
+
+def test_vectorize_is_stable_and_sorted():
+    indices, values = vectorize({"summary": "Robot learning, robot grasping"})
+    assert list(indices) == sorted(indices)
+    again = vectorize({"summary": "Robot learning, robot grasping"})
+    assert np.array_equal(indices, again[0]) and np.allclose(values, again[1])
+    assert len(vectorize({"summary": "the of and"})[0]) == 0
+
+def test_batch_query_and_similar(tmp_path, store):
+    index = SimilarityIndex(str(tmp_path / "sim"))
+    assert index.sync(store) == 4
+    federated, robots, chinese = index.query(["federated learning and privacy", "robot grasping", "联邦学习"], k=2)
+    assert federated[0]["Name"] == "Jane Doe"
+    assert robots[0]["Name"] == "John Smith"
+    assert chinese[0]["Name"] == "Li Wei"
+    similar = index.similar("jane doe")
+    assert "Jane Doe" not in [h["Name"] for h in similar]
+    # Paper titles count as evidence too.
+    assert similar[0]["Name"] == "Ada Lovelace"
+
+def test_incremental_sync_and_memory_mapped_reload(tmp_path, store):
+    index = SimilarityIndex(str(tmp_path / "sim"))
+    index.sync(store)
+    with store.open_run("Example University") as run:
+        run.append({"Name": "John Smith", "Research_Keywords": "privacy",
+                    "Research_Summary": "Privacy attacks on federated learning."})
+    assert index.sync(store) == 1
+    assert len(index) == 4
+    reloaded = SimilarityIndex(str(tmp_path / "sim"))
+    assert not reloaded._segments[0][1].data.flags.owndata
+    assert reloaded.sync(store) == 0
+    assert reloaded.similar("Jane Doe")[0]["Name"] == "John Smith"
+    reloaded.compact()
+    assert len(reloaded.docs) == 4
+    assert reloaded.similar("Jane Doe")[0]["Name"] == "John Smith"
+    assert index.query(["robot grasping"], universities=["Other University"]) == [[]]
+
+def test_stale_instances_share_the_directory(tmp_path, store):
+    path = str(tmp_path / "sim")
+    first, second = SimilarityIndex(path), SimilarityIndex(path)
+    assert first.sync(store) == 4
+    with store.open_run("Other University") as run:
+        run.append({"Name": "Grace Hopper", "Research_Summary": "Compilers for robot controllers."})
+    # `second` was loaded before `first` saved: it must pick that up, not index the rows again.
+    assert second.sync(store) == 1
+    assert len(second) == 5
+    assert first.query(["compilers"])[0][0]["Name"] == "Grace Hopper"
+    reopened = SimilarityIndex(path)
+    assert len(reopened.docs) == 5
+    segments = sorted(p.name for p in (tmp_path / "sim").iterdir() if p.name.startswith("seg_"))
+    assert segments == sorted(name for name, _ in reopened._segments)
+    assert not list((tmp_path / "sim").glob("*.tmp"))
+    first.compact()
+    assert len([p for p in (tmp_path / "sim").iterdir() if p.name.startswith("seg_")]) == 1
+    assert second.similar("Jane Doe")[0]["Name"] == "Ada Lovelace"
+
+def test_placeholder_summaries_are_not_features(tmp_path):
+    failed = {"Name": "Bob Ray", "Research_Keywords": "compilers", "Research_Summary": "Summary generation failed.",
+              "Data_Source": "LLM_Failed"}
+    assert row_fields(failed)["summary"] == ""
+    index = SimilarityIndex(str(tmp_path / "sim"))
+    empty = {"Name": "Eve Stone", "Research_Summary": "No data available.", "Data_Source": "Empty"}
+    assert index.add([failed, empty], "Example University") == 1  # Eve has no text left to index
+    assert index.query(["summary generation failed"])[0] == []
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+import pytest
+
+# Cold import budget (ms) for the entry points; they used to take over a second.
+IMPORT_BUDGET_MS = 800
+# Imported only on the code path that needs them.
+LAZY_MODULES = ("openai", "pandas", "scipy", "search_index", "similarity")
+
+
+def import_profile(module: str):
+    """Runs `python -X importtime -c 'import <module>'` in a fresh interpreter."""
+    code = f"import sys, {module}; print(','.join(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    total = None
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            total = int(parts[1]) / 1000
+    return total, set(proc.stdout.strip().split(","))
+
+@pytest.mark.parametrize("module", ["main", "jobs"])
+def test_entry_points_import_fast_and_lazily(module):
+    elapsed_ms, loaded = import_profile(module)
+    assert elapsed_ms is not None and elapsed_ms < IMPORT_BUDGET_MS, f"import {module} took {elapsed_ms:.0f} ms"
+    assert not loaded & set(LAZY_MODULES)
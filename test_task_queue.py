@@ -0,0 +1,121 @@
+import time
+import multiprocessing
+import pytest
+import task_queue
+import result_store
+import search_index
+import similarity
+from budget import RunBudget, BudgetExceeded
+from task_queue import TaskQueue, TaskDeferred, run_worker, collect
+
+
+def slow_square(payload):
+    time.sleep(0.05)
+    return {"n": payload["n"], "square": payload["n"] ** 2, "worker": multiprocessing.current_process().name}
+
+def drain(path, name):
+    return run_worker(path, slow_square, worker=name, lease_seconds=5)
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite"))
+    assert queue.enqueue("c", [{"n": 1}, {"n": 2}]) == 2
+    assert queue.enqueue("c", [{"n": 2}, {"n": 3}]) == 1
+    assert queue.stats("c") == {"queued": 3}
+    queue.close()
+
+def test_lease_expiry_and_idempotent_completion(tmp_path, monkeypatch):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite"))
+    queue.enqueue("c", [{"n": 1}])
+    first = queue.lease("a", lease_seconds=0.05)
+    assert queue.lease("b") is None
+    time.sleep(0.1)
+    # The stalled worker's lease ran out; someone else takes the task over.
+    second = queue.lease("b", lease_seconds=5)
+    assert second["id"] == first["id"] and second["attempts"] == 2
+    assert not queue.heartbeat(first["id"], first["token"])
+    assert queue.heartbeat(second["id"], second["token"])
+    # The stalled worker's late result does not count, and does not break b's lease.
+    assert not queue.complete(first["id"], first["token"], {"by": "a"})
+    assert queue.heartbeat(second["id"], second["token"])
+    assert queue.complete(second["id"], second["token"], {"by": "b"})
+    assert not queue.complete(second["id"], second["token"], {"by": "b again"})
+    assert [t["result"] for t in queue.tasks("c")] == [{"by": "b"}]
+    queue.close()
+
+def test_failures_retry_then_give_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_queue, "MAX_ATTEMPTS", 2)
+    path = str(tmp_path / "queue.sqlite")
+    queue = TaskQueue(path)
+    queue.enqueue("c", [{"n": 1}, {"n": 2}])
+
+    def flaky(payload):
+        if payload["n"] == 1:
+            raise ValueError("boom")
+        raise TaskDeferred("out of budget")
+
+    assert run_worker(path, flaky, worker="w") == 0
+    # n=1 was retried until it used up its attempts; n=2 was handed back untouched.
+    assert queue.stats("c") == {"failed": 1, "queued": 1}
+    assert queue.tasks("c", "failed")[0]["error"] == "ValueError: boom"
+    assert queue.tasks("c", "queued")[0]["attempts"] == 0
+    queue.close()
+
+def test_several_processes_share_the_queue(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = TaskQueue(path)
+    queue.enqueue("census", [{"n": n} for n in range(40)])
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(3) as pool:
+        counts = pool.starmap(drain, [(path, f"worker-{i}") for i in range(3)])
+    assert sum(counts) == 40
+    done = queue.tasks("census", "done")
+    assert sorted(t["result"]["square"] for t in done) == [n * n for n in range(40)]
+    assert len({t["worker"] for t in done}) > 1
+    queue.close()
+
+def test_worker_stops_on_lost_lease(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = TaskQueue(path)
+    queue.enqueue("c", [{"n": 1}])
+    budget = RunBudget()
+    budget.stop_if = task_queue.lease_lost
+
+    def stolen(payload):
+        # Another worker takes the task over while this one is still on it.
+        thief = TaskQueue(path)
+        thief._conn.execute("UPDATE tasks SET lease_until = 0")
+        assert thief.lease("thief", lease_seconds=30) is not None
+        thief.close()
+        deadline = time.time() + 5
+        while not task_queue.lease_lost() and time.time() < deadline:
+            time.sleep(0.01)
+        with pytest.raises(BudgetExceeded):
+            budget.check()
+        return {"by": "stale worker"}
+
+    assert run_worker(path, stolen, worker="w", lease_seconds=0.3) == 0
+    task = queue.tasks("c")[0]
+    assert task["status"] == "leased" and task["worker"] == "thief" and task["result"] is None
+    assert not task_queue.lease_lost()
+    budget.check()
+    queue.close()
+
+def test_collect_merges_each_task_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "DEFAULT_ROOT", str(tmp_path / "results"))
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_PATH", str(tmp_path / "search.sqlite"))
+    monkeypatch.setattr(similarity, "SIMILARITY_INDEX_DIR", str(tmp_path / "similarity"))
+    path = str(tmp_path / "queue.sqlite")
+    queue = TaskQueue(path)
+    people = [{"university": "U", "n": n} for n in range(3)]
+    queue.enqueue("c", people[:2])
+    run_worker(path, lambda p: {"Name": f"Person {p['n']}"}, worker="w")
+    first = collect(queue, "c")
+    assert first and collect(queue, "c") is None
+    queue.enqueue("c", people)
+    run_worker(path, lambda p: {"Name": f"Person {p['n']}"}, worker="w")
+    second = collect(queue, "c")
+    store = result_store.ResultStore()
+    assert [r["Name"] for r in store.query(run_ids=[first])] == ["Person 0", "Person 1"]
+    assert [r["Name"] for r in store.query(run_ids=[second])] == ["Person 2"]
+    queue.close()
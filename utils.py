@@ -1,11 +1,28 @@
+import threading
+import requests
 from bs4 import BeautifulSoup
+from urllib.parse import urljoin
 
-def clean_html(raw_html: str) -> str:
+_http = threading.local()
+
+def http_session() -> requests.Session:
+    """
+    Per-thread requests.Session, so repeated requests to the same host reuse
+    pooled keep-alive connections (and TLS sessions) instead of reconnecting.
+    """
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = _http.session = requests.Session()
+    return session
+
+def clean_html(raw_html, from_encoding: str = None) -> str:
     """
     Cleans raw HTML by removing unwanted tags and extracting text.
     
     Args:
-        raw_html (str): The raw HTML string to clean.
+        raw_html (str | bytes): The raw HTML to clean. Bytes are decoded by
+            BeautifulSoup (HTTP charset if given, else the page's <meta> charset).
+        from_encoding (str, optional): Encoding declared by the server for bytes input.
         
     Returns:
         str: The cleaned text content.
@@ -13,8 +30,22 @@ def clean_html(raw_html: str) -> str:
     if not raw_html:
         return ""
         
-    soup = BeautifulSoup(raw_html, 'html.parser')
-    
+    return clean_soup(parse_html(raw_html, from_encoding))
+
+def parse_html(raw_html, from_encoding: str = None) -> BeautifulSoup:
+    """Parses str or raw bytes with the stdlib html.parser."""
+    if isinstance(raw_html, bytes):
+        return BeautifulSoup(raw_html, 'html.parser', from_encoding=from_encoding)
+    return BeautifulSoup(raw_html, 'html.parser')
+
+def absolutize_links(soup: BeautifulSoup, base_url: str) -> BeautifulSoup:
+    """Rewrites every <a href> in the parsed page to an absolute URL, in place."""
+    for a in soup.find_all('a', href=True):
+        a['href'] = urljoin(base_url, a['href'])
+    return soup
+
+def clean_soup(soup: BeautifulSoup) -> str:
+    """Text of an already-parsed page; see clean_html."""
     # If there is no body, we might be dealing with a fragment or just head
     # But usually we expect a full page. If no body, use the whole soup.
     target = soup.body if soup.body else soup